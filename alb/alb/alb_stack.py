@@ -1,9 +1,14 @@
+import os
+
 from aws_cdk import (
     aws_ec2 as _ec2,
     aws_elasticloadbalancingv2 as _elbv2,
     core,
 )
-import pandas as pd
+
+from cdk_common.security_group import add_inbound
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 class AlbStack(core.Stack):
@@ -42,39 +47,10 @@ def create_security_group(self, vpc):
         description='DEMO-ALB-SG',
         security_group_name='DEMO-ALB-SG',
     )
-    add_inbound(self, './security_group/inbound_rules/alb.csv', security_group_alb)
+    add_inbound(self, os.path.join(BASE_DIR, 'security_group', 'inbound_rules', 'alb.csv'), security_group_alb)
 
     return security_group_alb
 
-########################################################
-# インバウンド設定追加（セキュリティグループ）
-########################################################
-def add_inbound(self, path, security_group):
-    csv_input = pd.read_csv(filepath_or_buffer=path, encoding='utf_8', sep=',')
-    for index, row in csv_input.iterrows():
-        type =row[0]
-        peer = row[1]
-        description = row[2]
-        port = row[3]
-        if type == 'any_ipv4':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.any_ipv4(),
-                description = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        elif type == 'prefix':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.prefix_list(peer),
-                description = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        else:
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.ipv4(peer),
-                description = description,
-                connection = _ec2.Port.tcp(port),
-            )
-
 ########################################################
 # ターゲットグループ作成
 ########################################################
@@ -110,10 +86,12 @@ def create_alb(self, vpc, security_group_alb):
     tg_green = create_target_group(self, vpc, 'DEMO-GREEN-TG')
 
     # リスナー追加
+    # ※インバウンドはsecurity_group/inbound_rules/alb.csvで管理するためopen=False
     # ＜Product＞
     listenerProduct = alb.add_listener(
         'AlbAddListnerProduct',
-        port=80
+        port=80,
+        open=False,
     )
     listenerProduct.add_target_groups(
         'AlbAddTgProduct',
@@ -122,7 +100,8 @@ def create_alb(self, vpc, security_group_alb):
     # ＜Test＞
     listenerTest = alb.add_listener(
         'AlbAddListnerTest',
-        port=8080
+        port=8080,
+        open=False,
     )
     listenerTest.add_target_groups(
         'AlbAddTgTest',
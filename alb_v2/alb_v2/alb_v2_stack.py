@@ -1,25 +1,89 @@
-import pandas as pd
+import os
+
 from aws_cdk import (
+    Annotations,
+    CfnOutput,
     Duration,
     Stack,
+    aws_cloudfront as _cloudfront,
+    aws_cloudfront_origins as _origins,
     aws_ec2 as _ec2,
     aws_elasticloadbalancingv2 as _elbv2,
 )
 from constructs import Construct
 
+from cdk_common.alb_listener import listener_ports, load_listener, plan_listeners, uncovered_ports
+from cdk_common.alb_routes import load_routes, route_id, target_group_name
+from cdk_common.cloudfront import ALL_VIEWER_EXCEPT_HOST_HEADER, inbound_csv_name, load_distribution
+from cdk_common.ecs_service import load_service, uses_fargate_spot
+from cdk_common.inbound_rules import load_inbound_rules
+from cdk_common.target_group import load_target_group, spot_drain_fits
+from cdk_common.security_group import add_inbound
+from cdk_common.session_store import load_session_store
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class AlbV2Stack(Stack):
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, vpc: _ec2.IVpc = None, target_group: dict = None,
+                 listener: dict = None, distribution: dict = None, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        # VPC取得
-        vpc = get_vpc(self)
+        # CloudFront（未指定の場合はコンテキスト cloudfront、なければ作成しない）
+        if distribution is None:
+            distribution = self.node.try_get_context('cloudfront')
+        distribution_options = load_distribution(distribution)
+
+        # ルーティング（コンテキスト alb-routes、なければ既定のアクションのみ。EcsV2Stackと同じ値を参照する）
+        # DEMO-SERVICE（CodeDeploy の Blue/Green）がある場合は既定のアクションを覆うルールを作成しない
+        routes = load_routes(self.node.try_get_context('alb-routes'), code_deploy=load_service(self.node.try_get_context('ecs-service')) is not None)
+
+        # リスナー設定（未指定の場合はコンテキスト alb-listener、なければ既定値のHTTP）
+        if listener is None:
+            listener = self.node.try_get_context('alb-listener')
+        listener_options = load_listener(listener)
+        listener_plan = plan_listeners(listener_options)
+        if distribution_options and listener_plan.https and not distribution_options['origin_domain_name']:
+            raise Exception('[error] cloudfront: origin_domain_name is required for the HTTPS listener')
+
+        # ターゲットグループ設定（未指定の場合はコンテキスト alb-target-group、なければ既定値）
+        if target_group is None:
+            target_group = self.node.try_get_context('alb-target-group')
+        target_group_options = load_target_group(target_group)
+        # Fargate Spot を使うサービス（コンテキスト ecs-service・ルート）がある場合のみ確認する
+        services = [load_service(self.node.try_get_context('ecs-service'))] + [route.service for route in routes]
+        if any(uses_fargate_spot(service) for service in services) and not spot_drain_fits(target_group_options):
+            Annotations.of(self).add_warning(
+                'deregistration_delay %ss: Fargate Spot tasks are stopped before they finish draining'
+                % target_group_options['deregistration_delay'])
+
+        # VPC取得（未指定の場合はDEMO-VPCをルックアップ）
+        if vpc is None:
+            vpc = get_vpc(self)
 
         # セキュリティグループ作成
-        security_group_alb = create_security_group(self, vpc)
+        security_group_alb = create_security_group(self, vpc, listener_plan, bool(distribution_options))
 
         # ALB
-        create_alb(self, vpc, security_group_alb)
+        # スティッキーセッション（セッションストアを使う場合は無効）
+        stickiness = not load_session_store(self.node.try_get_context('session-store'))
+
+        self.target_groups, self.listeners = create_alb(self, vpc, security_group_alb, target_group_options,
+                                                        listener_options, listener_plan, stickiness)
+
+        # ルート（パス・ホスト）ごとのターゲットグループ・ルール
+        self.target_groups.update(create_routes(self, vpc, self.listeners['DEMO-PROD-LISTENER'], routes,
+                                                target_group_options, stickiness))
+
+        # ターゲットグループ・リスナーARN出力（EcsV2Stack・CodepipelineV2Stackを単独でデプロイする場合に参照）
+        create_target_group_outputs(self, self.target_groups)
+        create_listener_outputs(self, self.listeners)
+
+        # CloudFront
+        self.distribution = None
+        if distribution_options:
+            self.distribution = create_distribution(self, self.listeners['DEMO-PROD-LISTENER'], listener_plan,
+                                                    distribution_options)
 
 ########################################################
 # VPC取得
@@ -33,8 +97,20 @@ def get_vpc(self):
 
 ########################################################
 # セキュリティグループ作成
+#
+# インバウンドは alb.csv（HTTPSの場合は alb_https.csv）。
+# CloudFrontを使う場合は alb_cloudfront.csv（alb_cloudfront_https.csv）で、
+# CloudFrontのマネージドプレフィックスリストから本番リスナーのポートのみ。
+# ※プレフィックスリストはエントリー数（55）分のルールとして数えられるため、1ルールに留める
+# リスナーのポートがCSVにない場合はエラーにする。
 ########################################################
-def create_security_group(self, vpc):
+def create_security_group(self, vpc, listener_plan, cloudfront=False):
+    inbound_csv = os.path.join(BASE_DIR, 'security_group', 'inbound_rules',
+                               inbound_csv_name(listener_plan.https, cloudfront))
+    missing = uncovered_ports(load_inbound_rules(inbound_csv), listener_ports(listener_plan, cloudfront))
+    if missing:
+        raise Exception('[error] %s: no inbound rule for listener port %s'
+                        % (inbound_csv, ', '.join(str(port) for port in missing)))
 
     # ALB
     security_group_alb = _ec2.SecurityGroup(
@@ -43,58 +119,44 @@ def create_security_group(self, vpc):
         description='DEMO-ALB-SG',
         security_group_name='DEMO-ALB-SG',
     )
-    add_inbound(self, './security_group/inbound_rules/alb.csv', security_group_alb)
+    add_inbound(self, inbound_csv, security_group_alb)
 
     return security_group_alb
 
-########################################################
-# インバウンド設定追加（セキュリティグループ）
-########################################################
-def add_inbound(self, path, security_group):
-    csv_input = pd.read_csv(filepath_or_buffer=path, encoding='utf_8', sep=',')
-    for index, row in csv_input.iterrows():
-        type =row[0]
-        peer = row[1]
-        description = row[2]
-        port = row[3]
-        if type == 'any_ipv4':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.any_ipv4(),
-                description = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        elif type == 'prefix':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.prefix_list(peer),
-                description = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        else:
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.ipv4(peer),
-                description = description,
-                connection = _ec2.Port.tcp(port),
-            )
-
 ########################################################
 # ターゲットグループ作成
+#
+# ルーティング・スロースタート・登録解除の遅延・ヘルスチェックは
+# cdk_common.target_group の設定（Blue/Greenで同じ値）。
 ########################################################
-def create_target_group(self, vpc, tg_name):
+def create_target_group(self, vpc, tg_name, options, stickiness=True):
+    health_check = options['health_check']
     tg = _elbv2.ApplicationTargetGroup(
         self, tg_name,
         port=80,
         target_type=_elbv2.TargetType.IP,
         target_group_name=tg_name,
         vpc=vpc,
-        health_check=_elbv2.HealthCheck(path='/login'),
+        load_balancing_algorithm_type=_elbv2.TargetGroupLoadBalancingAlgorithmType[options['algorithm'].upper()],
+        slow_start=Duration.seconds(int(options['slow_start'])) if options['slow_start'] else None,
+        deregistration_delay=Duration.seconds(int(options['deregistration_delay'])),
+        health_check=_elbv2.HealthCheck(
+            path=health_check['path'],
+            interval=Duration.seconds(int(health_check['interval'])),
+            timeout=Duration.seconds(int(health_check['timeout'])),
+            healthy_threshold_count=int(health_check['healthy_threshold']),
+            unhealthy_threshold_count=int(health_check['unhealthy_threshold']),
+        ),
     )
-    tg.enable_cookie_stickiness(Duration.seconds(1800))
+    if stickiness:
+        tg.enable_cookie_stickiness(Duration.seconds(1800))
     return tg
 
 ########################################################
 # ALB作成
 ########################################################
-def create_alb(self, vpc, security_group_alb):
+def create_alb(self, vpc, security_group_alb, target_group_options, listener_options, listener_plan,
+               stickiness=True):
 
     # ALB作成
     alb = _elbv2.ApplicationLoadBalancer(
@@ -104,17 +166,28 @@ def create_alb(self, vpc, security_group_alb):
         security_group=security_group_alb,
         vpc_subnets=_ec2.SubnetSelection(subnet_type=_ec2.SubnetType.PUBLIC),
         internet_facing=True,
+        http2_enabled=bool(listener_options['http2']),
+        idle_timeout=Duration.seconds(int(listener_options['idle_timeout'])),
     )
 
     # ターゲットグループ作成
-    tg_blue = create_target_group(self, vpc, 'DEMO-BLUE-TG')
-    tg_green = create_target_group(self, vpc, 'DEMO-GREEN-TG')
+    tg_blue = create_target_group(self, vpc, 'DEMO-BLUE-TG', target_group_options, stickiness)
+    tg_green = create_target_group(self, vpc, 'DEMO-GREEN-TG', target_group_options, stickiness)
 
-    # リスナー追加
+    # リスナー追加（HTTPSの場合は証明書を設定）
+    # ※インバウンドはsecurity_group/inbound_rules/alb.csv（alb_https.csv）で管理するためopen=False
+    protocol = _elbv2.ApplicationProtocol.HTTP
+    certificates = None
+    if listener_plan.https:
+        protocol = _elbv2.ApplicationProtocol.HTTPS
+        certificates = [_elbv2.ListenerCertificate.from_arn(listener_options['certificate_arn'])]
     # ＜Product＞
     listenerProduct = alb.add_listener(
         'AlbAddListnerProduct',
-        port=80
+        port=listener_plan.prod_port,
+        protocol=protocol,
+        certificates=certificates,
+        open=False,
     )
     listenerProduct.add_target_groups(
         'AlbAddTgProduct',
@@ -123,9 +196,169 @@ def create_alb(self, vpc, security_group_alb):
     # ＜Test＞
     listenerTest = alb.add_listener(
         'AlbAddListnerTest',
-        port=8080
+        port=listener_plan.test_port,
+        protocol=protocol,
+        certificates=certificates,
+        open=False,
     )
     listenerTest.add_target_groups(
         'AlbAddTgTest',
         target_groups=[tg_green]
     )
+
+    # ＜Redirect＞ HTTP -> HTTPS
+    # ※HTTPからHTTPSへ切り替える場合、既存のリスナーのポート変更後に作成する
+    for source_port, target_port in listener_plan.redirects:
+        redirect = alb.add_redirect(
+            source_port=source_port,
+            source_protocol=_elbv2.ApplicationProtocol.HTTP,
+            target_port=target_port,
+            target_protocol=_elbv2.ApplicationProtocol.HTTPS,
+            open=False,
+        )
+        redirect.node.add_dependency(listenerProduct, listenerTest)
+
+    target_groups = {'DEMO-BLUE-TG': tg_blue, 'DEMO-GREEN-TG': tg_green}
+    listeners = {'DEMO-PROD-LISTENER': listenerProduct, 'DEMO-TEST-LISTENER': listenerTest}
+    return target_groups, listeners
+
+########################################################
+# ルート作成（cdk_common.alb_routes）
+#
+# ルートごとにターゲットグループを作成し、本番リスナーにルールを追加する。
+# weights が複数ある場合はルートのターゲットグループ間の重み付き転送（段階的な切り替え用）。
+# ※DEMO-BLUE-TG はCodeDeployが切り替えるため、ルールからは転送しない
+########################################################
+def create_routes(self, vpc, listener, routes, target_group_options, stickiness=True):
+    target_groups = {}
+    by_route = {}
+    for route in routes:
+        tg_name = target_group_name(route.name)
+        target_groups[tg_name] = by_route[route.name] = create_target_group(
+            self, vpc, tg_name, target_group_options, stickiness)
+
+    for route in routes:
+        conditions = []
+        if route.paths:
+            conditions.append(_elbv2.ListenerCondition.path_patterns(route.paths))
+        if route.hosts:
+            conditions.append(_elbv2.ListenerCondition.host_headers(route.hosts))
+
+        if len(route.weights) == 1:
+            action = _elbv2.ListenerAction.forward([by_route[next(iter(route.weights))]])
+        else:
+            action = _elbv2.ListenerAction.weighted_forward([
+                _elbv2.WeightedTargetGroup(target_group=by_route[target], weight=int(weight))
+                for target, weight in route.weights.items()
+            ])
+        listener.add_action(
+            'AlbAddRoute%s' % route_id(route.name),
+            priority=route.priority,
+            conditions=conditions,
+            action=action,
+        )
+    return target_groups
+
+########################################################
+# ターゲットグループARN出力
+########################################################
+def create_target_group_outputs(self, target_groups):
+    for tg_name, tg in target_groups.items():
+        CfnOutput(
+            self, tg_name + '-ARN',
+            value=tg.target_group_arn,
+            export_name=tg_name + '-ARN',
+        )
+
+########################################################
+# リスナーARN出力（CodeDeployのBlue/Greenの本番・テストリスナー）
+########################################################
+def create_listener_outputs(self, listeners):
+    for listener_name, listener in listeners.items():
+        CfnOutput(
+            self, listener_name + '-ARN',
+            value=listener.listener_arn,
+            export_name=listener_name + '-ARN',
+        )
+
+########################################################
+# CloudFrontディストリビューション作成（cdk_common.cloudfront）
+#
+# 既定のビヘイビアはキャッシュせず、ビューワーのリクエストをそのまま本番リスナーへ転送する。
+# HTTPSの場合は origin_domain_name で証明書を検証するため、ビューワーの Host（*.cloudfront.net）は転送しない
+# （AllViewerExceptHostHeader、ホストのルートは origin_domain_name で評価される）。
+# behaviors のパスパターンはキャッシュポリシーのTTL・キャッシュキーでキャッシュする
+# （オリジンへはキャッシュキーの値のみ転送するため、ホストのルートを使う場合は headers に Host を含める）。
+########################################################
+def create_distribution(self, listener, listener_plan, options):
+    read_timeout = Duration.seconds(int(options['read_timeout']))
+    origin_request_policy = _cloudfront.OriginRequestPolicy.ALL_VIEWER
+    if listener_plan.https:
+        # 証明書に一致するドメイン名でHTTPS接続する
+        origin = _origins.HttpOrigin(
+            options['origin_domain_name'],
+            protocol_policy=_cloudfront.OriginProtocolPolicy.HTTPS_ONLY,
+            https_port=listener_plan.prod_port,
+            read_timeout=read_timeout,
+        )
+        origin_request_policy = _cloudfront.OriginRequestPolicy.from_origin_request_policy_id(
+            self, 'AllViewerExceptHostHeader', ALL_VIEWER_EXCEPT_HOST_HEADER)
+    else:
+        origin = _origins.LoadBalancerV2Origin(
+            listener.load_balancer,
+            protocol_policy=_cloudfront.OriginProtocolPolicy.HTTP_ONLY,
+            http_port=listener_plan.prod_port,
+            read_timeout=read_timeout,
+        )
+
+    additional_behaviors = {}
+    for index, behavior in enumerate(options['behaviors'], 1):
+        cache_policy = _cloudfront.CachePolicy(
+            self, 'CachePolicy%d' % index,
+            comment='DEMO-ALB %s' % behavior['path'],
+            min_ttl=Duration.seconds(int(behavior['min_ttl'])),
+            default_ttl=Duration.seconds(int(behavior['default_ttl'])),
+            max_ttl=Duration.seconds(int(behavior['max_ttl'])),
+            query_string_behavior=cache_key_behavior(_cloudfront.CacheQueryStringBehavior,
+                                                     behavior['query_strings']),
+            header_behavior=(_cloudfront.CacheHeaderBehavior.allow_list(*behavior['headers'])
+                             if behavior['headers'] else _cloudfront.CacheHeaderBehavior.none()),
+            cookie_behavior=cache_key_behavior(_cloudfront.CacheCookieBehavior, behavior['cookies']),
+            enable_accept_encoding_gzip=bool(behavior['compress']),
+            enable_accept_encoding_brotli=bool(behavior['compress']),
+        )
+        additional_behaviors[behavior['path']] = _cloudfront.BehaviorOptions(
+            origin=origin,
+            cache_policy=cache_policy,
+            compress=bool(behavior['compress']),
+            allowed_methods=_cloudfront.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
+            viewer_protocol_policy=_cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+        )
+
+    distribution = _cloudfront.Distribution(
+        self, 'Distribution',
+        comment='DEMO-ALB',
+        price_class=_cloudfront.PriceClass['PRICE_CLASS_' + options['price_class'][len('PriceClass_'):].upper()],
+        http_version=_cloudfront.HttpVersion.HTTP2,
+        default_behavior=_cloudfront.BehaviorOptions(
+            origin=origin,
+            cache_policy=_cloudfront.CachePolicy.CACHING_DISABLED,
+            origin_request_policy=origin_request_policy,
+            compress=bool(options['compress']),
+            allowed_methods=_cloudfront.AllowedMethods.ALLOW_ALL,
+            viewer_protocol_policy=_cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+        ),
+        additional_behaviors=additional_behaviors,
+    )
+    CfnOutput(
+        self, 'DistributionDomainName',
+        value=distribution.distribution_domain_name,
+    )
+    return distribution
+
+def cache_key_behavior(behavior_class, values):
+    if values == 'all':
+        return behavior_class.all()
+    if values:
+        return behavior_class.allow_list(*values)
+    return behavior_class.none()
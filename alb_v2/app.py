@@ -1,26 +1,17 @@
 #!/usr/bin/env python3
 import os
+import sys
 
-import aws_cdk as cdk
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-from alb_v2.alb_v2_stack import AlbV2Stack
+from cdk_common.synth_cache import cached_synth
 
-import os
-
-ACCOUNT_ID = os.environ.get('ACCOUNT_ID')
-if not ACCOUNT_ID:
-    raise Exception('not set ACCOUNT_ID')
-REGION = os.environ.get('REGION')
-if not REGION:
-    raise Exception('not set REGION')
 
-env = {
-    'region':REGION,
-    'account':ACCOUNT_ID,
-}
+def build(app):
+    from cdk_common.app_env import get_env
+    from alb_v2.alb_v2_stack import AlbV2Stack
 
+    AlbV2Stack(app, "AlbV2Stack", env=get_env())
 
-app = cdk.App()
-AlbV2Stack(app, "AlbV2Stack", env=env)
 
-app.synth()
+cached_synth(os.path.dirname(os.path.abspath(__file__)), build)
@@ -1,7 +1,9 @@
 import aws_cdk as core
 import aws_cdk.assertions as assertions
+from aws_cdk import aws_ec2 as _ec2
 
 from alb_v2.alb_v2_stack import AlbV2Stack
+from cdk_common.cloudfront import ALL_VIEWER_EXCEPT_HOST_HEADER
 
 # example tests. To run these tests, uncomment this file along with the example
 # resource in alb_v2/alb_v2_stack.py
@@ -13,3 +15,36 @@ def test_sqs_queue_created():
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+########################################################
+# CloudFront（HTTPSリスナー）
+########################################################
+CERTIFICATE_ARN = 'arn:aws:acm:ap-northeast-1:123456789012:certificate/abc'
+
+
+def test_https_distribution_does_not_forward_viewer_host():
+    app = core.App()
+    vpc = _ec2.Vpc(core.Stack(app, "vpc"), "Vpc")
+    stack = AlbV2Stack(app, "alb-v2", vpc=vpc,
+                       listener={'certificate_arn': CERTIFICATE_ARN},
+                       distribution={'origin_domain_name': 'origin.example.com'})
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::CloudFront::Distribution", {
+        "DistributionConfig": assertions.Match.object_like({
+            "DefaultCacheBehavior": assertions.Match.object_like({
+                "OriginRequestPolicyId": ALL_VIEWER_EXCEPT_HOST_HEADER,
+            }),
+            "Origins": [assertions.Match.object_like({
+                "DomainName": "origin.example.com",
+                "CustomOriginConfig": assertions.Match.object_like({
+                    "HTTPSPort": 443,
+                    "OriginProtocolPolicy": "https-only",
+                }),
+            })],
+        }),
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "SecurityGroupIngress": [assertions.Match.object_like({"SourcePrefixListId": "pl-58a04531", "FromPort": 443})],
+    })
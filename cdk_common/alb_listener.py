@@ -0,0 +1,74 @@
+########################################################
+# ALBリスナー（DEMO-ALB）
+#
+#   certificate_arn     ACM証明書のARN（指定するとHTTPS、未指定はHTTP）
+#   http_port           HTTPの本番リスナー（HTTPSの場合はHTTPSへのリダイレクト）
+#   test_http_port      HTTPのテストリスナー（同上）
+#   https_port          HTTPSの本番リスナー
+#   test_https_port     HTTPSのテストリスナー
+#   redirect_http       HTTPSの場合に http_port / test_http_port をリダイレクトする
+#   http2               HTTP/2
+#   idle_timeout        アイドルタイムアウト（秒）
+#
+# コンテキスト alb-listener。本番リスナーが DEMO-BLUE-TG、テストリスナーが DEMO-GREEN-TG で、
+# CodeDeploy（Blue/Green）のデプロイグループも同じリスナーの組を使う。
+# インバウンドは security_group/inbound_rules/alb.csv（HTTPSは alb_https.csv）で管理する
+# （CloudFrontを使う場合は cdk_common.cloudfront）。
+########################################################
+from collections import namedtuple
+
+DEFAULT_LISTENER = {
+    'certificate_arn': None,
+    'http_port': 80,
+    'test_http_port': 8080,
+    'https_port': 443,
+    'test_https_port': 8443,
+    'redirect_http': True,
+    'http2': True,
+    'idle_timeout': 60,
+}
+
+ListenerPlan = namedtuple('ListenerPlan', ['https', 'prod_port', 'test_port', 'redirects'])
+
+
+def load_listener(options=None):
+    """Return the listener options merged over DEFAULT_LISTENER."""
+    listener = dict(DEFAULT_LISTENER)
+    listener.update(options or {})
+    certificate_arn = listener['certificate_arn']
+    if certificate_arn and not str(certificate_arn).startswith('arn:'):
+        raise Exception('[error] alb-listener: certificate_arn must be an ACM certificate ARN')
+    if not 1 <= int(listener['idle_timeout']) <= 4000:
+        raise Exception('[error] alb-listener: idle_timeout must be between 1 and 4000')
+    ports = [int(listener[key]) for key in ('http_port', 'test_http_port', 'https_port', 'test_https_port')]
+    if any(not 1 <= port <= 65535 for port in ports) or len(set(ports)) != len(ports):
+        raise Exception('[error] alb-listener: ports must be distinct and between 1 and 65535')
+    return listener
+
+
+def plan_listeners(listener):
+    """Return the ListenerPlan (ports of the prod/test listeners and [(source, target)] redirects)."""
+    if not listener['certificate_arn']:
+        return ListenerPlan(False, int(listener['http_port']), int(listener['test_http_port']), [])
+    redirects = []
+    if listener['redirect_http']:
+        redirects = [
+            (int(listener['http_port']), int(listener['https_port'])),
+            (int(listener['test_http_port']), int(listener['test_https_port'])),
+        ]
+    return ListenerPlan(True, int(listener['https_port']), int(listener['test_https_port']), redirects)
+
+
+def listener_ports(plan, cloudfront=False):
+    """Return the ports the ALB inbound rules must allow.
+
+    Behind CloudFront only the production listener is an origin.
+    """
+    if cloudfront:
+        return [plan.prod_port]
+    return [plan.prod_port, plan.test_port] + [source for source, _ in plan.redirects]
+
+
+def uncovered_ports(rules, ports):
+    """Return the ports that no inbound rule allows."""
+    return [port for port in ports if not any(int(rule.port) <= port <= int(rule.to_port) for rule in rules)]
@@ -0,0 +1,108 @@
+########################################################
+# ALBルーティング（本番リスナーのルール）
+#
+# コンテキスト alb-routes: [{
+#   name        ルート名（ターゲットグループ DEMO-<NAME>-TG、サービス DEMO-<NAME>-SERVICE）
+#   priority    ルールの優先度（1〜50000、小さいほど先に評価）
+#   paths       パスパターン（'/api/*' 等）
+#   hosts       ホストヘッダー（'api.example.com' 等）
+#   weights     重み付き転送 {ルート名: 重み}（未指定は自身のターゲットグループへ100%）
+#   service     ECSサービスの設定（cdk_common.ecs_service、false でサービスを作成しない）
+#   size        タスクサイズ（cdk_common.ecs_task のプロファイルまたは {cpu, memory}）
+# }]
+#
+# どのルールにも一致しないリクエストは既定のアクション（DEMO-BLUE-TG）へ転送する。
+# CodeDeploy の Blue/Green が切り替えるのはリスナーの既定のアクションのみのため、
+# ルールの転送先はルートのターゲットグループに限り（default は指定できない）、
+# DEMO-SERVICE がある場合は既定のアクションを覆うルール（'/*' 等）も作成しない。
+# ルートのサービスはCodeDeployの対象外で、ECSのローリング更新でデプロイする。
+########################################################
+import re
+from collections import namedtuple
+
+from cdk_common.ecs_service import load_service
+from cdk_common.ecs_task import load_task
+
+Route = namedtuple('Route', ['name', 'priority', 'paths', 'hosts', 'weights', 'service', 'size'])
+
+DEFAULT_ROUTE = 'default'
+
+# ルールの条件値の上限（パス・ホストの合計）
+MAX_CONDITION_VALUES = 5
+
+
+def load_routes(routes=None, architecture='X86_64', code_deploy=True):
+    """Return the validated Routes of an alb-routes list, in priority order.
+
+    code_deploy: DEMO-SERVICE is deployed by CodeDeploy blue/green, so no
+    rule may take over the listener's default action.
+    """
+    result = []
+    for index, route in enumerate(routes or []):
+        location = 'alb-routes[%d]' % index
+        name = route.get('name') or ''
+        if not re.match(r'^[a-z][a-z0-9-]{0,23}$', name) or name == DEFAULT_ROUTE:
+            raise Exception('[error] %s: name must be 1-24 of [a-z0-9-] (not %r)' % (location, DEFAULT_ROUTE))
+        priority = int(route.get('priority', 0))
+        if not 1 <= priority <= 50000:
+            raise Exception('[error] %s: priority must be between 1 and 50000' % location)
+        paths = list(route.get('paths') or [])
+        hosts = list(route.get('hosts') or [])
+        if not paths and not hosts:
+            raise Exception('[error] %s: paths or hosts is required' % location)
+        if len(paths) + len(hosts) > MAX_CONDITION_VALUES:
+            raise Exception('[error] %s: at most %d paths and hosts' % (location, MAX_CONDITION_VALUES))
+        if code_deploy and _matches_everything(paths, '/') and _matches_everything(hosts, ''):
+            raise Exception('[error] %s: a rule for every request would bypass the CodeDeploy blue/green '
+                            'default action' % location)
+        weights = dict(route.get('weights') or {name: 1})
+        if DEFAULT_ROUTE in weights:
+            raise Exception('[error] %s: weights cannot target %r (DEMO-BLUE-TG is swapped by CodeDeploy)'
+                            % (location, DEFAULT_ROUTE))
+        if any(not 0 <= int(weight) <= 999 for weight in weights.values()) or not any(weights.values()):
+            raise Exception('[error] %s: weights must be between 0 and 999 and not all 0' % location)
+
+        service = load_service(route.get('service'))
+        size = None
+        if service:
+            # イメージは共通のため、アーキテクチャは ecs-task に合わせる
+            size = load_task({'size': route.get('size', 'xlarge'), 'architecture': architecture})
+        result.append(Route(name, priority, paths, hosts, weights, service, size))
+
+    names = [route.name for route in result]
+    if len(set(names)) != len(names):
+        raise Exception('[error] alb-routes: names must be unique')
+    priorities = [route.priority for route in result]
+    if len(set(priorities)) != len(priorities):
+        raise Exception('[error] alb-routes: priorities must be unique')
+    for route in result:
+        unknown = [target for target in route.weights if target not in names]
+        if unknown:
+            raise Exception('[error] alb-routes %s: unknown weights target %s' % (route.name, ', '.join(unknown)))
+    # サービスを登録するターゲットグループはいずれかのルールから転送されている必要がある
+    forwarded = {target for route in result for target in route.weights}
+    for route in result:
+        if route.service and route.name not in forwarded:
+            raise Exception('[error] alb-routes %s: no rule forwards to its target group' % route.name)
+    return sorted(result, key=lambda route: route.priority)
+
+
+def _matches_everything(patterns, prefix):
+    """Return whether a condition's patterns match any value (no patterns means no condition)."""
+    return not patterns or any(re.match(r'^(%s)?\*+$' % re.escape(prefix), pattern.strip()) for pattern in patterns)
+
+
+def target_group_name(route_name):
+    return 'DEMO-%s-TG' % route_name.upper()
+
+
+def service_name(route_name):
+    return 'DEMO-%s-SERVICE' % route_name.upper()
+
+
+def task_family(route_name):
+    return 'DEMO-%s-TASK' % route_name.upper()
+
+
+def route_id(route_name):
+    return ''.join(part.capitalize() for part in route_name.split('-'))
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import aws_cdk as cdk
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+########################################################
+# 環境（アカウント・リージョン）取得
+########################################################
+def get_env():
+    account_id = os.environ.get('ACCOUNT_ID')
+    if not account_id:
+        raise Exception('not set ACCOUNT_ID')
+    region = os.environ.get('REGION')
+    if not region:
+        raise Exception('not set REGION')
+    return cdk.Environment(account=account_id, region=region)
+
+########################################################
+# プロジェクトディレクトリをインポートパスへ追加
+# 例: add_project_paths('vpc_v2') -> from vpc_v2.vpc_v2_stack import ...
+########################################################
+def add_project_paths(*project_names):
+    for project_name in project_names:
+        path = os.path.join(ROOT_DIR, project_name)
+        if path not in sys.path:
+            sys.path.append(path)
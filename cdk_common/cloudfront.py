@@ -0,0 +1,99 @@
+########################################################
+# CloudFrontディストリビューション（オリジン DEMO-ALB）
+#
+#   price_class           PriceClass_100 / PriceClass_200 / PriceClass_All
+#   origin_domain_name    HTTPSリスナーの場合のオリジンのドメイン名（証明書に一致するALBのエイリアス）
+#   read_timeout          オリジンの応答タイムアウト（秒）
+#   compress              圧縮（gzip / brotli）
+#   behaviors             パスパターンごとのキャッシュ [{
+#       path              パスパターン（'/static/*' 等）
+#       min_ttl / default_ttl / max_ttl    TTL（秒）
+#       query_strings     キャッシュキーのクエリ文字列（リスト または 'all'）
+#       headers           キャッシュキーのヘッダー（最大10）
+#       cookies           キャッシュキーのCookie（リスト または 'all'）
+#       compress          圧縮（未指定はディストリビューションの compress）
+#   }]
+#
+# コンテキスト cloudfront（true または上記の辞書、既定は無効）。
+# behaviors に一致しないリクエストはキャッシュせず、すべてのヘッダー・Cookie・クエリ文字列をALBへ転送する
+# （HTTPSリスナーの場合は Host を除く）。
+# ALBのインバウンドは security_group/inbound_rules/alb_cloudfront.csv（HTTPSは alb_cloudfront_https.csv）の
+# CloudFrontのマネージドプレフィックスリストのみ。
+########################################################
+DEFAULT_DISTRIBUTION = {
+    'price_class': 'PriceClass_200',
+    'origin_domain_name': None,
+    'read_timeout': 30,
+    'compress': True,
+    'behaviors': [],
+}
+
+DEFAULT_BEHAVIOR = {
+    'min_ttl': 0,
+    'default_ttl': 86400,
+    'max_ttl': 31536000,
+    'query_strings': [],
+    'headers': [],
+    'cookies': [],
+    'compress': None,
+}
+
+PRICE_CLASSES = ('PriceClass_100', 'PriceClass_200', 'PriceClass_All')
+
+# マネージドのオリジンリクエストポリシー AllViewerExceptHostHeader
+# （HTTPSのオリジンは証明書を origin_domain_name で検証するため、ビューワーの Host を転送しない）
+ALL_VIEWER_EXCEPT_HOST_HEADER = 'b689b0a8-53d0-40ab-baf2-68738e2966ac'
+
+# キャッシュビヘイビアの上限（ディストリビューションあたり）
+MAX_BEHAVIORS = 25
+# キャッシュキーのヘッダーの上限（キャッシュポリシーあたり）
+MAX_HEADERS = 10
+
+
+def load_distribution(options=None):
+    """Return the distribution options merged over DEFAULT_DISTRIBUTION, or None when disabled."""
+    if not options:
+        return None
+    distribution = dict(DEFAULT_DISTRIBUTION)
+    if isinstance(options, dict):
+        distribution.update(options)
+    if distribution['price_class'] not in PRICE_CLASSES:
+        raise Exception('[error] cloudfront: price_class must be one of %s' % ', '.join(PRICE_CLASSES))
+    if not 1 <= int(distribution['read_timeout']) <= 60:
+        raise Exception('[error] cloudfront: read_timeout must be between 1 and 60')
+
+    behaviors = [load_behavior(behavior, distribution['compress'], 'cloudfront.behaviors[%d]' % index)
+                 for index, behavior in enumerate(distribution['behaviors'] or [])]
+    if len(behaviors) > MAX_BEHAVIORS:
+        raise Exception('[error] cloudfront: at most %d behaviors' % MAX_BEHAVIORS)
+    paths = [behavior['path'] for behavior in behaviors]
+    if len(set(paths)) != len(paths):
+        raise Exception('[error] cloudfront: behavior paths must be unique')
+    distribution['behaviors'] = behaviors
+    return distribution
+
+
+def load_behavior(options, compress=True, location='cloudfront.behaviors'):
+    """Return a cache behavior merged over DEFAULT_BEHAVIOR."""
+    behavior = dict(DEFAULT_BEHAVIOR)
+    behavior.update(options or {})
+    if behavior['compress'] is None:
+        behavior['compress'] = compress
+    path = behavior.get('path') or ''
+    if not path or path in ('*', '/*'):
+        raise Exception('[error] %s: path is required (the default behavior is not cached)' % location)
+    if not 0 <= int(behavior['min_ttl']) <= int(behavior['default_ttl']) <= int(behavior['max_ttl']):
+        raise Exception('[error] %s: ttls must be 0 <= min_ttl <= default_ttl <= max_ttl' % location)
+    for key in ('query_strings', 'cookies'):
+        if behavior[key] != 'all' and not isinstance(behavior[key], list):
+            raise Exception('[error] %s: %s must be a list or \'all\'' % (location, key))
+    if not isinstance(behavior['headers'], list) or len(behavior['headers']) > MAX_HEADERS:
+        raise Exception('[error] %s: headers must be a list of at most %d' % (location, MAX_HEADERS))
+    return behavior
+
+
+def inbound_csv_name(https, cloudfront):
+    """Return the ALB inbound-rule CSV for the listener protocol and CloudFront."""
+    if cloudfront:
+        return 'alb_cloudfront_https.csv' if https else 'alb_cloudfront.csv'
+    return 'alb_https.csv' if https else 'alb.csv'
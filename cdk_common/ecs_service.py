@@ -0,0 +1,90 @@
+########################################################
+# ECSサービス（DEMO-SERVICE）
+#
+#   min_capacity / max_capacity   タスク数（Application Auto Scaling の範囲）
+#   cpu_utilization               CPU使用率（%）のターゲット追跡（null で無効）
+#   memory_utilization            メモリ使用率（%）のターゲット追跡（null で無効）
+#   requests_per_target           ALB RequestCountPerTarget（1分あたり）のターゲット追跡（null で無効）
+#                                 ※ルートのサービスのみ。DEMO-SERVICE はCodeDeployの切り替えで
+#                                   本番のターゲットグループが入れ替わるため、CPU・メモリで追跡する
+#   scale_in_cooldown             スケールインのクールダウン（秒）
+#   scale_out_cooldown            スケールアウトのクールダウン（秒）
+#   health_check_grace_period     起動直後にALBヘルスチェックを無視する時間（秒）
+#   capacity_provider_strategy    {base, fargate_weight, fargate_spot_weight}
+#                                 base 台は FARGATE、残りを重みの比で FARGATE / FARGATE_SPOT に配分
+#                                 （null で起動タイプ FARGATE のみ）
+#
+# コンテキスト ecs-service（false でサービスを作成しない）。
+########################################################
+DEFAULT_SERVICE = {
+    'min_capacity': 2,
+    'max_capacity': 10,
+    'cpu_utilization': 60,
+    'memory_utilization': 75,
+    'requests_per_target': 1000,
+    'scale_in_cooldown': 300,
+    'scale_out_cooldown': 60,
+    'health_check_grace_period': 60,
+    'capacity_provider_strategy': None,
+}
+
+DEFAULT_CAPACITY_PROVIDER_STRATEGY = {
+    'base': 2,
+    'fargate_weight': 1,
+    'fargate_spot_weight': 3,
+}
+
+########################################################
+# Fargate Spot の中断
+#
+# 中断の2分前に通知され、ECSはタスクをDRAININGにしてターゲットグループから
+# 登録解除する。登録解除の遅延（処理中リクエストの完了待ち、cdk_common.target_group）を
+# 通知から停止までの間に収め、コンテナには停止（SIGKILL）まで最大の猶予を与える。
+########################################################
+SPOT_STOP_TIMEOUT = 120
+
+SERVICE_NAME = 'DEMO-SERVICE'
+
+
+def load_service(options=None):
+    """Return the service options merged over DEFAULT_SERVICE, or None when disabled."""
+    if options is False:
+        return None
+    service = dict(DEFAULT_SERVICE)
+    if isinstance(options, dict):
+        service.update(options)
+
+    if not 0 <= int(service['min_capacity']) <= int(service['max_capacity']) or int(service['max_capacity']) < 1:
+        raise Exception('[error] ecs-service: need 0 <= min_capacity <= max_capacity and max_capacity >= 1')
+    for key in ('cpu_utilization', 'memory_utilization'):
+        if service[key] is not None and not 10 <= service[key] <= 90:
+            raise Exception('[error] ecs-service: %s must be between 10 and 90' % key)
+    if service['requests_per_target'] is not None and service['requests_per_target'] <= 0:
+        raise Exception('[error] ecs-service: requests_per_target must be positive')
+    for key in ('scale_in_cooldown', 'scale_out_cooldown', 'health_check_grace_period'):
+        if int(service[key]) < 0:
+            raise Exception('[error] ecs-service: %s must not be negative' % key)
+
+    strategy = service['capacity_provider_strategy']
+    if strategy:
+        strategy = dict(DEFAULT_CAPACITY_PROVIDER_STRATEGY, **(strategy if isinstance(strategy, dict) else {}))
+        if any(int(value) < 0 for value in strategy.values()):
+            raise Exception('[error] ecs-service: capacity_provider_strategy values must not be negative')
+        if int(strategy['fargate_weight']) + int(strategy['fargate_spot_weight']) < 1:
+            raise Exception('[error] ecs-service: capacity_provider_strategy needs a positive weight')
+        service['capacity_provider_strategy'] = strategy
+    return service
+
+
+def capacity_providers(strategy):
+    """Return [(capacity provider, base, weight)] for a capacity_provider_strategy."""
+    return [
+        ('FARGATE', int(strategy['base']), int(strategy['fargate_weight'])),
+        ('FARGATE_SPOT', 0, int(strategy['fargate_spot_weight'])),
+    ]
+
+
+def uses_fargate_spot(service):
+    """Return whether loaded service options place any tasks on FARGATE_SPOT."""
+    strategy = service and service['capacity_provider_strategy']
+    return bool(strategy and int(strategy['fargate_spot_weight']))
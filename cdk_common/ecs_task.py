@@ -0,0 +1,57 @@
+########################################################
+# タスクサイズ・CPUアーキテクチャ（DEMO-TASK）
+#
+#   size          プロファイル名（TASK_SIZES）または {cpu, memory}
+#   architecture  X86_64 / ARM64（Graviton）
+#
+# コンテキスト ecs-task。ECSのタスク定義とCodeBuildのビルド環境の
+# 両方がこの設定を参照するため、イメージとタスクのアーキテクチャは一致する。
+# ※DEMO-SERVICE（CODE_DEPLOY）の作成後はCloudFormationでタスク定義を更新できないため、
+#   変更はパイプラインの taskdef.json で行う（demo_v2/README.md「デプロイ（CodeDeploy）」）
+########################################################
+TASK_SIZES = {
+    'xsmall': {'cpu': 256, 'memory': 512},
+    'small': {'cpu': 512, 'memory': 1024},
+    'medium': {'cpu': 1024, 'memory': 2048},
+    'large': {'cpu': 2048, 'memory': 4096},
+    'xlarge': {'cpu': 2048, 'memory': 8192},
+    '2xlarge': {'cpu': 4096, 'memory': 16384},
+}
+
+DEFAULT_TASK = {
+    'size': 'xlarge',
+    'architecture': 'X86_64',
+}
+
+ARCHITECTURES = ('X86_64', 'ARM64')
+
+# Fargateで指定できるCPUごとのメモリ（MiB）
+FARGATE_MEMORY = {
+    256: [512, 1024, 2048],
+    512: list(range(1024, 4096 + 1, 1024)),
+    1024: list(range(2048, 8192 + 1, 1024)),
+    2048: list(range(4096, 16384 + 1, 1024)),
+    4096: list(range(8192, 30720 + 1, 1024)),
+    8192: list(range(16384, 61440 + 1, 4096)),
+    16384: list(range(32768, 122880 + 1, 8192)),
+}
+
+
+def load_task(options=None):
+    """Return {'cpu', 'memory', 'architecture'} for the ecs-task options."""
+    task = dict(DEFAULT_TASK)
+    task.update(options or {})
+
+    size = task['size']
+    if isinstance(size, str):
+        if size not in TASK_SIZES:
+            raise Exception('[error] ecs-task: size must be one of %s' % ', '.join(TASK_SIZES))
+        size = TASK_SIZES[size]
+    cpu, memory = int(size['cpu']), int(size['memory'])
+    if memory not in FARGATE_MEMORY.get(cpu, []):
+        raise Exception('[error] ecs-task: cpu %d / memory %d is not a Fargate combination' % (cpu, memory))
+
+    architecture = str(task['architecture']).upper()
+    if architecture not in ARCHITECTURES:
+        raise Exception('[error] ecs-task: architecture must be one of %s' % ', '.join(ARCHITECTURES))
+    return {'cpu': cpu, 'memory': memory, 'architecture': architecture}
@@ -0,0 +1,42 @@
+########################################################
+# VPCフローログ（S3）
+#
+# 集計に使うフィールドだけのカスタム形式（既定形式の約半分のサイズ）。
+# az-id でAZ、interface-id でNATゲートウェイのENIを判別する。
+########################################################
+FIELDS = (
+    'az-id',
+    'interface-id',
+    'srcaddr',
+    'dstaddr',
+    'dstport',
+    'protocol',
+    'packets',
+    'bytes',
+    'action',
+)
+
+LOG_FORMAT = ' '.join('${%s}' % field for field in FIELDS)
+
+DEFAULT_OPTIONS = {
+    'traffic_type': 'ALL',
+    # 集約間隔（秒）: 60 / 600
+    'aggregation_interval': 600,
+    'retention_days': 30,
+}
+
+TRAFFIC_TYPES = ('ALL', 'ACCEPT', 'REJECT')
+
+
+def load_options(options):
+    """Return flow log options (True or a dict) merged over DEFAULT_OPTIONS, or None when off."""
+    if not options:
+        return None
+    merged = dict(DEFAULT_OPTIONS)
+    if isinstance(options, dict):
+        merged.update(options)
+    if merged['traffic_type'] not in TRAFFIC_TYPES:
+        raise Exception('[error] flow_logs: traffic_type must be one of %s' % ', '.join(TRAFFIC_TYPES))
+    if int(merged['aggregation_interval']) not in (60, 600):
+        raise Exception('[error] flow_logs: aggregation_interval must be 60 or 600')
+    return merged
@@ -0,0 +1,144 @@
+import csv
+import hashlib
+import ipaddress
+import os
+import re
+from collections import namedtuple
+
+########################################################
+# インバウンドルール読込（security_group/inbound_rules/*.csv）
+#
+# CSV形式: type,peer,description,port
+#   type: any_ipv4 / ipv4 / prefix
+#   port: 80 / 8000-8100
+########################################################
+InboundRule = namedtuple('InboundRule', ['type', 'peer', 'description', 'port', 'to_port'])
+
+RULE_TYPES = ('any_ipv4', 'ipv4', 'prefix')
+HEADER = ['type', 'peer', 'description', 'port']
+
+_PREFIX_LIST_PATTERN = re.compile(r'^pl-[0-9a-f]+$')
+
+# path -> (mtime_ns, size, sha256, rules)
+_cache = {}
+
+
+def load_inbound_rules(path):
+    """Return the rules of an inbound-rule CSV as a tuple of InboundRule.
+
+    The parsed result is cached per file. The cache is reused while the
+    file's mtime and size are unchanged, or when its contents hash to the
+    same digest as the cached copy.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cached = _cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[3]
+
+    digest = hashlib.sha256()
+    with open(path, encoding='utf_8_sig', newline='') as fp:
+        rules = tuple(parse_inbound_rules(_hashed_lines(fp, digest), path))
+    sha256 = digest.hexdigest()
+
+    if cached and cached[2] == sha256:
+        rules = cached[3]
+    _cache[path] = (stat.st_mtime_ns, stat.st_size, sha256, rules)
+    return rules
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def _hashed_lines(lines, digest):
+    for line in lines:
+        digest.update(line.encode('utf_8'))
+        yield line
+
+
+def parse_inbound_rules(lines, source='<csv>'):
+    """Parse and validate inbound-rule CSV lines one row at a time."""
+    reader = csv.reader(lines)
+    for row in reader:
+        if not row or all(not column.strip() for column in row):
+            continue
+        if reader.line_num == 1 and [column.strip() for column in row] == HEADER:
+            continue
+        yield parse_inbound_rule(row, '%s:%d' % (source, reader.line_num))
+
+
+def parse_inbound_rule(row, location='<csv>'):
+    if len(row) != len(HEADER):
+        raise Exception('[error] %s: expected %d columns, got %d' % (location, len(HEADER), len(row)))
+    type, peer, description, port = (column.strip() for column in row)
+
+    if type not in RULE_TYPES:
+        raise Exception('[error] %s: unknown rule type %r' % (location, type))
+    if type == 'any_ipv4':
+        peer = '0.0.0.0/0'
+    elif type == 'prefix':
+        if not _PREFIX_LIST_PATTERN.match(peer):
+            raise Exception('[error] %s: invalid prefix list id %r' % (location, peer))
+    else:
+        try:
+            if '/' not in peer:
+                raise ValueError(peer)
+            ipaddress.IPv4Network(peer, strict=False)
+        except ValueError:
+            raise Exception('[error] %s: invalid IPv4 CIDR %r' % (location, peer))
+
+    try:
+        from_port, _, to_port = port.partition('-')
+        from_port = int(from_port)
+        to_port = int(to_port) if to_port else from_port
+    except ValueError:
+        raise Exception('[error] %s: invalid port %r' % (location, port))
+    if not 0 <= from_port <= to_port <= 65535:
+        raise Exception('[error] %s: port out of range %r' % (location, port))
+
+    return InboundRule(type, peer, description or None, from_port, to_port)
+
+
+def port_label(rule):
+    if rule.port == rule.to_port:
+        return '%d' % rule.port
+    return '%d-%d' % (rule.port, rule.to_port)
+
+
+########################################################
+# SecurityGroupIngress（CloudFormation）変換
+########################################################
+def ingress_properties(rules):
+    """Render rules as a CloudFormation SecurityGroupIngress list.
+
+    The output mirrors what aws_ec2.SecurityGroup.add_ingress_rule renders
+    inline, including the default description and the removal of duplicate
+    peer/port pairs (the first rule wins).
+    """
+    properties = []
+    seen = set()
+    for rule in rules:
+        key = (rule.type == 'prefix', rule.peer, rule.port, rule.to_port)
+        if key in seen:
+            continue
+        seen.add(key)
+        properties.append(ingress_property(rule))
+    return properties
+
+
+def ingress_property(rule):
+    description = rule.description
+    if description is None:
+        description = 'from %s:%s' % (rule.peer, port_label(rule))
+    if rule.type == 'prefix':
+        peer = {'SourcePrefixListId': rule.peer}
+    else:
+        peer = {'CidrIp': rule.peer}
+    return {
+        **peer,
+        'Description': description,
+        'FromPort': rule.port,
+        'IpProtocol': 'tcp',
+        'ToPort': rule.to_port,
+    }
@@ -0,0 +1,49 @@
+from collections import namedtuple
+
+########################################################
+# マネージドプレフィックスリスト化
+#
+# 同じポート範囲に複数のIPv4 CIDRがあるルールを、スタックが所有する
+# プレフィックスリスト（CfnPrefixList）1つと、それを参照するルール
+# （ポート範囲ごとに1つ）にまとめる。CIDRの集合が同じポート範囲は
+# 同じプレフィックスリストを参照する。
+#
+# CIDRの追加・削除はプレフィックスリストのエントリ更新になり、
+# セキュリティグループのルールは変わらない。
+# ※ 参照されたプレフィックスリストは MaxEntries 分のルールとして
+#    セキュリティグループのルール数上限に数えられる。
+########################################################
+PrefixListPlan = namedtuple('PrefixListPlan', ['entries', 'ports'])
+
+# これ未満のCIDRしかないポート範囲はそのままのルールにする
+MIN_ENTRIES = 2
+
+
+def plan_prefix_lists(rules, min_entries=MIN_ENTRIES):
+    """Split rules into prefix-list plans and the rules kept as they are.
+
+    PrefixListPlan.entries is a tuple of (cidr, description) and
+    PrefixListPlan.ports a list of (port, to_port) that reference it.
+    Plans are ordered by the first rule they absorb; kept rules keep
+    their input order.
+    """
+    by_port = {}
+    for rule in rules:
+        if rule.type == 'ipv4':
+            by_port.setdefault((rule.port, rule.to_port), []).append(rule)
+
+    grouped = {}
+    for key, port_rules in by_port.items():
+        entries = {}
+        for rule in port_rules:
+            entries.setdefault(rule.peer, rule.description)
+        if len(entries) >= min_entries:
+            grouped[key] = tuple(sorted(entries.items()))
+
+    # CIDRの集合が同じならプレフィックスリストを共有する
+    plans = {}
+    for key, entries in grouped.items():
+        cidrs = tuple(cidr for cidr, _ in entries)
+        plans.setdefault(cidrs, PrefixListPlan(entries, [])).ports.append(key)
+    remaining = [rule for rule in rules if not (rule.type == 'ipv4' and (rule.port, rule.to_port) in grouped)]
+    return list(plans.values()), remaining
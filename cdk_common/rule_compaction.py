@@ -0,0 +1,151 @@
+import ipaddress
+import socket
+from collections import Counter, defaultdict
+
+from cdk_common.inbound_rules import InboundRule, port_label
+
+########################################################
+# インバウンドルール圧縮
+#
+# 1. 重複ルールの除去
+# 2. ポート範囲ごとにIPv4 CIDRを集約（隣接・重複CIDRをスーパーネットへ）
+# 3. 接続元ごとに連続・重複するポートを範囲へマージ
+#
+# いずれもソート済み区間のマージで処理するため O(n log n)
+# （CIDRは整数のアドレス区間として扱う）
+########################################################
+class _Group:
+    """Input rules that end up as one output rule."""
+    __slots__ = ('type', 'peer', 'port', 'to_port', 'rules')
+
+    def __init__(self, type, peer, port, to_port, rules):
+        self.type = type
+        self.peer = peer
+        self.port = port
+        self.to_port = to_port
+        self.rules = rules
+
+    def first_index(self):
+        return min(index for index, _ in self.rules)
+
+    def to_rule(self):
+        if len(self.rules) == 1:
+            return self.rules[0][1]
+        descriptions = {rule.description for _, rule in self.rules}
+        if len(descriptions) == 1:
+            description = descriptions.pop()
+        else:
+            description = 'compacted from %d rules' % len(self.rules)
+        return InboundRule(self.type, self.peer, description, self.port, self.to_port)
+
+
+def compact_inbound_rules(rules):
+    """Return an equivalent, smaller list of inbound rules.
+
+    Rules that are not merged with anything are returned unchanged, and the
+    output keeps the order in which each rule first appeared in the input.
+    """
+    groups = _aggregate_cidrs(_deduplicate(rules))
+    groups = _merge_ports(groups)
+    groups.sort(key=_Group.first_index)
+    return [group.to_rule() for group in groups]
+
+
+def _deduplicate(rules):
+    seen = set()
+    for index, rule in enumerate(rules):
+        key = (rule.type == 'prefix', rule.peer, rule.port, rule.to_port)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield index, rule
+
+
+def _aggregate_cidrs(indexed_rules):
+    by_ports = defaultdict(list)
+    groups = []
+    for index, rule in indexed_rules:
+        if rule.type == 'prefix':
+            groups.append(_Group(rule.type, rule.peer, rule.port, rule.to_port, [(index, rule)]))
+        else:
+            first, last, prefixlen = _cidr_range(rule.peer)
+            by_ports[(rule.port, rule.to_port)].append((first, last, prefixlen, index, rule))
+
+    for (port, to_port), members in by_ports.items():
+        # アドレス順に並べ、重複・隣接する区間をまとめる
+        members.sort(key=lambda member: (member[0], -member[1]))
+        i = 0
+        while i < len(members):
+            first, last = members[i][0], members[i][1]
+            j = i + 1
+            while j < len(members) and members[j][0] <= last + 1:
+                last = max(last, members[j][1])
+                j += 1
+            if j - i == 1:
+                _, _, prefixlen, index, rule = members[i]
+                groups.append(_Group(rule.type, _format_cidr(first, prefixlen), port, to_port, [(index, rule)]))
+            else:
+                # 区間を最小個数のCIDRへ分解し、各入力を開始アドレスで対応付ける
+                k = i
+                for network in ipaddress.summarize_address_range(ipaddress.IPv4Address(first),
+                                                                 ipaddress.IPv4Address(last)):
+                    network_last = int(network.broadcast_address)
+                    contained = []
+                    while k < j and members[k][0] <= network_last:
+                        contained.append(members[k][3:])
+                        k += 1
+                    type = 'any_ipv4' if network.prefixlen == 0 else 'ipv4'
+                    groups.append(_Group(type, str(network), port, to_port, contained))
+            i = j
+    return groups
+
+
+def _cidr_range(peer):
+    address, _, prefixlen = peer.partition('/')
+    prefixlen = int(prefixlen)
+    size = 1 << (32 - prefixlen)
+    first = int.from_bytes(socket.inet_aton(address), 'big') & ~(size - 1)
+    return first, first + size - 1, prefixlen
+
+
+def _format_cidr(first, prefixlen):
+    return '%s/%d' % (socket.inet_ntoa(first.to_bytes(4, 'big')), prefixlen)
+
+
+def _merge_ports(groups):
+    by_peer = defaultdict(list)
+    for group in groups:
+        by_peer[(group.type, group.peer)].append(group)
+
+    merged = []
+    for members in by_peer.values():
+        members.sort(key=lambda group: (group.port, group.to_port))
+        first = members[0]
+        port, to_port, rules = first.port, first.to_port, list(first.rules)
+        for group in members[1:]:
+            if group.port <= to_port + 1:
+                to_port = max(to_port, group.to_port)
+                rules.extend(group.rules)
+            else:
+                merged.append(_Group(first.type, first.peer, port, to_port, rules))
+                port, to_port, rules = group.port, group.to_port, list(group.rules)
+        merged.append(_Group(first.type, first.peer, port, to_port, rules))
+    return merged
+
+
+########################################################
+# 圧縮レポート
+########################################################
+def compaction_report(before, after, name=''):
+    before = list(before)
+    after = list(after)
+    lines = ['%s: %d -> %d inbound rules' % (name or 'inbound rules', len(before), len(after))]
+    before_types = Counter(rule.type for rule in before)
+    after_types = Counter(rule.type for rule in after)
+    for type in sorted(set(before_types) | set(after_types)):
+        lines.append('  %-9s %6d -> %6d' % (type, before_types[type], after_types[type]))
+    unchanged = set(before)
+    for rule in after:
+        if rule not in unchanged:
+            lines.append('  + %s %s:%s (%s)' % (rule.type, rule.peer, port_label(rule), rule.description))
+    return '\n'.join(lines)
@@ -0,0 +1,86 @@
+import sys
+
+from aws_cdk import aws_ec2 as _ec2
+
+from cdk_common.inbound_rules import InboundRule, ingress_properties, load_inbound_rules
+from cdk_common.prefix_lists import plan_prefix_lists
+from cdk_common.rule_compaction import compact_inbound_rules, compaction_report
+
+########################################################
+# インバウンド設定追加（セキュリティグループ）
+#
+# bulk=True: 全ルールをPython側で組み立て、SecurityGroupIngressとして
+#            1回のJSII呼び出しでCfnSecurityGroupへ設定する
+# bulk=False: ルールごとにadd_ingress_ruleを呼び出す
+# compact=True: CIDR集約・ポート範囲マージ後のルールを設定する
+# prefix_lists=True: 同じポートに複数のCIDRがある場合、スタックが所有する
+#                    プレフィックスリストを作成し、ポートごとに1ルールで参照する
+########################################################
+def add_inbound(self, path, security_group, bulk=True, compact=True, prefix_lists=True):
+    rules = load_inbound_rules(path)
+    if compact:
+        compacted = compact_inbound_rules(rules)
+        if len(compacted) != len(rules):
+            print(compaction_report(rules, compacted, security_group.node.id), file=sys.stderr)
+        rules = compacted
+    if prefix_lists:
+        rules = add_prefix_lists(self, security_group, rules)
+    if bulk:
+        add_ingress_rules(security_group, rules)
+        return
+    for rule in rules:
+        if rule.type == 'any_ipv4':
+            peer = _ec2.Peer.any_ipv4()
+        elif rule.type == 'prefix':
+            peer = _ec2.Peer.prefix_list(rule.peer)
+        else:
+            peer = _ec2.Peer.ipv4(rule.peer)
+        if rule.port == rule.to_port:
+            connection = _ec2.Port.tcp(rule.port)
+        else:
+            connection = _ec2.Port.tcp_range(rule.port, rule.to_port)
+        security_group.add_ingress_rule(
+            peer = peer,
+            description = rule.description,
+            connection = connection,
+        )
+
+########################################################
+# プレフィックスリスト作成（cdk_common.prefix_lists）
+#
+# 作成したプレフィックスリストを参照するルールに置き換えたルールを返す。
+########################################################
+def add_prefix_lists(self, security_group, rules):
+    plans, rules = plan_prefix_lists(rules)
+    if not plans:
+        return rules
+    name = security_group.node.id
+    rules = list(rules)
+    for index, plan in enumerate(plans, 1):
+        prefix_list_name = '%s-PL-%d' % (name, index)
+        prefix_list = _ec2.CfnPrefixList(
+            self, '%sPrefixList%d' % (name, index),
+            address_family='IPv4',
+            max_entries=len(plan.entries),
+            prefix_list_name=prefix_list_name,
+            entries=[
+                _ec2.CfnPrefixList.EntryProperty(cidr=cidr, description=description)
+                for cidr, description in plan.entries
+            ],
+        )
+        for port, to_port in plan.ports:
+            rules.append(InboundRule('prefix', prefix_list.attr_prefix_list_id, prefix_list_name, port, to_port))
+    return rules
+
+def add_ingress_rules(security_group, rules):
+    """Set the inline ingress rules of security_group in one step.
+
+    This replaces the SecurityGroupIngress list that the L2 construct would
+    render, so it must be the only source of inline (CIDR / prefix list)
+    ingress rules on the group. Rules whose peer is another security group
+    are emitted as separate AWS::EC2::SecurityGroupIngress resources by CDK
+    and are not affected.
+    """
+    properties = ingress_properties(rules)
+    if properties:
+        security_group.node.default_child.add_property_override('SecurityGroupIngress', properties)
@@ -0,0 +1,52 @@
+########################################################
+# セッションストア（ElastiCache for Redis）
+#
+#   node_type             ノードタイプ
+#   engine_version        Redisのバージョン
+#   replicas              レプリカ数（1以上でマルチAZ・自動フェイルオーバー）
+#   port                  ポート
+#   transit_encryption    通信の暗号化（TLS）
+#
+# コンテキスト session-store（true または上記の辞書、既定は無効）。
+# VpcV2Stack がPRIVATEサブネットにレプリケーショングループを作成し、
+# EcsV2Stack がエンドポイントをコンテナの環境変数へ渡す。
+# セッションをタスク間で共有するため、AlbV2Stack はスティッキーセッションを無効にする。
+# ※DEMO-SERVICE（CODE_DEPLOY）の作成後はCloudFormationでタスク定義を更新できないため、
+#   環境変数はパイプラインの taskdef.json で追加する（demo_v2/README.md「デプロイ（CodeDeploy）」）
+########################################################
+DEFAULT_SESSION_STORE = {
+    'node_type': 'cache.t4g.small',
+    'engine_version': '6.2',
+    'replicas': 1,
+    'port': 6379,
+    'transit_encryption': True,
+}
+
+REPLICATION_GROUP_ID = 'demo-session-store'
+
+# エクスポート名（スタックを単独でデプロイする場合の参照）
+ENDPOINT_EXPORT = 'DEMO-SESSION-STORE-ENDPOINT'
+PORT_EXPORT = 'DEMO-SESSION-STORE-PORT'
+
+
+def load_session_store(options=None):
+    """Return the session store options merged over DEFAULT_SESSION_STORE, or None when disabled."""
+    if not options:
+        return None
+    session_store = dict(DEFAULT_SESSION_STORE)
+    if isinstance(options, dict):
+        session_store.update(options)
+    if not 0 <= int(session_store['replicas']) <= 5:
+        raise Exception('[error] session-store: replicas must be between 0 and 5')
+    if not str(session_store['node_type']).startswith('cache.'):
+        raise Exception('[error] session-store: invalid node_type %r' % session_store['node_type'])
+    return session_store
+
+
+def container_environment(host, port, options):
+    """Return the DEMO-CONTAINER environment variables for the session store."""
+    return {
+        'REDIS_HOST': host,
+        'REDIS_PORT': port,
+        'REDIS_SSL': 'true' if options['transit_encryption'] else 'false',
+    }
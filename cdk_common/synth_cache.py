@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+from cdk_common.synth_profile import SynthProfile, profile_dir
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CACHE_DIR = os.environ.get('CDK_SYNTH_CACHE_DIR') or os.path.join(ROOT_DIR, '.cdk-synth-cache')
+MAX_MB = 256
+
+INPUT_EXTENSIONS = ('.py', '.csv', '.json')
+SKIP_DIRS = {'tests', 'cdk.out', 'node_modules', '__pycache__'}
+INPUT_ENVIRONMENT = ('ACCOUNT_ID', 'REGION')
+IGNORED_ENVIRONMENT = ('CDK_OUTDIR', 'CDK_SYNTH_CACHE_DIR', 'CDK_SYNTH_CACHE_MAX_MB')
+PACKAGES = ('aws-cdk-lib', 'constructs', 'jsii')
+
+META_FILE = 'cache-meta.json'
+MANIFEST_FILE = 'manifest.json'
+
+########################################################
+# 合成キャッシュ
+#
+# アプリの入力（Pythonソース・インバウンドルールCSV・cdk.json・
+# cdk.context.json・環境変数・ライブラリバージョン）のハッシュをキーに、
+# 前回の cdk.out（テンプレート・マニフェスト）を再利用する。
+# ヒットした場合はaws_cdkをインポートしない（Node/JSIIも起動しない）。
+#
+# 保存するのは manifest.json と、そこから参照されるファイルのみ
+# （cdk.out に残った以前の合成のテンプレート等は保存しない）。
+#
+# CDK_SYNTH_CACHE=0 で無効化（合成プロファイル有効時も使用しない）
+# CDK_SYNTH_CACHE_MAX_MB でサイズ上限（超過分は最終利用が古い順に削除）
+########################################################
+def cached_synth(app_dir, build, projects=()):
+    """Synthesize an app, reusing a cached cloud assembly when inputs match.
+
+    build(app) adds the stacks to a new cdk.App. Stack modules should be
+    imported inside build so that a cache hit never loads aws_cdk.
+    projects names sibling project directories whose sources the app uses.
+    """
+    outdir = os.environ.get('CDK_OUTDIR')
+    profile_output = profile_dir()
+    enabled = outdir and os.environ.get('CDK_SYNTH_CACHE', '1') != '0' and not profile_output
+    if enabled:
+        key = cache_key(app_dir, projects)
+        if restore(key, outdir):
+            print('[info] synth cache hit: %s (%s)' % (os.path.basename(app_dir), key[:12]), file=sys.stderr)
+            return
+
+    if profile_output:
+        _profiled_synth(os.path.basename(app_dir), build, profile_output)
+    else:
+        import aws_cdk as cdk
+        app = cdk.App()
+        build(app)
+        app.synth()
+
+    if enabled:
+        store(key, outdir, os.path.basename(app_dir))
+        evict(max_bytes())
+
+
+def _profiled_synth(app_name, build, output_dir):
+    profile = SynthProfile(app_name)
+    with profile.measure('import'):
+        import aws_cdk as cdk
+    profile.install()
+    try:
+        with profile.measure('build'):
+            app = cdk.App()
+            build(app)
+        with profile.measure('synth'):
+            app.synth()
+    finally:
+        profile.uninstall()
+    print('[info] synth profile: %s.json / .collapsed' % profile.write(output_dir), file=sys.stderr)
+
+
+def max_bytes():
+    return int(os.environ.get('CDK_SYNTH_CACHE_MAX_MB', MAX_MB)) * 1024 * 1024
+
+########################################################
+# キー
+########################################################
+def cache_key(app_dir, projects=(), environ=None):
+    environ = os.environ if environ is None else environ
+    digest = hashlib.sha256()
+
+    input_dirs = [app_dir, os.path.join(ROOT_DIR, 'cdk_common')]
+    input_dirs += [os.path.join(ROOT_DIR, project) for project in projects]
+    for input_dir in input_dirs:
+        for path in _input_files(input_dir):
+            digest.update(os.path.relpath(path, ROOT_DIR).encode('utf_8') + b'\0')
+            with open(path, 'rb') as fp:
+                digest.update(hashlib.sha256(fp.read()).digest())
+
+    for name in sorted(environ):
+        if name in IGNORED_ENVIRONMENT:
+            continue
+        if name in INPUT_ENVIRONMENT or name.startswith('CDK_'):
+            digest.update(('%s=%s\0' % (name, environ[name])).encode('utf_8'))
+
+    digest.update(sys.version.encode('utf_8'))
+    for package in PACKAGES:
+        try:
+            digest.update(('%s==%s\0' % (package, metadata.version(package))).encode('utf_8'))
+        except metadata.PackageNotFoundError:
+            pass
+    return digest.hexdigest()
+
+
+def _input_files(input_dir):
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(input_dir):
+        dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS and not name.startswith('.')]
+        for filename in filenames:
+            if filename.endswith(INPUT_EXTENSIONS):
+                paths.append(os.path.join(dirpath, filename))
+    return sorted(paths)
+
+########################################################
+# 復元・保存・削除
+########################################################
+def restore(key, outdir):
+    entry_dir = os.path.join(CACHE_DIR, key)
+    if not os.path.isfile(os.path.join(entry_dir, META_FILE)):
+        return False
+    os.makedirs(outdir, exist_ok=True)
+    for name in os.listdir(entry_dir):
+        if name == META_FILE:
+            continue
+        source = os.path.join(entry_dir, name)
+        target = os.path.join(outdir, name)
+        if os.path.isdir(source):
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.copytree(source, target)
+        else:
+            shutil.copy2(source, target)
+    # 最終利用日時（LRU）
+    os.utime(os.path.join(entry_dir, META_FILE))
+    return True
+
+
+def store(key, outdir, app_name):
+    entry_dir = os.path.join(CACHE_DIR, key)
+    if os.path.isdir(entry_dir) or not os.path.isfile(os.path.join(outdir, MANIFEST_FILE)):
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix='.tmp-', dir=CACHE_DIR)
+    try:
+        staged = os.path.join(work_dir, key)
+        for name in assembly_files(outdir):
+            source = os.path.join(outdir, name)
+            target = os.path.join(staged, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+        meta = {
+            'app': app_name,
+            'created': time.time(),
+            'bytes': _tree_bytes(staged),
+        }
+        with open(os.path.join(staged, META_FILE), 'w', encoding='utf_8') as fp:
+            json.dump(meta, fp)
+        try:
+            os.rename(staged, entry_dir)
+        except OSError:
+            # 並行実行で先に保存された
+            pass
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def assembly_files(outdir, prefix=''):
+    """Return the paths (relative to outdir) that make up the cloud assembly in outdir.
+
+    That is manifest.json, the files its artifacts name (templates, asset
+    manifests, tree.json), the asset sources those asset manifests list,
+    and nested assemblies (recursively).
+    """
+    assembly_dir = os.path.join(outdir, prefix)
+    with open(os.path.join(assembly_dir, MANIFEST_FILE), encoding='utf_8') as fp:
+        manifest = json.load(fp)
+    names = [MANIFEST_FILE, 'cdk.out']
+    for artifact in manifest.get('artifacts', {}).values():
+        properties = artifact.get('properties', {})
+        if artifact.get('type') == 'cdk:cloud-assembly' and properties.get('directoryName'):
+            names += assembly_files(assembly_dir, properties['directoryName'])
+            continue
+        names += [properties[name] for name in ('templateFile', 'file') if properties.get(name)]
+        if artifact.get('type') == 'cdk:asset-manifest' and properties.get('file'):
+            with open(os.path.join(assembly_dir, properties['file']), encoding='utf_8') as fp:
+                assets = json.load(fp)
+            names += [asset['source']['path'] for asset in assets.get('files', {}).values()
+                      if asset.get('source', {}).get('path')]
+            names += [asset['source']['directory'] for asset in assets.get('dockerImages', {}).values()
+                      if asset.get('source', {}).get('directory')]
+    result = []
+    for name in names:
+        path = os.path.normpath(os.path.join(prefix, name))
+        if path not in result and os.path.exists(os.path.join(outdir, path)):
+            result.append(path)
+    return result
+
+
+def entries():
+    """Return cache entries, most recently used first."""
+    result = []
+    if not os.path.isdir(CACHE_DIR):
+        return result
+    for key in os.listdir(CACHE_DIR):
+        meta_path = os.path.join(CACHE_DIR, key, META_FILE)
+        if not os.path.isfile(meta_path):
+            continue
+        with open(meta_path, encoding='utf_8') as fp:
+            meta = json.load(fp)
+        meta.update({'key': key, 'last_used': os.path.getmtime(meta_path)})
+        result.append(meta)
+    result.sort(key=lambda entry: entry['last_used'], reverse=True)
+    return result
+
+
+def evict(limit):
+    total = 0
+    removed = []
+    for entry in entries():
+        total += entry['bytes']
+        if total > limit:
+            remove(entry['key'])
+            removed.append(entry['key'])
+    return removed
+
+
+def remove(key):
+    shutil.rmtree(os.path.join(CACHE_DIR, key), ignore_errors=True)
+
+
+def clear(app_name=None):
+    removed = []
+    for entry in entries():
+        if app_name is None or entry['app'] == app_name:
+            remove(entry['key'])
+            removed.append(entry['key'])
+    return removed
+
+
+def _tree_bytes(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
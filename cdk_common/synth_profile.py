@@ -0,0 +1,269 @@
+import importlib.abc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from functools import wraps
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_DIR = os.path.join(ROOT_DIR, 'synth.out', 'profile')
+CONTEXT_KEY = 'synth-profile'
+
+########################################################
+# 合成プロファイル
+#
+# CDK_SYNTH_PROFILE=1（または出力ディレクトリ）か、コンテキスト
+# synth-profile=true（cdk synth -c synth-profile=true）で有効化。
+# *_stack モジュールの関数（create_vpc / create_subnets / create_alb /
+# create_ecs / create_codepipeline 等）とスタックの __init__ を計測し、
+# 関数ごと・コンストラクトパスごとの経過時間・JSII呼び出し回数・
+# tracemalloc の確保量を出力する。
+#
+#   <app>.json       集計結果
+#   <app>.collapsed  フレームグラフ用（flamegraph.pl / speedscope）
+#
+# 無効時は何もインストールしない。
+########################################################
+def profile_dir():
+    """Return the output directory, or None when profiling is off."""
+    value = os.environ.get('CDK_SYNTH_PROFILE')
+    if value is None:
+        try:
+            value = json.loads(os.environ.get('CDK_CONTEXT_JSON') or '{}').get(CONTEXT_KEY)
+        except ValueError:
+            value = None
+    if value is None or str(value).lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    if str(value).lower() in ('1', 'true', 'yes', 'on'):
+        return DEFAULT_DIR
+    return str(value)
+
+
+class _Frame:
+
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.key = name if parent is None else '%s;%s' % (parent.key, name)
+        self.child_wall = 0.0
+        self.child_jsii = 0
+        self.child_alloc = 0
+        self.jsii = 0
+
+
+class SynthProfile:
+
+    def __init__(self, app_name):
+        self.app_name = app_name
+        self.frames = {}
+        self.constructs = {}
+        self.jsii_requests = {}
+        self._stack = []
+        self._paths = {}
+        self._patched = []
+        self._finder = None
+
+    ########################################################
+    # インストール・解除
+    ########################################################
+    def install(self):
+        tracemalloc.start()
+        self._finder = _StackModuleFinder(self)
+        sys.meta_path.insert(0, self._finder)
+        for name, module in list(sys.modules.items()):
+            if _is_stack_module(name):
+                self.instrument_module(module)
+
+        import jsii
+        from constructs import Construct
+        from jsii._kernel.providers import process
+        self._construct_class = Construct
+        self._patch(process._NodeProcess, 'send', self._count_send)
+        # 生成クラスは jsii.create(cls, self, [scope, id, props]) を呼ぶ
+        self._patch(jsii, 'create', self._record_create)
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        tracemalloc.stop()
+
+    def _patch(self, owner, name, factory):
+        original = getattr(owner, name)
+        setattr(owner, name, factory(original))
+        self._patched.append((owner, name, original))
+
+    def instrument_module(self, module):
+        for name, value in list(vars(module).items()):
+            if getattr(value, '__module__', None) != module.__name__ or getattr(value, '__synth_profiled__', False):
+                continue
+            if isinstance(value, type):
+                if '__init__' in vars(value):
+                    self._patch(value, '__init__', lambda original, cls=value: self._wrap(original, cls.__name__))
+            elif callable(value):
+                self._patch(module, name, lambda original, name=name: self._wrap(original, name))
+
+    ########################################################
+    # 計測
+    ########################################################
+    def measure(self, name):
+        return _Measure(self, name)
+
+    def _wrap(self, function, name):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.measure(name):
+                return function(*args, **kwargs)
+        wrapper.__synth_profiled__ = True
+        return wrapper
+
+    def _enter(self, name):
+        frame = _Frame(name, self._stack[-1] if self._stack else None)
+        frame.started = time.perf_counter()
+        frame.alloc_started = tracemalloc.get_traced_memory()[0]
+        self._stack.append(frame)
+        return frame
+
+    def _exit(self, frame):
+        wall = time.perf_counter() - frame.started
+        alloc = tracemalloc.get_traced_memory()[0] - frame.alloc_started
+        self._stack.pop()
+        stats = self.frames.setdefault(frame.key, {
+            'calls': 0, 'wall': 0.0, 'self_wall': 0.0, 'jsii_calls': 0, 'self_jsii_calls': 0,
+            'alloc_bytes': 0, 'self_alloc_bytes': 0,
+        })
+        jsii_calls = frame.jsii + frame.child_jsii
+        stats['calls'] += 1
+        stats['wall'] += wall
+        stats['self_wall'] += wall - frame.child_wall
+        stats['jsii_calls'] += jsii_calls
+        stats['self_jsii_calls'] += frame.jsii
+        stats['alloc_bytes'] += alloc
+        stats['self_alloc_bytes'] += alloc - frame.child_alloc
+        if frame.parent is not None:
+            frame.parent.child_wall += wall
+            frame.parent.child_jsii += jsii_calls
+            frame.parent.child_alloc += alloc
+        return wall, jsii_calls, alloc
+
+    def _count_send(self, original):
+        profile = self
+
+        def send(process, request, response_type):
+            kind = type(request).__name__
+            profile.jsii_requests[kind] = profile.jsii_requests.get(kind, 0) + 1
+            if profile._stack:
+                profile._stack[-1].jsii += 1
+            return original(process, request, response_type)
+        return send
+
+    def _record_create(self, original):
+        profile = self
+
+        def create(klass, obj, args=None):
+            # コンストラクト（scope, id, ...）のみパスを記録
+            if not (args and len(args) >= 2 and isinstance(args[1], str)
+                    and isinstance(args[0], profile._construct_class)):
+                return original(klass, obj, args)
+            scope_path = profile._paths.get(id(args[0]), '')
+            path = '%s/%s' % (scope_path, args[1]) if scope_path else args[1]
+            profile._paths[id(obj)] = path
+            helper = profile._stack[-1].key if profile._stack else None
+            frame = profile._enter(path.rsplit('/', 1)[-1])
+            try:
+                return original(klass, obj, args)
+            finally:
+                wall, jsii_calls, alloc = profile._exit(frame)
+                entry = profile.constructs.setdefault(path, {
+                    'type': getattr(klass, '__jsii_type__', None) or klass.__name__,
+                    'helper': helper, 'wall': 0.0, 'jsii_calls': 0, 'alloc_bytes': 0,
+                })
+                entry['wall'] += wall
+                entry['jsii_calls'] += jsii_calls
+                entry['alloc_bytes'] += alloc
+        return create
+
+    ########################################################
+    # 出力
+    ########################################################
+    def result(self):
+        return {
+            'app': self.app_name,
+            'frames': self.frames,
+            'constructs': self.constructs,
+            'jsii_requests': self.jsii_requests,
+        }
+
+    def collapsed(self):
+        # フレームグラフはself時間（マイクロ秒）を積み上げる
+        lines = []
+        for key, stats in sorted(self.frames.items()):
+            value = int(round(stats['self_wall'] * 1000000))
+            if value > 0:
+                lines.append('%s;%s %d' % (self.app_name, key, value))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, self.app_name)
+        with open(base + '.json', 'w', encoding='utf_8') as fp:
+            json.dump(self.result(), fp, indent=2, sort_keys=True)
+        with open(base + '.collapsed', 'w', encoding='utf_8') as fp:
+            fp.write(self.collapsed())
+        return base
+
+
+class _Measure:
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.frame = self.profile._enter(self.name)
+        return self.frame
+
+    def __exit__(self, *exc_info):
+        self.profile._exit(self.frame)
+        return False
+
+
+def _is_stack_module(name):
+    return name.rsplit('.', 1)[-1].endswith('_stack')
+
+
+class _StackModuleFinder(importlib.abc.MetaPathFinder):
+    """Instrument *_stack modules as they are imported."""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        if not _is_stack_module(fullname):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        if loader is None or not hasattr(loader, 'exec_module'):
+            return spec
+        profile = self.profile
+
+        class _Loader(importlib.abc.Loader):
+            def create_module(self, spec):
+                return loader.create_module(spec)
+
+            def exec_module(self, module):
+                loader.exec_module(module)
+                profile.instrument_module(module)
+        spec.loader = _Loader()
+        return spec
@@ -0,0 +1,63 @@
+########################################################
+# ターゲットグループ（DEMO-BLUE-TG / DEMO-GREEN-TG）
+#
+#   algorithm               least_outstanding_requests / round_robin
+#   slow_start              登録直後のリクエストを徐々に増やす時間（秒、30〜900、0で無効）
+#                           ※ least_outstanding_requests とは併用できない
+#   deregistration_delay    登録解除時に処理中リクエストの完了を待つ時間（秒）
+#                           Fargate Spot を使う場合は中断通知から停止まで（SPOT_STOP_TIMEOUT）未満にする
+#   health_check            {path, interval, timeout, healthy_threshold, unhealthy_threshold}（秒・回）
+#
+# コンテキスト alb-target-group。Blue/Greenの切り替え・スケールアウト時に
+# 新しいタスクが数回のヘルスチェック（既定値で約20秒）で受け付けを開始する。
+########################################################
+from cdk_common.ecs_service import SPOT_STOP_TIMEOUT
+
+ALGORITHMS = ('least_outstanding_requests', 'round_robin')
+
+DEFAULT_TARGET_GROUP = {
+    'algorithm': 'least_outstanding_requests',
+    'slow_start': 0,
+    'deregistration_delay': 30,
+    'health_check': {
+        'path': '/login',
+        'interval': 10,
+        'timeout': 5,
+        'healthy_threshold': 2,
+        'unhealthy_threshold': 2,
+    },
+}
+
+
+def load_target_group(options=None):
+    """Return the target group options merged over DEFAULT_TARGET_GROUP."""
+    options = dict(options or {})
+    health_check = dict(DEFAULT_TARGET_GROUP['health_check'])
+    health_check.update(options.pop('health_check', None) or {})
+    target_group = dict(DEFAULT_TARGET_GROUP)
+    target_group.update(options)
+    target_group['health_check'] = health_check
+
+    if target_group['algorithm'] not in ALGORITHMS:
+        raise Exception('[error] alb-target-group: algorithm must be one of %s' % ', '.join(ALGORITHMS))
+    slow_start = int(target_group['slow_start'])
+    if slow_start and not 30 <= slow_start <= 900:
+        raise Exception('[error] alb-target-group: slow_start must be 0 or between 30 and 900')
+    if slow_start and target_group['algorithm'] == 'least_outstanding_requests':
+        raise Exception('[error] alb-target-group: slow_start needs algorithm round_robin')
+    if not 0 <= int(target_group['deregistration_delay']) <= 3600:
+        raise Exception('[error] alb-target-group: deregistration_delay must be between 0 and 3600')
+
+    if not 5 <= int(health_check['interval']) <= 300:
+        raise Exception('[error] alb-target-group: health_check.interval must be between 5 and 300')
+    if not 2 <= int(health_check['timeout']) < int(health_check['interval']):
+        raise Exception('[error] alb-target-group: health_check.timeout must be at least 2 and less than interval')
+    for key in ('healthy_threshold', 'unhealthy_threshold'):
+        if not 2 <= int(health_check[key]) <= 10:
+            raise Exception('[error] alb-target-group: health_check.%s must be between 2 and 10' % key)
+    return target_group
+
+
+def spot_drain_fits(target_group):
+    """Return whether deregistration finishes before a Fargate Spot task is stopped."""
+    return int(target_group['deregistration_delay']) < SPOT_STOP_TIMEOUT
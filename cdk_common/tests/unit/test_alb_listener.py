@@ -0,0 +1,33 @@
+import pytest
+
+from cdk_common.alb_listener import listener_ports, load_listener, plan_listeners, uncovered_ports
+from cdk_common.inbound_rules import parse_inbound_rules
+
+CERTIFICATE_ARN = 'arn:aws:acm:ap-northeast-1:123456789012:certificate/abc'
+
+
+def test_http_listeners_by_default():
+    plan = plan_listeners(load_listener())
+    assert plan == (False, 80, 8080, [])
+
+
+def test_https_listeners_and_redirects():
+    plan = plan_listeners(load_listener({'certificate_arn': CERTIFICATE_ARN}))
+    assert plan.https and (plan.prod_port, plan.test_port) == (443, 8443)
+    assert plan.redirects == [(80, 443), (8080, 8443)]
+    assert listener_ports(plan) == [443, 8443, 80, 8080]
+    assert plan_listeners(load_listener({'certificate_arn': CERTIFICATE_ARN, 'redirect_http': False})).redirects == []
+
+
+def test_uncovered_ports():
+    rules = list(parse_inbound_rules(['type,peer,description,port', 'any_ipv4,0.0.0.0/0,-,80', 'any_ipv4,0.0.0.0/0,-,8000-8443']))
+    assert uncovered_ports(rules, [80, 443, 8443]) == [443]
+
+
+def test_invalid_listener():
+    with pytest.raises(Exception, match='certificate_arn'):
+        load_listener({'certificate_arn': 'abc'})
+    with pytest.raises(Exception, match='distinct'):
+        load_listener({'https_port': 80})
+    with pytest.raises(Exception, match='idle_timeout'):
+        load_listener({'idle_timeout': 0})
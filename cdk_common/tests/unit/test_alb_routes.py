@@ -0,0 +1,56 @@
+import pytest
+
+from cdk_common.alb_routes import load_routes, route_id, service_name, target_group_name, task_family
+
+
+def test_no_routes_by_default():
+    assert load_routes() == []
+
+
+def test_routes_in_priority_order():
+    routes = load_routes([
+        {'name': 'static', 'priority': 20, 'paths': ['/static/*'], 'weights': {'static': 90, 'api': 10},
+         'service': False},
+        {'name': 'api', 'priority': 10, 'hosts': ['api.example.com'], 'size': 'medium', 'service': {'max_capacity': 20}},
+    ], 'ARM64')
+    assert [route.name for route in routes] == ['api', 'static']
+    api, static = routes
+    assert api.weights == {'api': 1}
+    assert api.service['max_capacity'] == 20
+    assert api.size == {'cpu': 1024, 'memory': 2048, 'architecture': 'ARM64'}
+    assert static.service is None and static.size is None
+
+
+def test_names():
+    assert target_group_name('api-v2') == 'DEMO-API-V2-TG'
+    assert service_name('api-v2') == 'DEMO-API-V2-SERVICE'
+    assert task_family('api-v2') == 'DEMO-API-V2-TASK'
+    assert route_id('api-v2') == 'ApiV2'
+
+
+@pytest.mark.parametrize('routes, message', [
+    ([{'name': 'default', 'priority': 1, 'paths': ['/']}], 'name'),
+    ([{'name': 'api', 'priority': 0, 'paths': ['/']}], 'priority'),
+    ([{'name': 'api', 'priority': 1}], 'paths or hosts'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['/%d' % i for i in range(6)]}], 'at most'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['/'], 'weights': {'api': 0}}], 'weights'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['/'], 'weights': {'web': 1}}], 'unknown'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['/'], 'weights': {'default': 1}}], 'cannot target'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['/'], 'weights': {'api': 9, 'default': 1}}], 'cannot target'),
+    ([{'name': 'a', 'priority': 1, 'paths': ['/a'], 'service': False}, {'name': 'b', 'priority': 2, 'paths': ['/b'],
+      'weights': {'a': 1}}], 'no rule forwards'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['/*']}], 'bypass the CodeDeploy'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['*'], 'hosts': ['*']}], 'bypass the CodeDeploy'),
+    ([{'name': 'api', 'priority': 1, 'paths': ['/a']}, {'name': 'api', 'priority': 2, 'paths': ['/b']}], 'names'),
+    ([{'name': 'a', 'priority': 1, 'paths': ['/a']}, {'name': 'b', 'priority': 1, 'paths': ['/b']}], 'priorities'),
+])
+def test_invalid_routes(routes, message):
+    with pytest.raises(Exception, match=message):
+        load_routes(routes)
+
+
+def test_catch_all_rules():
+    # ホストを限定したルールは既定のアクションを覆わない
+    assert load_routes([{'name': 'api', 'priority': 1, 'paths': ['/*'], 'hosts': ['api.example.com']}])
+    # DEMO-SERVICE がない（CodeDeploy を使わない）場合は作成できる
+    assert load_routes([{'name': 'api', 'priority': 1, 'paths': ['/*']}], code_deploy=False)
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from cdk_common.alb_listener import listener_ports, load_listener, plan_listeners, uncovered_ports
+from cdk_common.cloudfront import inbound_csv_name, load_distribution
+from cdk_common.inbound_rules import load_inbound_rules
+
+INBOUND_RULES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'alb_v2', 'security_group',
+                                 'inbound_rules')
+CERTIFICATE_ARN = 'arn:aws:acm:ap-northeast-1:123456789012:certificate/abc'
+
+
+def test_disabled_by_default():
+    assert load_distribution() is None
+    assert load_distribution(False) is None
+
+
+def test_behaviors():
+    distribution = load_distribution({'compress': False, 'behaviors': [
+        {'path': '/static/*', 'default_ttl': 3600, 'query_strings': ['v']},
+        {'path': '/api/catalog/*', 'cookies': 'all', 'compress': True},
+    ]})
+    static, catalog = distribution['behaviors']
+    assert (static['min_ttl'], static['default_ttl'], static['max_ttl']) == (0, 3600, 31536000)
+    assert static['compress'] is False and catalog['compress'] is True
+    assert load_distribution(True)['behaviors'] == []
+
+
+@pytest.mark.parametrize('https', [False, True])
+@pytest.mark.parametrize('cloudfront', [False, True])
+def test_inbound_rules_cover_listener_ports(https, cloudfront):
+    listener = load_listener({'certificate_arn': CERTIFICATE_ARN} if https else None)
+    rules = load_inbound_rules(os.path.join(INBOUND_RULES_DIR, inbound_csv_name(https, cloudfront)))
+    assert uncovered_ports(rules, listener_ports(plan_listeners(listener), cloudfront)) == []
+    if cloudfront:
+        assert {rule.type for rule in rules} == {'prefix'}
+
+
+@pytest.mark.parametrize('options, message', [
+    ({'price_class': 'PriceClass_300'}, 'price_class'),
+    ({'read_timeout': 0}, 'read_timeout'),
+    ({'behaviors': [{'path': '/*'}]}, 'path is required'),
+    ({'behaviors': [{'path': '/a', 'min_ttl': 10, 'default_ttl': 5}]}, 'ttls'),
+    ({'behaviors': [{'path': '/a', 'cookies': 'some'}]}, 'cookies'),
+    ({'behaviors': [{'path': '/a', 'headers': ['h%d' % i for i in range(11)]}]}, 'headers'),
+    ({'behaviors': [{'path': '/a'}, {'path': '/a'}]}, 'unique'),
+])
+def test_invalid_distribution(options, message):
+    with pytest.raises(Exception, match=message):
+        load_distribution(options)
@@ -0,0 +1,41 @@
+import pytest
+
+from cdk_common.ecs_service import DEFAULT_SERVICE, capacity_providers, load_service, uses_fargate_spot
+
+
+def test_load_service():
+    assert load_service() == DEFAULT_SERVICE
+    assert load_service(False) is None
+    service = load_service({'max_capacity': 20, 'memory_utilization': None})
+    assert service['max_capacity'] == 20 and service['memory_utilization'] is None
+    assert service['scale_out_cooldown'] == DEFAULT_SERVICE['scale_out_cooldown']
+
+
+def test_invalid_service():
+    with pytest.raises(Exception, match='min_capacity'):
+        load_service({'min_capacity': 5, 'max_capacity': 2})
+    with pytest.raises(Exception, match='cpu_utilization'):
+        load_service({'cpu_utilization': 95})
+    with pytest.raises(Exception, match='requests_per_target'):
+        load_service({'requests_per_target': 0})
+    with pytest.raises(Exception, match='scale_in_cooldown'):
+        load_service({'scale_in_cooldown': -1})
+
+
+def test_capacity_provider_strategy():
+    assert load_service()['capacity_provider_strategy'] is None
+    strategy = load_service({'capacity_provider_strategy': True})['capacity_provider_strategy']
+    assert capacity_providers(strategy) == [('FARGATE', 2, 1), ('FARGATE_SPOT', 0, 3)]
+    strategy = load_service({'capacity_provider_strategy': {'base': 0, 'fargate_spot_weight': 1}})['capacity_provider_strategy']
+    assert capacity_providers(strategy) == [('FARGATE', 0, 1), ('FARGATE_SPOT', 0, 1)]
+    with pytest.raises(Exception, match='positive weight'):
+        load_service({'capacity_provider_strategy': {'fargate_weight': 0, 'fargate_spot_weight': 0}})
+    with pytest.raises(Exception, match='negative'):
+        load_service({'capacity_provider_strategy': {'base': -1}})
+
+
+def test_uses_fargate_spot():
+    assert not uses_fargate_spot(load_service())
+    assert not uses_fargate_spot(load_service(False))
+    assert uses_fargate_spot(load_service({'capacity_provider_strategy': True}))
+    assert not uses_fargate_spot(load_service({'capacity_provider_strategy': {'fargate_spot_weight': 0}}))
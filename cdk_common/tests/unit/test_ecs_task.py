@@ -0,0 +1,25 @@
+import pytest
+
+from cdk_common.ecs_task import FARGATE_MEMORY, TASK_SIZES, load_task
+
+
+def test_default_task_matches_current_size():
+    assert load_task() == {'cpu': 2048, 'memory': 8192, 'architecture': 'X86_64'}
+
+
+def test_profiles_are_fargate_combinations():
+    for size in TASK_SIZES.values():
+        assert size['memory'] in FARGATE_MEMORY[size['cpu']]
+    assert load_task({'size': 'medium', 'architecture': 'arm64'}) == {'cpu': 1024, 'memory': 2048, 'architecture': 'ARM64'}
+    assert load_task({'size': {'cpu': 512, 'memory': 3072}})['memory'] == 3072
+
+
+def test_invalid_task():
+    with pytest.raises(Exception, match='size must be'):
+        load_task({'size': 'huge'})
+    with pytest.raises(Exception, match='not a Fargate combination'):
+        load_task({'size': {'cpu': 1024, 'memory': 1024}})
+    with pytest.raises(Exception, match='not a Fargate combination'):
+        load_task({'size': {'cpu': 768, 'memory': 2048}})
+    with pytest.raises(Exception, match='architecture'):
+        load_task({'architecture': 'ppc64'})
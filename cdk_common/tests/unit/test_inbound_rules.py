@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from cdk_common.inbound_rules import (
+    InboundRule,
+    clear_cache,
+    ingress_properties,
+    load_inbound_rules,
+    parse_inbound_rules,
+)
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+
+
+def test_load_repository_csv():
+    rules = load_inbound_rules(os.path.join(ROOT_DIR, 'alb_v2', 'security_group', 'inbound_rules', 'alb.csv'))
+    assert rules == (
+        InboundRule('any_ipv4', '0.0.0.0/0', 'any_ipv4', 80, 80),
+        InboundRule('any_ipv4', '0.0.0.0/0', 'any_ipv4', 8080, 8080),
+    )
+
+
+def test_parse_rule_types():
+    rules = list(parse_inbound_rules([
+        'type,peer,description,port',
+        'ipv4,10.5.5.0/24,-,80',
+        'prefix,pl-58a04531,cloudfront,443',
+        '',
+        'ipv4,10.0.0.0/8,,8080',
+        'ipv4,10.0.0.0/8,range,8000-8100',
+    ]))
+    assert rules == [
+        InboundRule('ipv4', '10.5.5.0/24', '-', 80, 80),
+        InboundRule('prefix', 'pl-58a04531', 'cloudfront', 443, 443),
+        InboundRule('ipv4', '10.0.0.0/8', None, 8080, 8080),
+        InboundRule('ipv4', '10.0.0.0/8', 'range', 8000, 8100),
+    ]
+
+
+@pytest.mark.parametrize('line', [
+    'ipv6,::/0,-,80',
+    'ipv4,10.5.5.1,-,80',
+    'prefix,sg-123,-,80',
+    'ipv4,10.5.5.0/24,-,http',
+    'ipv4,10.5.5.0/24,-,70000',
+    'ipv4,10.5.5.0/24,-,8100-8000',
+    'ipv4,10.5.5.0/24,-',
+])
+def test_parse_invalid_rule(line):
+    with pytest.raises(Exception, match=r'\[error\] <csv>:1'):
+        list(parse_inbound_rules([line]))
+
+
+def test_load_cache(tmp_path):
+    clear_cache()
+    path = tmp_path / 'rules.csv'
+    path.write_text('type,peer,description,port\nipv4,10.5.5.0/24,-,80\n')
+    first = load_inbound_rules(str(path))
+    assert load_inbound_rules(str(path)) is first
+
+    # 内容が同じなら更新日時が変わってもキャッシュを再利用
+    os.utime(path, ns=(0, 0))
+    assert load_inbound_rules(str(path)) is first
+
+    path.write_text('type,peer,description,port\nipv4,10.5.6.0/24,-,80\n')
+    assert load_inbound_rules(str(path))[0].peer == '10.5.6.0/24'
+
+
+def test_ingress_properties():
+    properties = ingress_properties([
+        InboundRule('any_ipv4', '0.0.0.0/0', 'any_ipv4', 80, 80),
+        InboundRule('any_ipv4', '0.0.0.0/0', 'duplicate', 80, 80),
+        InboundRule('prefix', 'pl-58a04531', None, 443, 443),
+    ])
+    assert properties == [
+        {'CidrIp': '0.0.0.0/0', 'Description': 'any_ipv4', 'FromPort': 80, 'IpProtocol': 'tcp', 'ToPort': 80},
+        {'SourcePrefixListId': 'pl-58a04531', 'Description': 'from pl-58a04531:443', 'FromPort': 443, 'IpProtocol': 'tcp', 'ToPort': 443},
+    ]
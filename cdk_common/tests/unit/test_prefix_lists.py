@@ -0,0 +1,32 @@
+from cdk_common.inbound_rules import InboundRule
+from cdk_common.prefix_lists import plan_prefix_lists
+
+
+def rule(type, peer, port, description=None):
+    return InboundRule(type, peer, description, port, port)
+
+
+def test_groups_cidrs_per_port():
+    rules = [
+        rule('any_ipv4', '0.0.0.0/0', 443),
+        rule('ipv4', '10.0.0.0/24', 80, 'app'),
+        rule('ipv4', '192.168.0.0/24', 80, 'office'),
+        rule('ipv4', '10.0.0.0/24', 8080),
+        rule('ipv4', '192.168.0.0/24', 8080),
+        rule('ipv4', '172.16.0.0/24', 22, 'vpn'),
+        rule('prefix', 'pl-58a04531', 80),
+    ]
+    plans, remaining = plan_prefix_lists(rules)
+
+    assert len(plans) == 1
+    assert plans[0].entries == (('10.0.0.0/24', 'app'), ('192.168.0.0/24', 'office'))
+    assert plans[0].ports == [(80, 80), (8080, 8080)]
+    assert remaining == [rules[0], rules[5], rules[6]]
+
+
+def test_single_cidr_stays_inline():
+    rules = [rule('ipv4', '10.5.5.0/24', 80), rule('ipv4', '10.5.5.0/24', 80), rule('ipv4', '10.5.5.0/24', 8080)]
+    plans, remaining = plan_prefix_lists(rules)
+    assert plans == []
+    assert remaining == rules
+    assert len(plan_prefix_lists(rules, min_entries=1)[0]) == 1
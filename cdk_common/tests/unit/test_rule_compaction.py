@@ -0,0 +1,72 @@
+from cdk_common.inbound_rules import InboundRule
+from cdk_common.rule_compaction import compact_inbound_rules, compaction_report
+
+
+def rule(peer, port, to_port=None, description='-', type='ipv4'):
+    return InboundRule(type, peer, description, port, port if to_port is None else to_port)
+
+
+def test_unmergeable_rules_are_unchanged():
+    rules = [
+        rule('10.5.5.0/24', 80),
+        rule('10.5.5.0/24', 8080),
+        rule('pl-58a04531', 443, type='prefix'),
+    ]
+    assert compact_inbound_rules(rules) == rules
+
+
+def test_duplicates_are_dropped():
+    rules = [rule('10.5.5.0/24', 80), rule('10.5.5.0/24', 80, description='again')]
+    assert compact_inbound_rules(rules) == [rule('10.5.5.0/24', 80)]
+
+
+def test_adjacent_and_overlapping_cidrs_are_aggregated():
+    rules = [
+        rule('10.5.5.0/26', 80),
+        rule('10.5.5.64/26', 80),
+        rule('10.5.5.128/25', 80),
+        rule('10.5.5.130/32', 80),
+        rule('10.5.6.0/24', 443),
+    ]
+    assert compact_inbound_rules(rules) == [
+        rule('10.5.5.0/24', 80),
+        rule('10.5.6.0/24', 443),
+    ]
+
+
+def test_contiguous_ports_are_merged():
+    rules = [
+        rule('10.5.5.0/24', 8080, description='a'),
+        rule('10.5.5.0/24', 8081, description='b'),
+        rule('10.5.5.0/24', 8082, 8090, description='a'),
+        rule('10.5.5.0/24', 443),
+        rule('pl-58a04531', 80, type='prefix'),
+        rule('pl-58a04531', 81, type='prefix'),
+    ]
+    assert compact_inbound_rules(rules) == [
+        rule('10.5.5.0/24', 8080, 8090, description='compacted from 3 rules'),
+        rule('10.5.5.0/24', 443),
+        rule('pl-58a04531', 80, 81, type='prefix'),
+    ]
+
+
+def test_aggregated_cidrs_then_ports_are_merged():
+    rules = [rule('10.0.%d.0/24' % (i // 4), 80 + i % 4) for i in range(16 * 4)]
+    assert compact_inbound_rules(rules) == [rule('10.0.0.0/20', 80, 83)]
+
+
+def test_any_ipv4_absorbs_cidrs():
+    rules = [rule('10.5.5.0/24', 80), rule('0.0.0.0/0', 80, type='any_ipv4')]
+    assert compact_inbound_rules(rules) == [
+        rule('0.0.0.0/0', 80, description='-', type='any_ipv4'),
+    ]
+
+
+def test_compaction_report():
+    before = [rule('10.5.5.0/25', 80), rule('10.5.5.128/25', 80)]
+    report = compaction_report(before, compact_inbound_rules(before), 'DEMO-SERVICE-SG')
+    assert report.splitlines() == [
+        'DEMO-SERVICE-SG: 2 -> 1 inbound rules',
+        '  ipv4           2 ->      1',
+        '  + ipv4 10.5.5.0/24:80 (-)',
+    ]
@@ -0,0 +1,19 @@
+import pytest
+
+from cdk_common.session_store import container_environment, load_session_store
+
+
+def test_load_session_store():
+    assert load_session_store() is None
+    assert load_session_store(False) is None
+    assert load_session_store(True)['replicas'] == 1
+    options = load_session_store({'replicas': 0, 'transit_encryption': False})
+    assert container_environment('redis.local', '6379', options) == {
+        'REDIS_HOST': 'redis.local', 'REDIS_PORT': '6379', 'REDIS_SSL': 'false'}
+
+
+def test_invalid_session_store():
+    with pytest.raises(Exception, match='replicas'):
+        load_session_store({'replicas': 6})
+    with pytest.raises(Exception, match='node_type'):
+        load_session_store({'node_type': 't4g.small'})
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from cdk_common import synth_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'cache'
+    monkeypatch.setattr(synth_cache, 'CACHE_DIR', str(path))
+    return path
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    path = tmp_path / 'demo'
+    (path / 'demo').mkdir(parents=True)
+    (path / 'security_group' / 'inbound_rules').mkdir(parents=True)
+    (path / 'tests').mkdir()
+    (path / 'cdk.json').write_text('{"app": "python3 app.py"}')
+    (path / 'demo' / 'demo_stack.py').write_text('# stack\n')
+    (path / 'security_group' / 'inbound_rules' / 'service.csv').write_text('type,peer,description,port\n')
+    (path / 'tests' / 'test_demo.py').write_text('# test\n')
+    return path
+
+
+def write_assembly(outdir, body):
+    os.makedirs(outdir, exist_ok=True)
+    with open(os.path.join(outdir, 'DemoStack.template.json'), 'w') as fp:
+        fp.write(body)
+    with open(os.path.join(outdir, synth_cache.MANIFEST_FILE), 'w') as fp:
+        json.dump({'artifacts': {'DemoStack': {
+            'type': 'aws:cloudformation:stack', 'properties': {'templateFile': 'DemoStack.template.json'}}}}, fp)
+
+
+def test_key_follows_inputs(app_dir):
+    environ = {'ACCOUNT_ID': '123456789012', 'REGION': 'ap-northeast-1'}
+    key = synth_cache.cache_key(str(app_dir), environ=environ)
+
+    (app_dir / 'tests' / 'test_demo.py').write_text('# changed test\n')
+    assert synth_cache.cache_key(str(app_dir), environ=dict(environ, CDK_OUTDIR='/elsewhere')) == key
+
+    (app_dir / 'security_group' / 'inbound_rules' / 'service.csv').write_text('type,peer,description,port\nipv4,10.0.0.0/8,-,80\n')
+    changed = synth_cache.cache_key(str(app_dir), environ=environ)
+    assert changed != key
+    assert synth_cache.cache_key(str(app_dir), environ=dict(environ, REGION='us-east-1')) != changed
+    assert synth_cache.cache_key(str(app_dir), environ=dict(environ, CDK_CONTEXT_JSON='{}')) != changed
+
+
+def test_store_and_restore(cache_dir, tmp_path):
+    write_assembly(str(tmp_path / 'out'), '{"Resources": {}}')
+    assert not synth_cache.restore('k1', str(tmp_path / 'restored'))
+
+    synth_cache.store('k1', str(tmp_path / 'out'), 'demo')
+    assert synth_cache.restore('k1', str(tmp_path / 'restored'))
+    assert (tmp_path / 'restored' / 'DemoStack.template.json').read_text() == '{"Resources": {}}'
+    assert not (tmp_path / 'restored' / synth_cache.META_FILE).exists()
+    assert [entry['app'] for entry in synth_cache.entries()] == ['demo']
+
+
+def test_store_skips_stale_outputs(cache_dir, tmp_path):
+    # 以前の合成で残ったテンプレート・アセットはマニフェストから参照されない
+    write_assembly(str(tmp_path / 'out'), '{"Resources": {}}')
+    (tmp_path / 'out' / 'OldStack.template.json').write_text('{}')
+    (tmp_path / 'out' / 'asset.old').mkdir()
+    (tmp_path / 'out' / 'asset.old' / 'index.py').write_text('# old\n')
+
+    synth_cache.store('k1', str(tmp_path / 'out'), 'demo')
+    assert sorted(os.listdir(str(cache_dir / 'k1'))) == [
+        'DemoStack.template.json', synth_cache.META_FILE, synth_cache.MANIFEST_FILE]
+
+
+def test_evict_least_recently_used(cache_dir, tmp_path):
+    for index, key in enumerate(['old', 'used', 'new']):
+        write_assembly(str(tmp_path / key), 'x' * 1000)
+        synth_cache.store(key, str(tmp_path / key), 'demo')
+        os.utime(os.path.join(str(cache_dir), key, synth_cache.META_FILE), (index, index))
+    synth_cache.restore('old', str(tmp_path / 'restored'))
+
+    removed = synth_cache.evict(2500)
+    assert removed == ['used']
+    assert sorted(entry['key'] for entry in synth_cache.entries()) == ['new', 'old']
+    assert synth_cache.clear('other') == []
+    assert len(synth_cache.clear()) == 2
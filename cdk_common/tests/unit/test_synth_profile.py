@@ -0,0 +1,51 @@
+import json
+import types
+
+from cdk_common import synth_profile
+from cdk_common.synth_profile import SynthProfile, profile_dir
+
+
+def test_profile_dir(monkeypatch):
+    monkeypatch.delenv('CDK_SYNTH_PROFILE', raising=False)
+    monkeypatch.delenv('CDK_CONTEXT_JSON', raising=False)
+    assert profile_dir() is None
+
+    monkeypatch.setenv('CDK_CONTEXT_JSON', json.dumps({'synth-profile': True}))
+    assert profile_dir() == synth_profile.DEFAULT_DIR
+    monkeypatch.setenv('CDK_SYNTH_PROFILE', '0')
+    assert profile_dir() is None
+    monkeypatch.setenv('CDK_SYNTH_PROFILE', '/tmp/profile')
+    assert profile_dir() == '/tmp/profile'
+
+
+def _stack_module():
+    module = types.ModuleType('demo.demo_stack')
+    exec(
+        'def create_subnet(self):\n'
+        '    return [0] * 1000\n'
+        'def create_subnets(self):\n'
+        '    return [create_subnet(self), create_subnet(self)]\n',
+        vars(module),
+    )
+    return module
+
+
+def test_helpers_are_measured_and_restored(tmp_path):
+    module = _stack_module()
+    original = module.create_subnets
+    profile = SynthProfile('demo')
+    profile.instrument_module(module)
+    with profile.measure('build'):
+        module.create_subnets(None)
+    profile.uninstall()
+
+    assert module.create_subnets is original
+    assert profile.frames['build;create_subnets']['calls'] == 1
+    assert profile.frames['build;create_subnets;create_subnet']['calls'] == 2
+    build = profile.frames['build']
+    assert build['wall'] >= profile.frames['build;create_subnets']['wall']
+
+    base = profile.write(str(tmp_path))
+    lines = open(base + '.collapsed').read().splitlines()
+    assert all(line.startswith('demo;build') and line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert json.load(open(base + '.json'))['frames'].keys() == profile.frames.keys()
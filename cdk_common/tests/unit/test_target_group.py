@@ -0,0 +1,29 @@
+import pytest
+
+from cdk_common.target_group import load_target_group, spot_drain_fits
+
+
+def test_load_target_group():
+    target_group = load_target_group()
+    assert target_group['algorithm'] == 'least_outstanding_requests'
+    assert target_group['health_check']['path'] == '/login'
+    assert spot_drain_fits(target_group)
+
+    target_group = load_target_group({'algorithm': 'round_robin', 'slow_start': 60, 'health_check': {'interval': 30}})
+    assert target_group['slow_start'] == 60
+    assert target_group['health_check'] == {
+        'path': '/login', 'interval': 30, 'timeout': 5, 'healthy_threshold': 2, 'unhealthy_threshold': 2}
+    assert not spot_drain_fits(load_target_group({'deregistration_delay': 300}))
+
+
+def test_invalid_target_group():
+    with pytest.raises(Exception, match='needs algorithm round_robin'):
+        load_target_group({'slow_start': 30})
+    with pytest.raises(Exception, match='slow_start must be'):
+        load_target_group({'algorithm': 'round_robin', 'slow_start': 10})
+    with pytest.raises(Exception, match='algorithm must be'):
+        load_target_group({'algorithm': 'random'})
+    with pytest.raises(Exception, match='timeout'):
+        load_target_group({'health_check': {'interval': 5, 'timeout': 5}})
+    with pytest.raises(Exception, match='healthy_threshold'):
+        load_target_group({'health_check': {'healthy_threshold': 1}})
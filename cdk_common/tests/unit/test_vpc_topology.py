@@ -0,0 +1,107 @@
+import ipaddress
+
+import pytest
+
+from cdk_common.vpc_topology import (
+    availability_zones,
+    load_topology,
+    max_tasks_per_az,
+    nat_gateway_zone,
+    nat_gateway_zones,
+    parse_endpoints,
+    plan_subnets,
+    service_id,
+)
+
+
+def test_default_topology_matches_current_layout():
+    plans = plan_subnets()
+    assert [(plan.name, plan.cidr, plan.availability_zone) for plan in plans] == [
+        ('DEMO-PRIVATE-SUBNET-A', '10.5.5.0/26', 'ap-northeast-1a'),
+        ('DEMO-PRIVATE-SUBNET-C', '10.5.5.64/26', 'ap-northeast-1c'),
+        ('DEMO-PUBLIC-SUBNET-A', '10.5.5.128/26', 'ap-northeast-1a'),
+        ('DEMO-PUBLIC-SUBNET-C', '10.5.5.192/26', 'ap-northeast-1c'),
+    ]
+
+
+def test_relative_sizes_do_not_overlap():
+    plans = plan_subnets({
+        'cidr': '10.0.0.0/16',
+        'az_count': 3,
+        'tiers': [
+            {'name': 'public', 'type': 'Public', 'size': 1},
+            {'name': 'private', 'type': 'Private', 'size': 4},
+            {'name': 'data', 'type': 'Isolated', 'prefix': 24},
+        ],
+    })
+    networks = [ipaddress.ip_network(plan.cidr) for plan in plans]
+    assert [plan.name for plan in plans][:3] == ['DEMO-PUBLIC-SUBNET-A', 'DEMO-PUBLIC-SUBNET-C', 'DEMO-PUBLIC-SUBNET-D']
+    assert {plan.cidr.split('/')[1] for plan in plans if plan.tier == 'private'} == {'19'}
+    assert {plan.cidr.split('/')[1] for plan in plans if plan.tier == 'public'} == {'21'}
+    for index, network in enumerate(networks):
+        assert network.subnet_of(ipaddress.ip_network('10.0.0.0/16'))
+        assert not any(network.overlaps(other) for other in networks[index + 1:])
+
+
+def test_invalid_topology():
+    with pytest.raises(Exception, match='az_count 4'):
+        plan_subnets({'az_count': 4})
+    with pytest.raises(Exception, match='too small'):
+        plan_subnets({'cidr': '10.5.5.0/26', 'az_count': 3})
+    with pytest.raises(Exception, match='room'):
+        plan_subnets({'tiers': [{'name': 'a', 'prefix': 25}, {'name': 'b', 'prefix': 25}, {'name': 'c', 'prefix': 28}]})
+    with pytest.raises(Exception, match='type must be'):
+        plan_subnets({'tiers': [{'name': 'a', 'type': 'Nat'}]})
+
+
+def test_nat_gateway_zones():
+    spec = load_topology({'az_count': 3, 'nat_gateways': 2})
+    zones = availability_zones(spec)
+    nat_zones = nat_gateway_zones(spec)
+    assert nat_zones == ['ap-northeast-1a', 'ap-northeast-1c']
+    assert [nat_gateway_zone(nat_zones, zone, zones) for zone in zones] == [
+        'ap-northeast-1a', 'ap-northeast-1c', 'ap-northeast-1a']
+    assert nat_gateway_zones(load_topology()) == ['ap-northeast-1a']
+    with pytest.raises(Exception, match='nat_gateways 3'):
+        nat_gateway_zones(load_topology({'nat_gateways': 3}))
+
+
+def test_parse_endpoints():
+    assert parse_endpoints(load_topology()) == []
+    assert parse_endpoints(load_topology({'endpoints': True})) == [
+        ('s3', 'Gateway'), ('ecr.api', 'Interface'), ('ecr.dkr', 'Interface'), ('logs', 'Interface')]
+    assert parse_endpoints({'endpoints': ['logs', 'logs', 'dynamodb']}) == [('logs', 'Interface'), ('dynamodb', 'Gateway')]
+    assert service_id('ecr.api') == 'EcrApi'
+    with pytest.raises(Exception, match='invalid service name'):
+        parse_endpoints({'endpoints': ['com.amazonaws.ap-northeast-1.s3 ']})
+
+
+def test_secondary_cidrs_and_max_tasks():
+    assert max_tasks_per_az(load_topology(), plan_subnets()) == {'ap-northeast-1a': 59, 'ap-northeast-1c': 59}
+
+    spec = load_topology({'secondary_cidrs': ['100.64.0.0/22'], 'endpoints': ['s3', 'logs']})
+    plans = plan_subnets(spec)
+    secondary = [plan for plan in plans if plan.secondary == 0]
+    assert [(plan.name, plan.cidr) for plan in secondary] == [
+        ('DEMO-PRIVATE-2-SUBNET-A', '100.64.0.0/23'), ('DEMO-PRIVATE-2-SUBNET-C', '100.64.2.0/23')]
+    # 59 - logs ENI + 507
+    assert max_tasks_per_az(spec, plans) == {'ap-northeast-1a': 565, 'ap-northeast-1c': 565}
+    # セッションストア: プライマリ1 + レプリカ2 を2AZに配置（1AZあたり最大2ノード）
+    assert max_tasks_per_az(spec, plans, cache_nodes=3) == {'ap-northeast-1a': 563, 'ap-northeast-1c': 563}
+    assert max_tasks_per_az(load_topology(), plan_subnets(), cache_nodes=2) == {
+        'ap-northeast-1a': 58, 'ap-northeast-1c': 58}
+
+    with pytest.raises(Exception, match='overlaps'):
+        plan_subnets({'secondary_cidrs': ['10.5.0.0/16']})
+    with pytest.raises(Exception, match='unique'):
+        plan_subnets({'secondary_cidrs': [{'cidr': '100.64.0.0/16', 'tiers': [{'name': 'private'}]}]})
+
+
+def test_ipv6_subnets_must_fit_in_a_56():
+    tiers = [{'name': 'tier-%d' % index, 'type': 'Private', 'prefix': 28} for index in range(85)]
+    topology = {'cidr': '10.0.0.0/16', 'az_count': 3, 'ipv6': True, 'tiers': tiers}
+    assert len(plan_subnets(topology)) == 255
+    tiers.append({'name': 'tier-85', 'type': 'Private', 'prefix': 28})
+    with pytest.raises(Exception, match='258 subnets do not fit in a /56'):
+        plan_subnets(topology)
+    assert len(plan_subnets(dict(topology, ipv6=False))) == 258
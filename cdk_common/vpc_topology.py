@@ -0,0 +1,244 @@
+import ipaddress
+import re
+from collections import namedtuple
+
+SUBNET_TYPES = ('Public', 'Private', 'Isolated')
+
+# AWSで作成できる最小のサブネット
+MIN_PREFIX = 28
+
+# ゲートウェイ型のエンドポイント（それ以外はインターフェイス型）
+GATEWAY_ENDPOINTS = ('s3', 'dynamodb')
+# ECRからのイメージ取得（レイヤーはS3）とCloudWatch Logs
+RECOMMENDED_ENDPOINTS = ['s3', 'ecr.api', 'ecr.dkr', 'logs']
+
+DEFAULT_TOPOLOGY = {
+    'cidr': '10.5.5.0/24',
+    'az_count': 2,
+    'nat_gateways': 1,
+    'endpoints': [],
+    'ipv6': False,
+    'secondary_cidrs': [],
+    'flow_logs': False,
+    'availability_zones': ['ap-northeast-1a', 'ap-northeast-1c', 'ap-northeast-1d'],
+    'tiers': [
+        {'name': 'private', 'type': 'Private', 'size': 1},
+        {'name': 'public', 'type': 'Public', 'size': 1},
+    ],
+}
+
+Tier = namedtuple('Tier', ['name', 'type', 'size', 'prefix'])
+SubnetPlan = namedtuple('SubnetPlan', ['name', 'tier', 'type', 'availability_zone', 'cidr', 'secondary'])
+
+########################################################
+# トポロジー
+#
+# VPC CIDR・AZ数・階層（tier）と相対サイズから、全AZのサブネットを
+# 重複なく割り当てる。
+#
+#   cidr                VPC CIDR
+#   az_count            使用するAZ数（availability_zones の先頭から）
+#   availability_zones  AZ候補
+#   nat_gateways        NATゲートウェイ数（先頭のAZから1つずつ。2以上でPRIVATEのルートテーブルをAZごとに作成）
+#   endpoints           VPCエンドポイント（s3 / ecr.api / ecr.dkr / logs 等、true で RECOMMENDED_ENDPOINTS）
+#   ipv6                デュアルスタック（Amazon提供のIPv6 /56、サブネットごとに /64）
+#   tiers               [{name, type: Public|Private|Isolated, size: 相対サイズ, prefix: 固定プレフィックス（任意）}]
+#   secondary_cidrs     追加のCIDR（'100.64.0.0/16' または {cidr, tiers}、既定は PRIVATE の階層 private-2, private-3 ...）
+#   flow_logs           VPCフローログ（S3、true または {traffic_type, aggregation_interval, retention_days}）
+#
+# 各サブネットは VPC全体 × size / (size合計 × AZ数) 以下の最大の2のべき乗。
+# 大きいサブネットから順に割り当てるので境界がずれることはない。
+# 同じサイズの間は tier順・AZ順（既定値で従来の 10.5.5.0/26 〜 10.5.5.192/26）。
+########################################################
+def load_topology(topology=None):
+    """Return the topology spec merged over DEFAULT_TOPOLOGY."""
+    spec = dict(DEFAULT_TOPOLOGY)
+    spec.update(topology or {})
+    return spec
+
+
+def availability_zones(spec):
+    count = int(spec['az_count'])
+    candidates = list(spec['availability_zones'])
+    if count < 1 or count > len(candidates):
+        raise Exception('[error] az_count %d: %d availability zones available' % (count, len(candidates)))
+    return candidates[:count]
+
+
+def nat_gateway_zones(spec):
+    """Return the AZs that get a NAT gateway."""
+    zones = availability_zones(spec)
+    count = int(spec.get('nat_gateways', 1))
+    if count < 1 or count > len(zones):
+        raise Exception('[error] nat_gateways %d: must be between 1 and az_count (%d)' % (count, len(zones)))
+    return zones[:count]
+
+
+def nat_gateway_zone(nat_zones, availability_zone, zones):
+    """Return the AZ of the NAT gateway that availability_zone routes through."""
+    if availability_zone in nat_zones:
+        return availability_zone
+    # NATのないAZは順番に割り振る
+    return nat_zones[zones.index(availability_zone) % len(nat_zones)]
+
+
+def parse_endpoints(spec):
+    """Return [(service, 'Gateway' | 'Interface')] for the endpoints in the spec."""
+    services = spec.get('endpoints') or []
+    if services is True:
+        services = RECOMMENDED_ENDPOINTS
+    endpoints = []
+    for service in services:
+        if not re.match(r'^[a-z0-9][a-z0-9.-]*$', service):
+            raise Exception('[error] endpoints: invalid service name %r' % service)
+        if service in (name for name, _ in endpoints):
+            continue
+        endpoints.append((service, 'Gateway' if service in GATEWAY_ENDPOINTS else 'Interface'))
+    return endpoints
+
+
+def parse_tiers(spec, location='tiers'):
+    tiers = []
+    for index, tier in enumerate(spec['tiers']):
+        tier_location = '%s[%d]' % (location, index)
+        name = tier.get('name')
+        if not name:
+            raise Exception('[error] %s: name is required' % tier_location)
+        type = tier.get('type', 'Private')
+        if type not in SUBNET_TYPES:
+            raise Exception('[error] %s: type must be one of %s' % (tier_location, ', '.join(SUBNET_TYPES)))
+        size = tier.get('size', 1)
+        if size <= 0:
+            raise Exception('[error] %s: size must be positive' % tier_location)
+        prefix = tier.get('prefix')
+        if prefix is not None and not 16 <= int(prefix) <= MIN_PREFIX:
+            raise Exception('[error] %s: prefix must be between 16 and %d' % (tier_location, MIN_PREFIX))
+        tiers.append(Tier(name, type, size, None if prefix is None else int(prefix)))
+    return tiers
+
+
+def parse_secondary_cidrs(spec):
+    """Return [(network, tiers)] for the secondary CIDR blocks in the spec."""
+    primary = ipaddress.ip_network(spec['cidr'])
+    networks = [primary]
+    result = []
+    for index, entry in enumerate(spec.get('secondary_cidrs') or []):
+        location = 'secondary_cidrs[%d]' % index
+        if isinstance(entry, str):
+            entry = {'cidr': entry}
+        network = ipaddress.ip_network(entry['cidr'])
+        if not 16 <= network.prefixlen <= MIN_PREFIX:
+            raise Exception('[error] %s: prefix must be between 16 and %d' % (location, MIN_PREFIX))
+        if any(network.overlaps(other) for other in networks):
+            raise Exception('[error] %s: %s overlaps another VPC CIDR' % (location, network))
+        networks.append(network)
+        tiers = entry.get('tiers') or [{'name': 'private-%d' % (index + 2), 'type': 'Private'}]
+        result.append((network, parse_tiers({'tiers': tiers}, location + '.tiers')))
+    return result
+
+
+def plan_subnets(topology=None):
+    """Return SubnetPlans for every tier and AZ, in tier then AZ order.
+
+    Subnets of the primary CIDR come first, then those of each secondary
+    CIDR (SubnetPlan.secondary is its index).
+    """
+    spec = load_topology(topology)
+    zones = availability_zones(spec)
+    blocks = [(ipaddress.ip_network(spec['cidr']), parse_tiers(spec))] + parse_secondary_cidrs(spec)
+    names = [tier.name for _, tiers in blocks for tier in tiers]
+    if len(set(names)) != len(names):
+        raise Exception('[error] tier names must be unique')
+
+    plans = []
+    for index, (network, tiers) in enumerate(blocks):
+        plans += _allocate(network, tiers, zones, index - 1 if index else None)
+
+    # IPv6はVPCの/56をサブネットごとの/64に分ける
+    if spec.get('ipv6') and len(plans) > 256:
+        raise Exception('[error] ipv6: %d subnets do not fit in a /56' % len(plans))
+    return plans
+
+
+def _allocate(network, tiers, zones, secondary):
+    total_size = sum(tier.size for tier in tiers)
+    requests = []
+    for tier in tiers:
+        prefix = tier.prefix if tier.prefix is not None else _prefix_for(network, tier.size / (total_size * len(zones)))
+        if prefix < network.prefixlen:
+            raise Exception('[error] tier %s: /%d does not fit in %s' % (tier.name, prefix, network))
+        if prefix > MIN_PREFIX:
+            raise Exception('[error] tier %s: %s is too small for %d subnets' % (tier.name, network, len(zones)))
+        for zone in zones:
+            requests.append((prefix, tier, zone))
+
+    # 大きい順（プレフィックスが小さい順）、同じ大きさは指定順
+    allocated = {}
+    next_address = int(network.network_address)
+    for prefix, tier, zone in sorted(requests, key=lambda request: request[0]):
+        block = ipaddress.ip_network((next_address, prefix))
+        if not block.subnet_of(network):
+            raise Exception('[error] %s does not have room for all subnets' % network)
+        allocated[(tier.name, zone)] = block
+        next_address += block.num_addresses
+
+    return [
+        SubnetPlan(subnet_name(tier.name, zone), tier.name, tier.type, zone, str(allocated[(tier.name, zone)]),
+                   secondary)
+        for tier in tiers for zone in zones
+    ]
+
+########################################################
+# タスク数上限
+#
+# awsvpcモードのFargateタスクは1タスクにつきIPを1つ使う。
+# PRIVATEサブネットの利用可能IP（AWS予約の5つを除く）から、
+# インターフェイス型エンドポイントのENIと、セッションストア（ElastiCache）の
+# ノードのENIを引いた数がAZあたりの上限。
+# ※どちらも最初のPRIVATE層に配置される。ノードはAZに均等に配置されるものとし、
+#   1AZあたり切り上げで数える
+########################################################
+def max_tasks_per_az(spec, plans, cache_nodes=0):
+    """Return {availability zone: usable task IPs} over the Private subnets.
+
+    cache_nodes is the number of session store nodes in the first Private tier.
+    """
+    endpoint_tier = next((plan.tier for plan in plans if plan.type == 'Private'), None)
+    endpoint_zones = len({plan.availability_zone for plan in plans if plan.tier == endpoint_tier})
+    reserved = sum(1 for _, endpoint_type in parse_endpoints(spec) if endpoint_type == 'Interface')
+    if endpoint_zones:
+        reserved += -(-int(cache_nodes) // endpoint_zones)
+    result = {}
+    for plan in plans:
+        if plan.type != 'Private':
+            continue
+        usable = ipaddress.ip_network(plan.cidr).num_addresses - 5
+        if plan.tier == endpoint_tier:
+            usable -= reserved
+        result[plan.availability_zone] = result.get(plan.availability_zone, 0) + max(usable, 0)
+    return result
+
+
+def _prefix_for(network, fraction):
+    prefix = network.prefixlen
+    while prefix < network.max_prefixlen and 2.0 ** (network.prefixlen - prefix) > fraction:
+        prefix += 1
+    return prefix
+
+########################################################
+# 名前
+########################################################
+def zone_suffix(availability_zone):
+    return availability_zone[-1].upper()
+
+
+def subnet_name(tier_name, availability_zone):
+    return 'DEMO-%s-SUBNET-%s' % (tier_name.upper(), zone_suffix(availability_zone))
+
+
+def service_id(service):
+    return ''.join(part.capitalize() for part in re.split(r'[.-]', service))
+
+
+def tier_id(tier_name):
+    return ''.join(part.capitalize() for part in tier_name.replace('-', '_').split('_'))
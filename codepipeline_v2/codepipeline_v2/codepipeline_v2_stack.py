@@ -1,10 +1,12 @@
 import os
 from aws_cdk import (
+    Fn,
     RemovalPolicy,
     SecretValue,
     Stack,
     aws_iam as _iam,
     aws_ec2 as _ec2,
+    aws_ecr as _ecr,
     aws_codedeploy as _cd,
     aws_ecs as _ecs,
     aws_codebuild as _cb,
@@ -14,17 +16,30 @@ from aws_cdk import (
 )
 from constructs import Construct
 
+from cdk_common.ecs_service import SERVICE_NAME, load_service
+from cdk_common.ecs_task import load_task
+
+# CodeDeploy（Blue/Green）のアプリケーション・デプロイグループ
+APPLICATION_NAME = 'AppECS-DEMO-CLUSTER-DEMO-SERVICE'
+DEPLOYMENT_GROUP_NAME = 'DgpECS-DEMO-CLUSTER-DEMO-SERVICE'
+
 class CodepipelineV2Stack(Stack):
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, repository: _ecr.IRepository = None,
+                 listeners: dict = None, service: _ecs.BaseService = None, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        self.operation()
+        # タスクのアーキテクチャ（EcsV2Stackと同じコンテキスト ecs-task）
+        task_options = load_task(self.node.try_get_context('ecs-task'))
+        # サービスの有無（EcsV2Stackと同じコンテキスト ecs-service。falseはサービスなし）
+        service_options = load_service(self.node.try_get_context('ecs-service'))
+
+        self.operation(repository, task_options, listeners, service if service_options else False)
 
     ########################################################
     # CDK処理
     ########################################################
-    def operation(self):
+    def operation(self, repository, task_options, listeners=None, service=None):
 
         # バケット
         source_bucket = create_source_bucket(self)
@@ -34,10 +49,16 @@ class CodepipelineV2Stack(Stack):
         role = create_role(self)
 
         # CodeBuild
-        build_project = create_build_project(self, role, source_bucket)
+        build_project = create_build_project(self, role, source_bucket, repository, task_options['architecture'])
+
+        # CodeDeploy（本番・テストリスナーはAlbV2Stackと同じ組）
+        # ※サービスなし（ecs-service=false）の場合はデプロイグループを作成せず、Deployステージを省く
+        deployment_group = None
+        if service is not False:
+            deployment_group = create_deployment_group(self, listeners, service)
 
         # CodePipeLine
-        create_codepipeline(self, build_project, source_bucket, artifact_bucket)
+        create_codepipeline(self, build_project, source_bucket, artifact_bucket, deployment_group)
 
 ########################################################
 # バケット作成(Source用)
@@ -106,7 +127,25 @@ def create_role(self):
 ########################################################
 # Buildプロジェクト作成
 ########################################################
-def create_build_project(self, role, source_bucket):
+def create_build_project(self, role, source_bucket, repository, architecture='X86_64'):
+    # リポジトリ名（ECSスタックから受け取った場合はその参照を使用）
+    repository_name = repository.repository_name if repository else 'demo-repository'
+
+    # ビルド環境（タスクと同じアーキテクチャのイメージをビルドする）
+    environment_variables = {}
+    if architecture == 'ARM64':
+        build_environment = _cb.BuildEnvironment(
+            build_image=_cb.LinuxBuildImage.AMAZON_LINUX_2_ARM_2,
+            compute_type=_cb.ComputeType.LARGE,
+            privileged=True
+        )
+        environment_variables['DOCKER_DEFAULT_PLATFORM'] = _cb.BuildEnvironmentVariable(value='linux/arm64')
+    else:
+        build_environment = _cb.BuildEnvironment(
+            build_image=_cb.LinuxBuildImage.STANDARD_3_0,
+            privileged=True
+        )
+
     build_project = _cb.Project(
         self, 'CodeBuildProject',
         project_name='DEMO-BUILD',
@@ -114,15 +153,13 @@ def create_build_project(self, role, source_bucket):
             bucket=source_bucket,
             path='archive.zip'
         ),
-        environment=_cb.BuildEnvironment(
-            build_image=_cb.LinuxBuildImage.STANDARD_3_0,
-            privileged=True
-        ),
+        environment=build_environment,
         environment_variables={
-            'IMAGE_REPO_NAME': _cb.BuildEnvironmentVariable(value='demo-repository'),
+            'IMAGE_REPO_NAME': _cb.BuildEnvironmentVariable(value=repository_name),
             'AWS_DEFAULT_REGION': _cb.BuildEnvironmentVariable(value=os.environ.get('REGION')),
             'AWS_ACCOUNT_ID': _cb.BuildEnvironmentVariable(value=os.environ.get('ACCOUNT_ID')),
             'CONTAINER_NAME': _cb.BuildEnvironmentVariable(value='DEMO-CONTAINER'),
+            **environment_variables
         },
         build_spec=_cb.BuildSpec.from_source_filename(filename='etc/cicd/buildspec.yml'),
         artifacts=_cb.Artifacts.s3(
@@ -192,10 +229,97 @@ def create_approval_stage(self):
     )
     return approval_stage
 
+########################################################
+# デプロイグループ作成（ECS Blue/Green）
+#
+# 本番リスナー（DEMO-BLUE-TG）・テストリスナー（DEMO-GREEN-TG）は
+# AlbV2Stackのエクスポートを参照するため、HTTP/HTTPSのどちらでもALBと一致する。
+# ※上書きしたプロパティ内の参照はクロススタック参照に変換されないため、
+#   リスナーを受け取った場合もエクスポートを参照し、スタックの依存関係を追加する
+########################################################
+def create_deployment_group(self, listeners=None, service=None):
+    if listeners:
+        for listener in listeners.values():
+            self.add_dependency(Stack.of(listener))
+    prod_listener_arn = Fn.import_value('DEMO-PROD-LISTENER-ARN')
+    test_listener_arn = Fn.import_value('DEMO-TEST-LISTENER-ARN')
+    if service:
+        cluster_name = service.cluster.cluster_name
+        service_name = service.service_name
+    else:
+        cluster_name = 'DEMO-CLUSTER'
+        service_name = SERVICE_NAME
+
+    # Role(CodeDeploy)
+    role = _iam.Role(
+        self, 'CodeDeployRole',
+        role_name='DEMO-CODE-DEPLOY-ROLE',
+        assumed_by=_iam.ServicePrincipal('codedeploy.amazonaws.com')
+    )
+    role.add_managed_policy(_iam.ManagedPolicy.from_aws_managed_policy_name('AWSCodeDeployRoleForECS'))
+
+    # Application
+    application = _cd.CfnApplication(
+        self, 'Application',
+        application_name=APPLICATION_NAME,
+        compute_platform='ECS',
+    )
+
+    # DeploymentGroup
+    deployment_group = _cd.CfnDeploymentGroup(
+        self, 'DeploymentGroup',
+        application_name=application.ref,
+        deployment_group_name=DEPLOYMENT_GROUP_NAME,
+        service_role_arn=role.role_arn,
+        deployment_config_name='CodeDeployDefault.ECSAllAtOnce',
+        deployment_style=_cd.CfnDeploymentGroup.DeploymentStyleProperty(
+            deployment_type='BLUE_GREEN',
+            deployment_option='WITH_TRAFFIC_CONTROL',
+        ),
+        blue_green_deployment_configuration=_cd.CfnDeploymentGroup.BlueGreenDeploymentConfigurationProperty(
+            deployment_ready_option=_cd.CfnDeploymentGroup.DeploymentReadyOptionProperty(
+                action_on_timeout='CONTINUE_DEPLOYMENT',
+            ),
+            terminate_blue_instances_on_deployment_success=_cd.CfnDeploymentGroup.BlueInstanceTerminationOptionProperty(
+                action='TERMINATE',
+                termination_wait_time_in_minutes=5,
+            ),
+        ),
+        auto_rollback_configuration=_cd.CfnDeploymentGroup.AutoRollbackConfigurationProperty(
+            enabled=True,
+            events=['DEPLOYMENT_FAILURE'],
+        ),
+        ecs_services=[
+            _cd.CfnDeploymentGroup.ECSServiceProperty(
+                cluster_name=cluster_name,
+                service_name=service_name,
+            )
+        ],
+    )
+    # ※TargetGroupPairInfoList はこのバージョンのL1に定義がないため上書きで設定する
+    deployment_group.add_property_override('LoadBalancerInfo', {
+        'TargetGroupPairInfoList': [
+            {
+                'TargetGroups': [{'Name': 'DEMO-BLUE-TG'}, {'Name': 'DEMO-GREEN-TG'}],
+                'ProdTrafficRoute': {'ListenerArns': [prod_listener_arn]},
+                'TestTrafficRoute': {'ListenerArns': [test_listener_arn]},
+            }
+        ]
+    })
+
+    return _cd.EcsDeploymentGroup.from_ecs_deployment_group_attributes(
+        self, 'DeploymentGroupAttributes',
+        application=_cd.EcsApplication.from_ecs_application_name(
+            self, 'ApplicationName',
+            application.ref
+        ),
+        deployment_group_name=deployment_group.ref
+    )
+
 ########################################################
 # DeployStage作成
 ########################################################
-def create_deploy_stage(self, source_build_output):
+def create_deploy_stage(self, source_build_output, deployment_group):
     deploy_stage=_cp.StageProps(
         stage_name='Deploy',
         actions=[
@@ -208,14 +332,7 @@ def create_deploy_stage(self, source_build_output):
                     )
                 ],
                 run_order=1,
-                deployment_group=_cd.EcsDeploymentGroup.from_ecs_deployment_group_attributes(
-                    self, 'DeploymentGroupAttributes',
-                    application=_cd.EcsApplication.from_ecs_application_name(
-                        self, 'ApplicationName',
-                        'AppECS-DEMO-CLUSTER-DEMO-SERVICE'
-                    ),
-                    deployment_group_name='DgpECS-DEMO-CLUSTER-DEMO-SERVICE'
-                ),
+                deployment_group=deployment_group,
                 app_spec_template_file=_cp.ArtifactPath(
                     source_build_output,
                     'appspec.yml'
@@ -232,24 +349,28 @@ def create_deploy_stage(self, source_build_output):
 ########################################################
 # CodePipeLine作成
 ########################################################
-def create_codepipeline(self, build_project, source_bucket, artifact_bucket):
+def create_codepipeline(self, build_project, source_bucket, artifact_bucket, deployment_group=None):
     # アーティファクト取得
     source_output=_cp.Artifact(artifact_name='SourceArtifact')
     source_build_output=_cp.Artifact(artifact_name='BuildArtifact')
 
+    # ステージ
+    stages=[
+        # Source
+        create_source_stage(self, source_output, source_bucket),
+        # Build
+        create_build_stage(self, source_output, build_project),
+        # # Approval
+        # create_approval_stage(self),
+    ]
+    # Deploy（サービスなしの場合はイメージのビルド・プッシュのみ）
+    if deployment_group:
+        stages.append(create_deploy_stage(self, source_build_output, deployment_group))
+
     # コードパイプライン作成
     pipeline=_cp.Pipeline(
         self, 'Pipeline',
         pipeline_name='DEMO-PIPELINE',
         artifact_bucket=artifact_bucket,
-        stages=[
-            # Source
-            create_source_stage(self, source_output, source_bucket),
-            # Build
-            create_build_stage(self, source_output, build_project),
-            # # Approval
-            # create_approval_stage(self),
-            # Deploy
-            create_deploy_stage(self, source_build_output),
-        ]
-    )
\ No newline at end of file
+        stages=stages
+    )
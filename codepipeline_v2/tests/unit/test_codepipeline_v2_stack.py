@@ -13,3 +13,23 @@ def test_sqs_queue_created():
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+########################################################
+# サービスなし（ecs-service=false）
+########################################################
+def test_no_deployment_group_without_service(monkeypatch):
+    monkeypatch.setenv('REGION', 'ap-northeast-1')
+    monkeypatch.setenv('ACCOUNT_ID', '123456789012')
+    app = core.App(context={'ecs-service': False})
+    stack = CodepipelineV2Stack(app, "codepipeline-v2")
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is("AWS::CodeDeploy::Application", 0)
+    template.resource_count_is("AWS::CodeDeploy::DeploymentGroup", 0)
+    template.has_resource_properties("AWS::CodePipeline::Pipeline", {
+        "Stages": [
+            assertions.Match.object_like({"Name": "Source"}),
+            assertions.Match.object_like({"Name": "Build"}),
+        ]
+    })
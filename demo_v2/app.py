@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cdk_common.synth_cache import cached_synth
+
+PROJECTS = ('vpc_v2', 'alb_v2', 'ecs_v2', 'codepipeline_v2')
+
+
+def build(app):
+    from cdk_common.app_env import add_project_paths, get_env
+
+    add_project_paths(*PROJECTS)
+
+    from vpc_v2.vpc_v2_stack import VpcV2Stack
+    from alb_v2.alb_v2_stack import AlbV2Stack
+    from ecs_v2.ecs_v2_stack import EcsV2Stack
+    from codepipeline_v2.codepipeline_v2_stack import CodepipelineV2Stack
+
+    env = get_env()
+
+    # VPC
+    vpc_stack = VpcV2Stack(app, "VpcV2Stack", env=env)
+
+    # ALB / ECS（VPCはルックアップせず、VpcV2Stackの参照を使用）
+    alb_stack = AlbV2Stack(app, "AlbV2Stack", vpc=vpc_stack.vpc, env=env)
+    # ECSサービスはALBスタックのDEMO-BLUE-TGへ登録
+    # （セッションストアを作成した場合はそのエンドポイントを使用）
+    ecs_stack = EcsV2Stack(app, "EcsV2Stack", vpc=vpc_stack.vpc,
+                           target_group=alb_stack.target_groups['DEMO-BLUE-TG'],
+                           target_groups=alb_stack.target_groups,
+                           session_store=vpc_stack.session_store, env=env)
+
+    # CodePipeline（ECRリポジトリ・サービスはEcsV2Stack、Blue/GreenのリスナーはAlbV2Stackの参照を使用）
+    CodepipelineV2Stack(app, "CodepipelineV2Stack", repository=ecs_stack.repository,
+                        listeners=alb_stack.listeners, service=ecs_stack.service, env=env)
+
+
+cached_synth(os.path.dirname(os.path.abspath(__file__)), build, PROJECTS)
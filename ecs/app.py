@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
+import os
+import sys
 
 from aws_cdk import core
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
 from ecs.ecs_stack import EcsStack
-import os
 
 ACCOUNT_ID = os.environ.get('ACCOUNT_ID')
 if not ACCOUNT_ID:
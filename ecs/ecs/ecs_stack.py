@@ -1,4 +1,5 @@
-import pandas as pd
+import os
+
 from aws_cdk import (
     aws_ec2 as _ec2,
     aws_ecr as _ecr,
@@ -8,6 +9,10 @@ from aws_cdk import (
     core,
 )
 
+from cdk_common.security_group import add_inbound
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class EcsStack(core.Stack):
 
     def __init__(self, scope: core.Construct, id: str, **kwargs) -> None:
@@ -64,7 +69,7 @@ def create_security_group(self, vpc):
         description='DEMO-SERVICE-SG',
         security_group_name='DEMO-SERVICE-SG',
     )
-    add_inbound(self, './security_group/inbound_rules/service.csv', sg_service)
+    add_inbound(self, os.path.join(BASE_DIR, 'security_group', 'inbound_rules', 'service.csv'), sg_service)
 
     # Dictionary作成
     sg_dictionary = {}
@@ -72,35 +77,6 @@ def create_security_group(self, vpc):
 
     return sg_dictionary
 
-########################################################
-# インバウンド設定追加（セキュリティグループ）
-########################################################
-def add_inbound(self, path, security_group):
-    csv_input = pd.read_csv(filepath_or_buffer=path, encoding='utf_8', sep=',')
-    for index, row in csv_input.iterrows():
-        type =row[0]
-        peer = row[1]
-        description = row[2]
-        port = row[3]
-        if type == 'any_ipv4':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.any_ipv4(),
-                description  = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        elif type == 'prefix':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.prefix_list(peer),
-                description  = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        else:
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.ipv4(peer),
-                description  = description,
-                connection = _ec2.Port.tcp(port),
-            )
-
 ########################################################
 # ECS作成
 ########################################################
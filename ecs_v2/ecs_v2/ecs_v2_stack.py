@@ -1,39 +1,100 @@
-import pandas as pd
+import os
+
 from aws_cdk import (
-    # Duration,
+    Duration,
+    Fn,
     Stack,
+    aws_cloudwatch as _cw,
     aws_ec2 as _ec2,
     aws_ecr as _ecr,
     aws_ecs as _ecs,
+    aws_elasticache as _elasticache,
+    aws_elasticloadbalancingv2 as _elbv2,
     aws_iam as _iam,
     aws_logs as _logs,
     # aws_sqs as sqs,
 )
 from constructs import Construct
 
+from cdk_common.alb_routes import load_routes, route_id, service_name, target_group_name, task_family
+from cdk_common.ecs_service import SERVICE_NAME, SPOT_STOP_TIMEOUT, capacity_providers, load_service, uses_fargate_spot
+from cdk_common.ecs_task import load_task
+from cdk_common.session_store import ENDPOINT_EXPORT, PORT_EXPORT, container_environment, load_session_store
+from cdk_common.security_group import add_inbound
+from cdk_common.vpc_topology import load_topology
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class EcsV2Stack(Stack):
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, vpc: _ec2.IVpc = None,
+                 target_group: _elbv2.IApplicationTargetGroup = None,
+                 session_store: _elasticache.CfnReplicationGroup = None, target_groups: dict = None, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        self.operation()
+        # セッションストア（コンテキスト session-store が有効な場合、エンドポイントを環境変数へ渡す）
+        session_store_options = load_session_store(self.node.try_get_context('session-store'))
+        environment = None
+        if session_store_options:
+            environment = session_store_environment(self, session_store, session_store_options)
+
+        # タスクサイズ・アーキテクチャ（コンテキスト ecs-task。CodepipelineV2Stackのビルド環境も同じ値を参照する）
+        task_options = load_task(self.node.try_get_context('ecs-task'))
+        # サービス設定（コンテキスト ecs-service、なければ既定値。AlbV2Stack・CodepipelineV2Stackと同じ値を参照する）
+        service_options = load_service(self.node.try_get_context('ecs-service'))
+        # ルート（コンテキスト alb-routes。AlbV2Stackと同じ値を参照する）ごとのサービス
+        routes = load_routes(self.node.try_get_context('alb-routes'), task_options['architecture'], code_deploy=service_options is not None)
+
+        self.operation(vpc, target_group, service_options, task_options, environment, routes, target_groups or {})
 
     ########################################################
     # CDK処理
     ########################################################
-    def operation(self):
+    def operation(self, vpc, target_group, service_options, task_options, environment=None, routes=(),
+                  target_groups=None):
 
         # ECR
         repository = create_repository(self)
+        self.repository = repository
+
+        # VPC取得（未指定の場合はDEMO-VPCをルックアップ）
+        if vpc is None:
+            vpc = get_vpc(self)
+
+        # セキュリティグループ作成（VPCがデュアルスタックの場合はIPv6のアウトバウンドを追加）
+        ipv6 = bool(load_topology(self.node.try_get_context('vpc-topology')).get('ipv6'))
+        sg_dictionary = create_security_group(self, vpc, ipv6)
 
-        # VPC取得
-        vpc = get_vpc(self)
+        # ECS（capacity_provider_strategy を指定したサービスがある場合のみキャパシティプロバイダーを有効にする）
+        fargate_capacity_providers = any(
+            options and options['capacity_provider_strategy']
+            for options in [service_options] + [route.service for route in routes])
+        cluster, execution_role = create_ecs(self, vpc, fargate_capacity_providers)
+        task_def = create_task_definition(self, execution_role, repository, task_options, 'DEMO-TASK',
+                                          stop_timeout=spot_stop_timeout(service_options), environment=environment)
 
-        # セキュリティグループ作成
-        sg_dictionary = create_security_group(self, vpc)
+        # サービス作成（DEMO-BLUE-TGへ登録、オートスケーリング）
+        self.service = None
+        if service_options:
+            # ターゲットグループ（未指定の場合はAlbV2Stackのエクスポートを参照）
+            if target_group is None:
+                target_group = import_target_group(self, 'DEMO-BLUE-TG')
+            self.service = create_service(self, cluster, task_def, sg_dictionary, target_group, service_options)
 
-        # ECS
-        create_ecs(self, vpc, sg_dictionary, repository)
+        # ルートごとのサービス作成（個別のタスクサイズ・オートスケーリング、ECSのローリング更新）
+        self.route_services = {}
+        for route in routes:
+            if not route.service:
+                continue
+            suffix = route_id(route.name)
+            tg_name = target_group_name(route.name)
+            route_target_group = (target_groups or {}).get(tg_name) or import_target_group(self, tg_name)
+            route_task_def = create_task_definition(self, execution_role, repository, route.size,
+                                                    task_family(route.name), suffix,
+                                                    spot_stop_timeout(route.service), environment)
+            self.route_services[route.name] = create_service(
+                self, cluster, route_task_def, sg_dictionary, route_target_group, route.service,
+                service_name(route.name), suffix, code_deploy=False)
 
 ########################################################
 # リポジトリ作成
@@ -57,8 +118,12 @@ def get_vpc(self):
 
 ########################################################
 # セキュリティグループ作成
+#
+# デュアルスタックの場合、タスクのIPv6通信（Egress Only インターネットゲートウェイ経由）のため
+# ::/0 のアウトバウンドを追加する（allow_all_outbound はIPv4の 0.0.0.0/0 のみ）。
+# ※FargateのタスクにIPv6アドレスが割り当てられるのは、ECSのアカウント設定 dualStackIPv6 が有効な場合のみ
 ########################################################
-def create_security_group(self, vpc):
+def create_security_group(self, vpc, ipv6=False):
 
     # SERVICE
     sg_service = _ec2.SecurityGroup(
@@ -67,7 +132,15 @@ def create_security_group(self, vpc):
         description='DEMO-SERVICE-SG',
         security_group_name='DEMO-SERVICE-SG',
     )
-    add_inbound(self, './security_group/inbound_rules/service.csv', sg_service)
+    add_inbound(self, os.path.join(BASE_DIR, 'security_group', 'inbound_rules', 'service.csv'), sg_service)
+    if ipv6:
+        _ec2.CfnSecurityGroupEgress(
+            self, 'DEMO-SERVICE-SG-EGRESS-IPV6',
+            group_id=sg_service.security_group_id,
+            ip_protocol='-1',
+            cidr_ipv6='::/0',
+            description='Allow all IPv6 outbound traffic',
+        )
 
     # Dictionary作成
     sg_dictionary = {}
@@ -76,44 +149,31 @@ def create_security_group(self, vpc):
     return sg_dictionary
 
 ########################################################
-# インバウンド設定追加（セキュリティグループ）
-########################################################
-def add_inbound(self, path, security_group):
-    csv_input = pd.read_csv(filepath_or_buffer=path, encoding='utf_8', sep=',')
-    for index, row in csv_input.iterrows():
-        type =row[0]
-        peer = row[1]
-        description = row[2]
-        port = row[3]
-        if type == 'any_ipv4':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.any_ipv4(),
-                description  = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        elif type == 'prefix':
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.prefix_list(peer),
-                description  = description,
-                connection = _ec2.Port.tcp(port),
-            )
-        else:
-            security_group.add_ingress_rule(
-                peer = _ec2.Peer.ipv4(peer),
-                description  = description,
-                connection = _ec2.Port.tcp(port),
-            )
+# セッションストアの環境変数
+#
+# レプリケーショングループ（VpcV2Stack）を受け取った場合はその参照、
+# 未指定の場合はVpcV2Stackのエクスポートを参照する。
+########################################################
+def session_store_environment(self, session_store, options):
+    if session_store is not None:
+        host = session_store.attr_primary_end_point_address
+        port = session_store.attr_primary_end_point_port
+    else:
+        host = Fn.import_value(ENDPOINT_EXPORT)
+        port = Fn.import_value(PORT_EXPORT)
+    return container_environment(host, port, options)
 
 ########################################################
 # ECS作成
 ########################################################
-def create_ecs(self, vpc, sg_dictionary, repository):
+def create_ecs(self, vpc, fargate_capacity_providers=False):
 
-    # Cluster
+    # Cluster（キャパシティプロバイダー FARGATE / FARGATE_SPOT）
     cluster = _ecs.Cluster(
         self, 'Cluster',
         cluster_name='DEMO-CLUSTER',
-        vpc=vpc
+        vpc=vpc,
+        enable_fargate_capacity_providers=fargate_capacity_providers or None,
     )
 
     # Role(task execution)
@@ -124,15 +184,35 @@ def create_ecs(self, vpc, sg_dictionary, repository):
     )
     execution_role.add_managed_policy(_iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AmazonECSTaskExecutionRolePolicy'))
 
+    return cluster, execution_role
+
+########################################################
+# タスク定義作成
+#
+# DEMO-TASK（suffixなし）とルートごとのタスク（DEMO-<NAME>-TASK）。
+# イメージ・コンテナ名・ポートは共通。
+########################################################
+def create_task_definition(self, execution_role, repository, task_options, family, suffix='', stop_timeout=None,
+                           environment=None):
+
+    # RuntimePlatform（ARM64の場合のみ指定、X86_64は既定値）
+    runtime_platform = None
+    if task_options['architecture'] == 'ARM64':
+        runtime_platform = _ecs.RuntimePlatform(
+            cpu_architecture=_ecs.CpuArchitecture.ARM64,
+            operating_system_family=_ecs.OperatingSystemFamily.LINUX,
+        )
+
     # TaskDefinition
     task_def = _ecs.TaskDefinition(
-        self, 'TaskDefinition',
+        self, 'TaskDefinition' + suffix,
         compatibility=_ecs.Compatibility.FARGATE,
-        cpu='2048',
-        memory_mib='8192',
+        cpu=str(task_options['cpu']),
+        memory_mib=str(task_options['memory']),
+        runtime_platform=runtime_platform,
         network_mode=_ecs.NetworkMode.AWS_VPC,
         execution_role=execution_role,
-        family='DEMO-TASK',
+        family=family,
         task_role=execution_role,
     )
 
@@ -140,13 +220,148 @@ def create_ecs(self, vpc, sg_dictionary, repository):
     container = task_def.add_container(
         id='DEMO-CONTAINER',
         image=_ecs.ContainerImage.from_ecr_repository(repository),
+        environment=environment,
         logging=_ecs.LogDriver.aws_logs(
             stream_prefix='ecs',
             log_group=_logs.LogGroup(
-                self, 'LogGroup',
-                log_group_name='/ecs/'+'DEMO-TASK',
+                self, 'LogGroup' + suffix,
+                log_group_name='/ecs/'+family,
                 retention=_logs.RetentionDays.INFINITE,
             )
-        )
+        ),
+        stop_timeout=Duration.seconds(stop_timeout) if stop_timeout else None,
     )
     container.add_port_mappings(_ecs.PortMapping(container_port=8080))
+
+    return task_def
+
+
+def spot_stop_timeout(service_options):
+    # Fargate Spot を使う場合、中断時にコンテナへ最大の停止猶予を与える
+    if uses_fargate_spot(service_options):
+        return SPOT_STOP_TIMEOUT
+    return None
+
+########################################################
+# ターゲットグループ参照（AlbV2Stackのエクスポート）
+########################################################
+def import_target_group(self, tg_name):
+    target_group = _elbv2.ApplicationTargetGroup.from_target_group_attributes(
+        self, tg_name,
+        target_group_arn=Fn.import_value(tg_name + '-ARN'),
+    )
+    return target_group
+
+########################################################
+# サービス作成
+#
+# DEMO-SERVICE のデプロイはCodeDeploy（Blue/Green）で行うため、デプロイコントローラーは CODE_DEPLOY
+# （ルートのサービスはECSのローリング更新）。
+# ※CODE_DEPLOY のサービスはCloudFormationでタスク定義を更新できない。作成後の DEMO-TASK の変更は
+#   パイプラインの taskdef.json で行う（demo_v2/README.md「デプロイ（CodeDeploy）」）
+# タスク数は Application Auto Scaling が min_capacity 〜 max_capacity で調整する。
+# capacity_provider_strategy を指定した場合は FARGATE / FARGATE_SPOT に配分する。
+########################################################
+def create_service(self, cluster, task_def, sg_dictionary, target_group, options, name=SERVICE_NAME, suffix='',
+                   code_deploy=True):
+    strategies = None
+    if options['capacity_provider_strategy']:
+        strategies = [
+            _ecs.CapacityProviderStrategy(capacity_provider=capacity_provider, base=base or None, weight=weight)
+            for capacity_provider, base, weight in capacity_providers(options['capacity_provider_strategy'])
+        ]
+
+    deployment_controller = None
+    if code_deploy:
+        deployment_controller = _ecs.DeploymentController(type=_ecs.DeploymentControllerType.CODE_DEPLOY)
+
+    service = _ecs.FargateService(
+        self, 'Service' + suffix,
+        service_name=name,
+        cluster=cluster,
+        task_definition=task_def,
+        desired_count=int(options['min_capacity']),
+        security_groups=[sg_dictionary['DEMO-SERVICE-SG']],
+        vpc_subnets=_ec2.SubnetSelection(subnet_type=_ec2.SubnetType.PRIVATE_WITH_NAT),
+        assign_public_ip=False,
+        capacity_provider_strategies=strategies,
+        deployment_controller=deployment_controller,
+        health_check_grace_period=Duration.seconds(int(options['health_check_grace_period'])),
+    )
+
+    # キャパシティプロバイダーの関連付け後に作成する
+    if strategies:
+        service.node.add_dependency(cluster)
+
+    # ターゲットグループ登録
+    target_group.add_target(service.load_balancer_target(
+        container_name='DEMO-CONTAINER',
+        container_port=8080,
+    ))
+
+    # オートスケーリング
+    # ※CodeDeploy（Blue/Green）のサービスは切り替えのたびに本番のターゲットグループが
+    #   DEMO-BLUE-TG / DEMO-GREEN-TG で入れ替わるため、リクエスト数では追跡しない
+    create_service_scaling(self, service, target_group, options, request_count=not code_deploy)
+
+    return service
+
+########################################################
+# オートスケーリング（ターゲット追跡）
+#
+# いずれかの指標がターゲットを超えるとスケールアウトし、
+# すべての指標がターゲットを下回るとスケールインする。
+# RequestCountPerTarget はターゲットグループが固定のサービス（request_count=True）のみ。
+########################################################
+def create_service_scaling(self, service, target_group, options, request_count=True):
+    scaling = service.auto_scale_task_count(
+        min_capacity=int(options['min_capacity']),
+        max_capacity=int(options['max_capacity']),
+    )
+    cooldowns = {
+        'scale_in_cooldown': Duration.seconds(int(options['scale_in_cooldown'])),
+        'scale_out_cooldown': Duration.seconds(int(options['scale_out_cooldown'])),
+    }
+
+    # CPU
+    if options['cpu_utilization'] is not None:
+        scaling.scale_on_cpu_utilization(
+            'CpuScaling',
+            target_utilization_percent=options['cpu_utilization'],
+            **cooldowns
+        )
+
+    # メモリ
+    if options['memory_utilization'] is not None:
+        scaling.scale_on_memory_utilization(
+            'MemoryScaling',
+            target_utilization_percent=options['memory_utilization'],
+            **cooldowns
+        )
+
+    # ALB RequestCountPerTarget
+    if request_count and options['requests_per_target'] is not None:
+        if isinstance(target_group, _elbv2.ApplicationTargetGroup):
+            scaling.scale_on_request_count(
+                'RequestCountScaling',
+                requests_per_target=options['requests_per_target'],
+                target_group=target_group,
+                **cooldowns
+            )
+        else:
+            # 参照のみのターゲットグループはロードバランサー名が分からないため、
+            # ターゲットグループ単位のメトリクスで追跡する
+            scaling.scale_to_track_custom_metric(
+                'RequestCountScaling',
+                metric=_cw.Metric(
+                    namespace='AWS/ApplicationELB',
+                    metric_name='RequestCountPerTarget',
+                    dimensions_map={'TargetGroup': Fn.select(5, Fn.split(':', target_group.target_group_arn))},
+                    statistic='Sum',
+                    period=Duration.minutes(1),
+                ),
+                target_value=options['requests_per_target'],
+                **cooldowns
+            )
+
+    return scaling
@@ -0,0 +1,94 @@
+import json
+import os
+import re
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ACCOUNT_ID = '123456789012'
+DEFAULT_REGION = 'ap-northeast-1'
+
+_CONTEXT_KEY_ENV = re.compile(r':account=(\d{12}):.*?:region=([a-z0-9-]+)')
+
+########################################################
+# CDKアプリ検出（cdk.json と app.py を持つディレクトリ）
+########################################################
+def discover_apps(root_dir=ROOT_DIR):
+    apps = []
+    for name in sorted(os.listdir(root_dir)):
+        app_dir = os.path.join(root_dir, name)
+        if os.path.isfile(os.path.join(app_dir, 'cdk.json')) and os.path.isfile(os.path.join(app_dir, 'app.py')):
+            apps.append(app_dir)
+    return apps
+
+
+def select_apps(names, root_dir=ROOT_DIR):
+    apps = discover_apps(root_dir)
+    if not names:
+        return apps
+    by_name = {os.path.basename(app_dir): app_dir for app_dir in apps}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise Exception('[error] unknown CDK app: %s' % ', '.join(unknown))
+    return [by_name[name] for name in names]
+
+########################################################
+# コンテキスト（cdk.json + cdk.context.json）
+########################################################
+def app_context(app_dir):
+    with open(os.path.join(app_dir, 'cdk.json'), encoding='utf_8') as fp:
+        context = dict(json.load(fp).get('context', {}))
+    context_path = os.path.join(app_dir, 'cdk.context.json')
+    if os.path.isfile(context_path):
+        with open(context_path, encoding='utf_8') as fp:
+            context.update(json.load(fp))
+    return context
+
+
+def app_command(app_dir):
+    with open(os.path.join(app_dir, 'cdk.json'), encoding='utf_8') as fp:
+        return json.load(fp).get('app', 'python3 app.py')
+
+
+def default_account_region(context):
+    """Account/region of the committed lookups, so synth stays offline."""
+    for key in context:
+        match = _CONTEXT_KEY_ENV.search(key)
+        if match:
+            return match.group(1), match.group(2)
+    return None, None
+
+########################################################
+# 合成用の環境変数
+#
+# cdk CLIと同様に CDK_CONTEXT_JSON / CDK_OUTDIR を渡し、
+# app.py を直接実行してもcdk synthと同じ結果になるようにする
+########################################################
+def synth_environment(app_dir, outdir, account_id=None, region=None, base=None):
+    base = os.environ if base is None else base
+    context = app_context(app_dir)
+    # ルックアップ結果がある場合はそのアカウント・リージョンを優先（オフライン合成のため）
+    lookup_account_id, lookup_region = default_account_region(context)
+    account_id = account_id or lookup_account_id or base.get('ACCOUNT_ID') or DEFAULT_ACCOUNT_ID
+    region = region or lookup_region or base.get('REGION') or DEFAULT_REGION
+
+    environment = dict(base)
+    environment.update({
+        'ACCOUNT_ID': account_id,
+        'REGION': region,
+        'CDK_DEFAULT_ACCOUNT': account_id,
+        'CDK_DEFAULT_REGION': region,
+        'CDK_CONTEXT_JSON': json.dumps(context),
+        'CDK_OUTDIR': outdir,
+        'JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION': '1',
+    })
+    return environment
+
+
+def template_sizes(outdir):
+    sizes = {}
+    if not os.path.isdir(outdir):
+        return sizes
+    for name in sorted(os.listdir(outdir)):
+        if name.endswith('.template.json'):
+            sizes[name[:-len('.template.json')]] = os.path.getsize(os.path.join(outdir, name))
+    return sizes
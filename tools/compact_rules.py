@@ -0,0 +1,47 @@
+"""Report how far inbound-rule CSVs shrink after compaction.
+
+    python -m tools.compact_rules alb_v2/security_group/inbound_rules/alb.csv ...
+    python -m tools.compact_rules --generate 50000
+"""
+import argparse
+import sys
+import time
+
+from cdk_common.inbound_rules import InboundRule, load_inbound_rules
+from cdk_common.rule_compaction import compact_inbound_rules, compaction_report
+
+
+def generate_rules(count):
+    # /28単位の連続CIDRと80-83のポートを組み合わせた集約可能なルール
+    for i in range(count):
+        block = i // 4
+        port = 80 + i % 4
+        peer = '10.%d.%d.%d/28' % (block // 4096 % 256, block // 16 % 256, block % 16 * 16)
+        yield InboundRule('ipv4', peer, 'generated', port, port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--generate', type=int, metavar='N', help='compact N generated rules')
+    args = parser.parse_args(argv)
+    if not args.paths and not args.generate:
+        parser.error('specify CSV paths or --generate')
+
+    sources = [(path, load_inbound_rules(path)) for path in args.paths]
+    if args.generate:
+        sources.append(('generated', list(generate_rules(args.generate))))
+
+    for name, rules in sources:
+        started = time.perf_counter()
+        compacted = compact_inbound_rules(rules)
+        elapsed = time.perf_counter() - started
+        report = compaction_report(rules, compacted, name).splitlines()
+        print('%s (%.3f s)' % (report[0], elapsed))
+        for line in report[1:]:
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
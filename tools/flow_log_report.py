@@ -0,0 +1,248 @@
+"""Traffic report for VPC Flow Log files synced from S3.
+
+Reads the gzipped flow log files under the given directories (e.g.
+`aws s3 sync s3://<FlowLogBucketName>/AWSLogs/ flowlogs/`) and reports:
+the top talkers by bytes and packets per source / destination / port,
+the bytes through the NAT gateways per AZ, and the rejected flows.
+
+A NAT gateway's interface logs every flow twice: once between the
+instance and the peer, and once translated, with the NAT gateway's own
+private address as source or destination. Only the first leg is counted,
+so the NAT gateway's address is needed along with its interface.
+
+Files are streamed line by line through generators and the per-flow
+counters are bounded (Space-Saving), so memory stays constant however
+large the input is. Top talkers are therefore approximate when there
+are more distinct flows than --capacity; each count is an upper bound
+and `error` is how much it may be over.
+
+    python -m tools.flow_log_report DIR_OR_FILE ... [--nat-eni eni-...=10.0.0.5 ...]
+        [--nat-gateways describe-nat-gateways.json] [--top 10] [--capacity 10000] [--json]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+from cdk_common.flow_logs import FIELDS
+
+CAPACITY = 10000
+
+########################################################
+# 読み込み
+########################################################
+def iter_files(paths):
+    """Yield the flow log files under paths (directories are walked in name order)."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith('.log.gz') or name.endswith('.log'):
+                    yield os.path.join(root, name)
+
+
+def iter_lines(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as stream:
+        for line in stream:
+            yield line
+
+
+def iter_records(lines):
+    """Yield (az_id, interface_id, src, dst, dstport, protocol, packets, bytes, action) for each flow.
+
+    The first line of a file names its fields, so files written with the
+    default format (or any format with these fields) are read as well.
+    Rows without traffic (NODATA / SKIPDATA, '-') are skipped.
+    """
+    lines = iter(lines)
+    header = next(lines, '').split()
+    missing = [field for field in FIELDS if field not in header]
+    if missing:
+        raise Exception('[error] flow log header lacks %s' % ', '.join(missing))
+    indexes = [header.index(field) for field in FIELDS]
+    width = len(header)
+    packets_index = FIELDS.index('packets')
+    bytes_index = FIELDS.index('bytes')
+    for line in lines:
+        values = line.split()
+        if len(values) != width:
+            continue
+        record = [values[index] for index in indexes]
+        if record[bytes_index] == '-':
+            continue
+        record[packets_index] = int(record[packets_index])
+        record[bytes_index] = int(record[bytes_index])
+        yield record
+
+
+def iter_flow_logs(paths):
+    for path in iter_files(paths):
+        for record in iter_records(iter_lines(path)):
+            yield record
+
+########################################################
+# 集計
+########################################################
+class TopCounter:
+    """Bounded heavy-hitter counter (Space-Saving with batched eviction).
+
+    Holds at most 2 * capacity keys. When full, only the capacity largest
+    are kept and a new key starts from the largest evicted count, so
+    every count is an upper bound and over by at most its error.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.floor = 0
+        self.counts = {}
+
+    def add(self, key, value, extra=0):
+        entry = self.counts.get(key)
+        if entry is None:
+            if len(self.counts) >= 2 * self.capacity:
+                self._evict()
+            entry = self.counts[key] = [self.floor, self.floor, 0]
+        entry[0] += value
+        entry[2] += extra
+
+    def _evict(self):
+        ranked = sorted(self.counts.items(), key=lambda item: item[1][0], reverse=True)
+        self.floor = ranked[self.capacity][1][0]
+        self.counts = dict(ranked[:self.capacity])
+
+    def top(self, count):
+        """Return [(key, count, error, extra)] for the count largest keys."""
+        ranked = sorted(self.counts.items(), key=lambda item: item[1][0], reverse=True)[:count]
+        return [(key, total, error, extra) for key, (total, error, extra) in ranked]
+
+
+def analyze(records, nat_enis=None, capacity=CAPACITY):
+    """Aggregate flow records in one pass.
+
+    nat_enis maps each NAT gateway interface to the gateway's private
+    address; records to or from that address (the translated leg) are
+    left out of the NAT bytes.
+    """
+    nat_enis = dict(nat_enis or {})
+    talkers = TopCounter(capacity)
+    packet_talkers = TopCounter(capacity)
+    rejected_flows = TopCounter(capacity)
+    nat_bytes = {}
+    totals = {'records': 0, 'bytes': 0, 'packets': 0, 'rejected': 0, 'rejected_bytes': 0}
+
+    for az_id, interface_id, src, dst, port, protocol, packets, size, action in records:
+        totals['records'] += 1
+        totals['bytes'] += size
+        totals['packets'] += packets
+        key = (src, dst, port, protocol)
+        if action == 'REJECT':
+            totals['rejected'] += 1
+            totals['rejected_bytes'] += size
+            rejected_flows.add(key, 1, size)
+            continue
+        talkers.add(key, size, packets)
+        packet_talkers.add(key, packets, size)
+        if interface_id in nat_enis and nat_enis[interface_id] not in (src, dst):
+            nat_bytes[az_id] = nat_bytes.get(az_id, 0) + size
+
+    return {
+        'totals': totals,
+        'nat_bytes_per_az': dict(sorted(nat_bytes.items())),
+        'talkers': talkers,
+        'packet_talkers': packet_talkers,
+        'rejected_flows': rejected_flows,
+    }
+
+
+def load_nat_enis(path):
+    """Return {ENI: private address} for the NAT gateways in `aws ec2 describe-nat-gateways` output."""
+    with open(path) as stream:
+        response = json.load(stream)
+    return {
+        address['NetworkInterfaceId']: address.get('PrivateIp')
+        for gateway in response.get('NatGateways', [])
+        for address in gateway.get('NatGatewayAddresses', [])
+        if address.get('NetworkInterfaceId')
+    }
+
+
+def parse_nat_eni(value):
+    """Return (ENI, private address) for an --nat-eni ENI=ADDRESS argument."""
+    eni, _, address = value.partition('=')
+    if not eni or not address:
+        raise Exception('[error] --nat-eni %s: give the NAT gateway private address as ENI=ADDRESS' % value)
+    return eni, address
+
+########################################################
+# 出力
+########################################################
+def report_json(result, top):
+    def rows(counter, count_name, extra_name):
+        return [
+            {'src': src, 'dst': dst, 'port': port, 'protocol': protocol,
+             count_name: count, 'error': error, extra_name: extra}
+            for (src, dst, port, protocol), count, error, extra in counter.top(top)
+        ]
+
+    return {
+        'totals': result['totals'],
+        'nat_bytes_per_az': result['nat_bytes_per_az'],
+        'top_bytes': rows(result['talkers'], 'bytes', 'packets'),
+        'top_packets': rows(result['packet_talkers'], 'packets', 'bytes'),
+        'top_rejected': rows(result['rejected_flows'], 'flows', 'bytes'),
+    }
+
+
+def print_report(report):
+    totals = report['totals']
+    print('%d flows, %s bytes, %d packets, %d rejected' % (
+        totals['records'], format(totals['bytes'], ','), totals['packets'], totals['rejected']))
+
+    print('\nNAT gateway bytes per AZ')
+    if not report['nat_bytes_per_az']:
+        print('  (none: pass --nat-eni or --nat-gateways)')
+    for az_id, size in report['nat_bytes_per_az'].items():
+        print('  %-14s %15s' % (az_id, format(size, ',')))
+
+    for title, rows, count_name, extra_name in (
+            ('Top talkers by bytes', report['top_bytes'], 'bytes', 'packets'),
+            ('Top talkers by packets', report['top_packets'], 'packets', 'bytes'),
+            ('Top rejected flows', report['top_rejected'], 'flows', 'bytes')):
+        print('\n%s' % title)
+        for row in rows:
+            print('  %-39s -> %-39s %5s/%-3s %15s %s=%s%s' % (
+                row['src'], row['dst'], row['port'], row['protocol'], format(row[count_name], ','),
+                extra_name, format(row[extra_name], ','), ' (±%s)' % format(row['error'], ',') if row['error'] else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help='flow log files or directories')
+    parser.add_argument('--nat-eni', action='append', default=[], metavar='ENI=ADDRESS',
+                        help='network interface and private address of a NAT gateway (repeatable)')
+    parser.add_argument('--nat-gateways', metavar='FILE', help='aws ec2 describe-nat-gateways output')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--capacity', type=int, default=CAPACITY, help='flows kept per counter')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    nat_enis = dict(parse_nat_eni(value) for value in args.nat_eni)
+    if args.nat_gateways:
+        nat_enis.update(load_nat_enis(args.nat_gateways))
+    result = analyze(iter_flow_logs(args.paths), nat_enis, max(args.capacity, args.top, 1))
+    report = report_json(result, args.top)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Benchmark per-rule vs bulk security-group ingress emission.
+
+Synthesizes DEMO-ALB-SG and DEMO-SERVICE-SG with N generated inbound rules
+each, once through add_ingress_rule per row and once through the bulk
+SecurityGroupIngress override, and checks that both templates match.
+
+    python -m tools.ingress_bench [--rules 10 100 1000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import aws_cdk as cdk
+from aws_cdk import aws_ec2 as _ec2
+
+from cdk_common.security_group import add_inbound
+
+SECURITY_GROUPS = ('DEMO-ALB-SG', 'DEMO-SERVICE-SG')
+
+
+def write_rules(path, count):
+    with open(path, 'w', encoding='utf_8') as fp:
+        fp.write('type,peer,description,port\n')
+        for i in range(count):
+            fp.write('ipv4,10.%d.%d.0/24,rule-%d,%d\n' % (i // 256 % 256, i % 256, i, 80 + i // 65536))
+
+
+def synth(path, bulk):
+    started = time.perf_counter()
+    app = cdk.App()
+    stack = cdk.Stack(app, 'IngressBench', env=cdk.Environment(account='123456789012', region='ap-northeast-1'))
+    vpc = _ec2.Vpc.from_vpc_attributes(
+        stack, 'Vpc',
+        vpc_id='vpc-00000000',
+        availability_zones=['ap-northeast-1a'],
+    )
+    for name in SECURITY_GROUPS:
+        security_group = _ec2.SecurityGroup(
+            stack, name,
+            vpc=vpc,
+            description=name,
+            security_group_name=name,
+        )
+        add_inbound(stack, path, security_group, bulk=bulk, compact=False, prefix_lists=False)
+    built = time.perf_counter()
+    assembly = app.synth()
+    synthesized = time.perf_counter()
+    template = assembly.get_stack_by_name('IngressBench').template
+    return built - started, synthesized - built, template
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print('%6s %-9s %10s %10s %10s' % ('rules', 'mode', 'build[s]', 'synth[s]', 'total[s]'))
+    with tempfile.TemporaryDirectory() as work_dir:
+        for count in args.rules:
+            path = os.path.join(work_dir, 'rules-%d.csv' % count)
+            write_rules(path, count)
+            templates = {}
+            for mode, bulk in (('per-rule', False), ('bulk', True)):
+                best = None
+                for _ in range(args.repeat):
+                    build, synthesized, template = synth(path, bulk)
+                    if best is None or build + synthesized < sum(best):
+                        best = (build, synthesized)
+                templates[mode] = template
+                print('%6d %-9s %10.3f %10.3f %10.3f' % (count, mode, best[0], best[1], sum(best)))
+            if json.dumps(templates['per-rule'], sort_keys=True) != json.dumps(templates['bulk'], sort_keys=True):
+                print('[error] templates differ for %d rules' % count)
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
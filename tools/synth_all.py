@@ -0,0 +1,93 @@
+"""Synthesize every CDK app in the repository in parallel.
+
+Each app's cdk.json "app" command runs in its own process, with the
+context the cdk CLI would pass. Its cloud assembly goes to
+OUTDIR/<app>, and its output goes to OUTDIR/<app>.log. When all apps
+finish, a timing and failure table is printed.
+
+    python -m tools.synth_all [APP ...] [--outdir synth.out] [--workers N]
+"""
+import argparse
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.apps import ROOT_DIR, app_command, select_apps, synth_environment, template_sizes
+
+
+def synth_app(app_dir, outdir, account_id=None, region=None):
+    name = os.path.basename(app_dir)
+    app_outdir = os.path.join(outdir, name)
+    shutil.rmtree(app_outdir, ignore_errors=True)
+    environment = synth_environment(app_dir, app_outdir, account_id, region)
+
+    command = shlex.split(app_command(app_dir))
+    if command and command[0] in ('python', 'python3'):
+        # ドライバと同じインタプリタ（仮想環境）で実行する
+        command[0] = sys.executable
+
+    started = time.perf_counter()
+    with open(os.path.join(outdir, name + '.log'), 'w', encoding='utf_8') as log:
+        returncode = subprocess.call(command, cwd=app_dir, env=environment,
+                                     stdout=log, stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - started
+
+    result = {'app': name, 'seconds': elapsed, 'returncode': returncode, 'outdir': app_outdir}
+    result['templates'] = template_sizes(app_outdir) if returncode == 0 else {}
+    if returncode != 0:
+        result['error'] = _last_line(os.path.join(outdir, name + '.log'))
+    return result
+
+
+def _last_line(path):
+    with open(path, encoding='utf_8', errors='replace') as fp:
+        lines = [line.strip() for line in fp if line.strip()]
+    return lines[-1] if lines else ''
+
+
+def synth_all(app_dirs, outdir, workers=None, account_id=None, region=None):
+    os.makedirs(outdir, exist_ok=True)
+    # 各ワーカーの待ち時間の大半はNode/JSIIの起動のため、スレッドから子プロセスを起動する
+    with ThreadPoolExecutor(max_workers=workers or min(len(app_dirs), os.cpu_count() or 1) or 1) as executor:
+        futures = [executor.submit(synth_app, app_dir, outdir, account_id, region) for app_dir in app_dirs]
+        return [future.result() for future in futures]
+
+
+def print_report(results, wall):
+    print('%-18s %-6s %8s %10s  %s' % ('app', 'status', 'time[s]', 'templates', 'output / error'))
+    for result in results:
+        if result['returncode'] == 0:
+            print('%-18s %-6s %8.2f %10d  %s' % (
+                result['app'], 'ok', result['seconds'], len(result['templates']), result['outdir']))
+        else:
+            print('%-18s %-6s %8.2f %10s  %s' % (
+                result['app'], 'FAILED', result['seconds'], '-', result['error']))
+    failed = sum(1 for result in results if result['returncode'] != 0)
+    print('%d apps, %d failed: wall %.2f s (sequential sum %.2f s, slowest %.2f s)' % (
+        len(results), failed, wall,
+        sum(result['seconds'] for result in results),
+        max((result['seconds'] for result in results), default=0)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('apps', nargs='*', help='app directory names (default: all)')
+    parser.add_argument('--outdir', default=os.path.join(ROOT_DIR, 'synth.out'))
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--account', help='ACCOUNT_ID for every app (default: from cdk.context.json)')
+    parser.add_argument('--region', help='REGION for every app (default: from cdk.context.json)')
+    args = parser.parse_args(argv)
+
+    app_dirs = select_apps(args.apps)
+    started = time.perf_counter()
+    results = synth_all(app_dirs, os.path.abspath(args.outdir), args.workers, args.account, args.region)
+    print_report(results, time.perf_counter() - started)
+    return 0 if all(result['returncode'] == 0 for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Synth benchmark for every CDK app in the repository.
+
+Each app is synthesized offline in a fresh process with the committed
+cdk.json / cdk.context.json context. The timings come from
+tools.synth_probe, peak RSS for both the Python and the Node (JSII)
+process, and the size of the templates written.
+
+Results are appended to a JSON-lines history file. The printed table
+shows the change against the previous run of the same app.
+
+    python -m tools.synth_bench [APP ...] [--repeat 3]
+    python -m tools.synth_bench --scale 10 100 1000
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tools.apps import ROOT_DIR, select_apps, synth_environment, template_sizes
+
+DEFAULT_HISTORY = os.path.join(ROOT_DIR, 'benchmarks', 'synth_history.jsonl')
+
+PHASES = ('python_import', 'jsii_startup', 'construct_build', 'synth')
+
+
+def run_probe(args, cwd, environment, work_dir):
+    result_path = os.path.join(work_dir, 'probe.json')
+    if os.path.exists(result_path):
+        os.remove(result_path)
+    environment = dict(environment)
+    environment['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, environment.get('PYTHONPATH')]))
+    # 計測のため合成キャッシュは使用しない
+    environment['CDK_SYNTH_CACHE'] = '0'
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-m', 'tools.synth_probe', '--result', result_path] + args,
+        cwd=cwd, env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    wall = time.perf_counter() - started
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        error = (completed.stderr.strip().splitlines() or ['exit code %d' % completed.returncode])[-1]
+        return {'status': 'error', 'error': error, 'wall': wall}
+    with open(result_path, encoding='utf_8') as fp:
+        result = json.load(fp)
+    result.update({'status': 'ok', 'wall': wall})
+    return result
+
+
+def best_of(runs):
+    ok = [run for run in runs if run['status'] == 'ok']
+    if not ok:
+        return runs[-1]
+    result = min(ok, key=lambda run: run['wall'])
+    result = dict(result)
+    result['wall_median'] = statistics.median(run['wall'] for run in ok)
+    return result
+
+
+def bench_apps(app_dirs, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for app_dir in app_dirs:
+            name = os.path.basename(app_dir)
+            outdir = os.path.join(work_dir, name + '.out')
+            environment = synth_environment(app_dir, outdir)
+            runs = [run_probe([app_dir], app_dir, environment, work_dir) for _ in range(repeat)]
+            result = best_of(runs)
+            if result['status'] == 'ok':
+                sizes = template_sizes(outdir)
+                result['templates'] = sizes
+                result['template_bytes'] = sum(sizes.values())
+            results[name] = result
+    return results
+
+
+def bench_scale(counts, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        environment = synth_environment(os.path.join(ROOT_DIR, 'vpc_v2'), os.path.join(work_dir, 'scale.out'))
+        for count in counts:
+            runs = [run_probe(['--scale', str(count)], ROOT_DIR, environment, work_dir) for _ in range(repeat)]
+            results['scale-%d' % count] = best_of(runs)
+    return results
+
+########################################################
+# 履歴
+########################################################
+def load_previous(history_path):
+    previous = {}
+    if not os.path.isfile(history_path):
+        return previous
+    with open(history_path, encoding='utf_8') as fp:
+        for line in fp:
+            if line.strip():
+                entry = json.loads(line)
+                previous.update({name: result for name, result in entry['results'].items()
+                                 if result.get('status') == 'ok'})
+    return previous
+
+
+def append_history(history_path, results):
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    entry = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    with open(history_path, 'a', encoding='utf_8') as fp:
+        fp.write(json.dumps(entry, sort_keys=True) + '\n')
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+########################################################
+# 出力
+########################################################
+def print_table(results, previous):
+    print('%-18s %7s %7s %7s %7s %7s %7s %8s %8s %9s' % (
+        'app', 'import', 'jsii', 'build', 'synth', 'wall', 'delta', 'py[MB]', 'node[MB]', 'tmpl[KB]'))
+    for name, result in results.items():
+        if result['status'] != 'ok':
+            print('%-18s %s: %s' % (name, result['status'], result['error']))
+            continue
+        before = previous.get(name)
+        delta = '%+6.1f%%' % ((result['wall'] / before['wall'] - 1) * 100) if before else '-'
+        print('%-18s %7.2f %7.2f %7.2f %7.2f %7.2f %7s %8.1f %8s %9s' % (
+            name,
+            *(result[phase] for phase in PHASES),
+            result['wall'],
+            delta,
+            result['python_peak_rss_kb'] / 1024,
+            '%.1f' % (result['node_peak_rss_kb'] / 1024) if result.get('node_peak_rss_kb') else '-',
+            '%.1f' % (result['template_bytes'] / 1024) if 'template_bytes' in result else '-',
+        ))
+
+
+def print_scale(results):
+    # 1単位あたりの時間が増え続ける点が線形にスケールしなくなる点
+    print('%-12s %9s %9s %14s' % ('size', 'build[s]', 'synth[s]', 'per-unit[ms]'))
+    for name, result in results.items():
+        if result['status'] != 'ok':
+            print('%-12s %s: %s' % (name, result['status'], result['error']))
+            continue
+        count = int(name.split('-')[1])
+        per_unit = (result['construct_build'] + result['synth']) / count * 1000
+        print('%-12s %9.2f %9.2f %14.2f' % (name, result['construct_build'], result['synth'], per_unit))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('apps', nargs='*', help='app directory names (default: all)')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--scale', type=int, nargs='+', metavar='N',
+                        help='benchmark a generated app with N subnets, N rules and N services')
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    parser.add_argument('--no-history', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.scale:
+        results = bench_scale(args.scale, args.repeat)
+        print_scale(results)
+    else:
+        results = bench_apps(select_apps(args.apps), args.repeat)
+        print_table(results, load_previous(args.history))
+    if not args.no_history:
+        append_history(args.history, results)
+    return 0 if all(result['status'] == 'ok' for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Show or clear synth cache entries (cdk_common.synth_cache).
+
+    python -m tools.synth_cache list
+    python -m tools.synth_cache clear [--app APP]
+    python -m tools.synth_cache prune [--max-mb N]
+"""
+import argparse
+import datetime
+import sys
+
+from cdk_common import synth_cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    clear_parser = subparsers.add_parser('clear')
+    clear_parser.add_argument('--app', help='only entries of this app')
+    prune_parser = subparsers.add_parser('prune')
+    prune_parser.add_argument('--max-mb', type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        entries = synth_cache.entries()
+        print('%-14s %-18s %10s  %s' % ('key', 'app', 'size[KB]', 'last used'))
+        for entry in entries:
+            print('%-14s %-18s %10.1f  %s' % (
+                entry['key'][:12], entry['app'], entry['bytes'] / 1024,
+                datetime.datetime.fromtimestamp(entry['last_used']).isoformat(sep=' ', timespec='seconds')))
+        print('%d entries, %.1f KB in %s' % (
+            len(entries), sum(entry['bytes'] for entry in entries) / 1024, synth_cache.CACHE_DIR))
+    elif args.command == 'clear':
+        removed = synth_cache.clear(args.app)
+        print('removed %d entries' % len(removed))
+    else:
+        limit = args.max_mb * 1024 * 1024 if args.max_mb is not None else synth_cache.max_bytes()
+        removed = synth_cache.evict(limit)
+        print('removed %d entries' % len(removed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Time one CDK app synth inside a fresh Python process.
+
+Run by tools.synth_bench with the app directory as the working directory
+and CDK_CONTEXT_JSON/CDK_OUTDIR set. Phases (seconds):
+
+    python_import    import of jsii and of the app's own modules
+    jsii_startup     Node process spawn and assembly loads (constructs,
+                     aws-cdk-lib)
+    construct_build  from cdk.App() until app.synth() is called
+    synth            app.synth()
+
+    python -m tools.synth_probe --result out.json [APP_DIR | --scale N]
+"""
+import argparse
+import json
+import os
+import resource
+import runpy
+import sys
+import tempfile
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('app_dir', nargs='?', default='.')
+    parser.add_argument('--scale', type=int, metavar='N', help='synthesize a generated app of size N')
+    parser.add_argument('--result', required=True)
+    args = parser.parse_args(argv)
+
+    marks = {'start': time.perf_counter()}
+    import jsii  # noqa: F401
+    marks['jsii_imported'] = time.perf_counter()
+    import constructs  # noqa: F401
+    marks['constructs_loaded'] = time.perf_counter()
+    App = _import_app_class()
+    marks['cdk_loaded'] = time.perf_counter()
+
+    _instrument_app(App, marks)
+    if args.scale:
+        _run_scale_app(args.scale)
+    else:
+        app_path = os.path.join(os.path.abspath(args.app_dir), 'app.py')
+        sys.path.insert(0, os.path.dirname(app_path))
+        sys.argv = [app_path]
+        runpy.run_path(app_path, run_name='__main__')
+
+    result = {
+        'python_import': (marks['jsii_imported'] - marks['start'])
+                         + (marks.get('app_created', marks['cdk_loaded']) - marks['cdk_loaded']),
+        'jsii_startup': marks['cdk_loaded'] - marks['jsii_imported'],
+        'construct_build': marks['synth_started'] - marks['app_created'],
+        'synth': marks['synth_finished'] - marks['synth_started'],
+        'python_peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'node_peak_rss_kb': _node_peak_rss_kb(),
+    }
+    with open(args.result, 'w', encoding='utf_8') as fp:
+        json.dump(result, fp)
+    return 0
+
+
+def _import_app_class():
+    try:
+        from aws_cdk import App
+    except ImportError:
+        # CDK v1（vpc / alb / ecs）
+        from aws_cdk.core import App
+    return App
+
+
+def _instrument_app(App, marks):
+    original_init = App.__init__
+    original_synth = App.synth
+
+    def __init__(self, *args, **kwargs):
+        marks.setdefault('app_created', time.perf_counter())
+        original_init(self, *args, **kwargs)
+
+    def synth(self, *args, **kwargs):
+        marks['synth_started'] = time.perf_counter()
+        try:
+            return original_synth(self, *args, **kwargs)
+        finally:
+            marks['synth_finished'] = time.perf_counter()
+
+    App.__init__ = __init__
+    App.synth = synth
+
+
+def _node_peak_rss_kb():
+    try:
+        from jsii._runtime import kernel
+        pid = kernel.provider._process._process.pid
+        with open('/proc/%d/status' % pid, encoding='utf_8') as fp:
+            for line in fp:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (AttributeError, ImportError, OSError):
+        pass
+    return None
+
+########################################################
+# スケール計測用アプリ（サブネットN個・ルールN件・サービスN個）
+########################################################
+def _run_scale_app(count):
+    import aws_cdk as cdk
+    from aws_cdk import aws_ec2 as _ec2, aws_ecs as _ecs
+
+    from cdk_common.security_group import add_inbound
+
+    app = cdk.App()
+    stack = cdk.Stack(app, 'ScaleStack', env=cdk.Environment(
+        account=os.environ.get('ACCOUNT_ID'), region=os.environ.get('REGION')))
+
+    # サブネット
+    cfn_vpc = _ec2.CfnVPC(stack, 'CfnVPC', cidr_block='10.0.0.0/8')
+    for i in range(count):
+        _ec2.CfnSubnet(
+            stack, 'Subnet%d' % i,
+            vpc_id=cfn_vpc.ref,
+            cidr_block='10.%d.%d.0/24' % (i // 256 % 256, i % 256),
+            availability_zone=('ap-northeast-1a', 'ap-northeast-1c')[i % 2],
+        )
+
+    # セキュリティグループ（ルールN件）
+    vpc = _ec2.Vpc.from_vpc_attributes(
+        stack, 'Vpc',
+        vpc_id='vpc-00000000',
+        availability_zones=['ap-northeast-1a', 'ap-northeast-1c'],
+        private_subnet_ids=['subnet-00000000', 'subnet-11111111'],
+    )
+    security_group = _ec2.SecurityGroup(stack, 'DEMO-SERVICE-SG', vpc=vpc)
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'service.csv')
+        with open(path, 'w', encoding='utf_8') as fp:
+            fp.write('type,peer,description,port\n')
+            for i in range(count):
+                fp.write('ipv4,10.%d.%d.0/24,-,80\n' % (i // 128 % 256, i % 128 * 2))
+        add_inbound(stack, path, security_group, compact=False, prefix_lists=False)
+
+    # ECSサービス（N個）
+    cluster = _ecs.Cluster(stack, 'Cluster', vpc=vpc)
+    task_def = _ecs.FargateTaskDefinition(stack, 'TaskDefinition')
+    task_def.add_container('Container', image=_ecs.ContainerImage.from_registry('public.ecr.aws/nginx/nginx'))
+    for i in range(count):
+        _ecs.FargateService(
+            stack, 'Service%d' % i,
+            cluster=cluster,
+            task_definition=task_def,
+            security_groups=[security_group],
+        )
+
+    app.synth()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
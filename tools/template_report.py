@@ -0,0 +1,262 @@
+"""Template size and resource-count report for synthesized stacks.
+
+Reads every *.template.json under the given cloud assembly directories
+(default: synth.out/* written by tools.synth_all) and reports, per
+template: bytes and resources per construct subtree (e.g. Alb,
+DEMO-SERVICE-SG, Pipeline), the largest properties, and the bytes spent
+on CDK metadata. Exits 1 when a budget is exceeded.
+
+Each template is read once and scanned once: member sizes are the byte
+spans of the JSON text, so nothing is re-serialized.
+
+    python -m tools.template_report [DIR ...] [--max-bytes 51200] [--max-resources 500]
+        [--budget Pipeline=20000 ...] [--depth 1] [--top 5] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from tools.apps import ROOT_DIR
+
+# テンプレート本文を直接渡せる上限（超えるとS3経由）
+MAX_BYTES = 51200
+# 1スタックあたりのリソース数上限
+MAX_RESOURCES = 500
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+########################################################
+# 走査
+########################################################
+def _skip(text, index):
+    return _WHITESPACE.match(text, index).end()
+
+
+def _scan_object(text, index, member):
+    """Scan the object at text[index]; member(key, key_start, value_start) returns the value end."""
+    index = _skip(text, index)
+    if text[index] != '{':
+        raise ValueError('object expected at %d' % index)
+    index = _skip(text, index + 1)
+    if text[index] == '}':
+        return index + 1
+    while True:
+        key_start = index
+        key, index = _decoder.raw_decode(text, index)
+        index = _skip(text, index)
+        if text[index] != ':':
+            raise ValueError('":" expected at %d' % index)
+        index = member(key, key_start, _skip(text, index + 1))
+        index = _skip(text, index)
+        if text[index] == ',':
+            index = _skip(text, index + 1)
+        elif text[index] == '}':
+            return index + 1
+        else:
+            raise ValueError('"," or "}" expected at %d' % index)
+
+
+def _skip_value(text, index):
+    return _decoder.raw_decode(text, index)[1]
+
+
+def scan_template(text):
+    """Return sections and resources of a template with their byte sizes.
+
+    resources: logical id -> {type, bytes, metadata_bytes, path, properties: {name: bytes}}
+    """
+    sections = {}
+    resources = {}
+
+    def resource_member(resource):
+        def member(key, key_start, start):
+            if key == 'Properties':
+                properties = resource['properties']
+
+                def property_member(name, name_start, value_start):
+                    end = _skip_value(text, value_start)
+                    properties[name] = len(text[name_start:end].encode('utf_8'))
+                    return end
+                return _scan_object(text, start, property_member)
+            value, end = _decoder.raw_decode(text, start)
+            if key == 'Type':
+                resource['type'] = value
+            elif key == 'Metadata':
+                resource['metadata_bytes'] = len(text[key_start:end].encode('utf_8'))
+                if isinstance(value, dict):
+                    resource['path'] = value.get('aws:cdk:path')
+            return end
+        return member
+
+    def resources_member(logical_id, key_start, start):
+        resource = {'type': None, 'metadata_bytes': 0, 'path': None, 'properties': {}}
+        end = _scan_object(text, start, resource_member(resource))
+        resource['bytes'] = len(text[key_start:end].encode('utf_8'))
+        resources[logical_id] = resource
+        return end
+
+    def top_member(key, key_start, start):
+        if key == 'Resources':
+            end = _scan_object(text, start, resources_member)
+        else:
+            end = _skip_value(text, start)
+        sections[key] = len(text[key_start:end].encode('utf_8'))
+        return end
+
+    _scan_object(text, 0, top_member)
+    return sections, resources
+
+########################################################
+# 集計
+########################################################
+def manifest_paths(assembly_dir):
+    """Return template file -> (stack path, {logical id: construct path}) from manifest.json."""
+    result = {}
+    path = os.path.join(assembly_dir, 'manifest.json')
+    if not os.path.isfile(path):
+        return result
+    with open(path, encoding='utf_8') as fp:
+        manifest = json.load(fp)
+    for name, artifact in manifest.get('artifacts', {}).items():
+        if artifact.get('type') != 'aws:cloudformation:stack':
+            continue
+        template_file = artifact.get('properties', {}).get('templateFile')
+        logical_paths = {}
+        for construct_path, entries in artifact.get('metadata', {}).items():
+            for entry in entries:
+                if entry.get('type') == 'aws:cdk:logicalId':
+                    logical_paths[entry['data']] = construct_path
+        result[template_file] = (artifact.get('displayName', name), logical_paths)
+    return result
+
+
+def subtree(construct_path, stack_path, depth):
+    parts = [part for part in (construct_path or '').split('/') if part]
+    stack_parts = [part for part in stack_path.split('/') if part]
+    if parts[:len(stack_parts)] == stack_parts:
+        parts = parts[len(stack_parts):]
+    return '/'.join(parts[:depth]) if parts else None
+
+
+def analyze_template(path, stack_path=None, logical_paths=None, depth=1, top=5):
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    sections, resources = scan_template(data.decode('utf_8'))
+    stack_path = stack_path or os.path.basename(path)[:-len('.template.json')]
+    logical_paths = logical_paths or {}
+
+    subtrees = {}
+    largest = []
+    metadata_bytes = 0
+    for logical_id, resource in resources.items():
+        if resource['type'] == 'AWS::CDK::Metadata':
+            metadata_bytes += resource['bytes']
+            continue
+        metadata_bytes += resource['metadata_bytes']
+        name = subtree(resource['path'] or logical_paths.get(logical_id), stack_path, depth) or logical_id
+        entry = subtrees.setdefault(name, {'bytes': 0, 'resources': 0})
+        entry['bytes'] += resource['bytes']
+        entry['resources'] += 1
+        largest.extend((size, logical_id, name) for name, size in resource['properties'].items())
+    largest.sort(reverse=True)
+
+    return {
+        'template': os.path.basename(path),
+        'bytes': len(data),
+        'resources': len(resources),
+        'sections': sections,
+        'metadata_bytes': metadata_bytes,
+        'subtrees': dict(sorted(subtrees.items(), key=lambda item: -item[1]['bytes'])),
+        'largest_properties': [{'resource': logical_id, 'property': name, 'bytes': size}
+                               for size, logical_id, name in largest[:top]],
+    }
+
+
+def analyze_assembly(assembly_dir, depth=1, top=5):
+    paths = manifest_paths(assembly_dir)
+    reports = []
+    for filename in sorted(os.listdir(assembly_dir)):
+        if filename.endswith('.template.json'):
+            stack_path, logical_paths = paths.get(filename, (None, None))
+            reports.append(analyze_template(os.path.join(assembly_dir, filename), stack_path, logical_paths,
+                                            depth, top))
+    return reports
+
+
+def budget_violations(report, max_bytes=MAX_BYTES, max_resources=MAX_RESOURCES, budgets=None):
+    violations = []
+    if max_bytes is not None and report['bytes'] > max_bytes:
+        violations.append('%s: %d bytes > %d' % (report['template'], report['bytes'], max_bytes))
+    if max_resources is not None and report['resources'] > max_resources:
+        violations.append('%s: %d resources > %d' % (report['template'], report['resources'], max_resources))
+    for name, limit in (budgets or {}).items():
+        size = report['subtrees'].get(name, {}).get('bytes', 0)
+        if size > limit:
+            violations.append('%s: %s %d bytes > %d' % (report['template'], name, size, limit))
+    return violations
+
+########################################################
+# 出力
+########################################################
+def print_report(report):
+    print('%s  %.1f KB, %d resources, metadata %.1f KB' % (
+        report['template'], report['bytes'] / 1024, report['resources'], report['metadata_bytes'] / 1024))
+    for name, entry in report['subtrees'].items():
+        print('  %-40s %9.1f KB %5d' % (name, entry['bytes'] / 1024, entry['resources']))
+    for entry in report['largest_properties']:
+        print('  largest: %s.%s %.1f KB' % (entry['resource'], entry['property'], entry['bytes'] / 1024))
+
+
+def _budget(value):
+    name, _, size = value.rpartition('=')
+    if not name or not size.isdigit():
+        raise argparse.ArgumentTypeError('expected SUBTREE=BYTES: %s' % value)
+    return name, int(size)
+
+
+def default_dirs():
+    outdir = os.path.join(ROOT_DIR, 'synth.out')
+    if not os.path.isdir(outdir):
+        return []
+    return [os.path.join(outdir, name) for name in sorted(os.listdir(outdir))
+            if os.path.isfile(os.path.join(outdir, name, 'manifest.json'))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('dirs', nargs='*', help='cloud assembly directories (default: synth.out/*)')
+    parser.add_argument('--max-bytes', type=int, default=MAX_BYTES)
+    parser.add_argument('--max-resources', type=int, default=MAX_RESOURCES)
+    parser.add_argument('--budget', type=_budget, action='append', default=[], metavar='SUBTREE=BYTES')
+    parser.add_argument('--depth', type=int, default=1, help='construct path depth of a subtree')
+    parser.add_argument('--top', type=int, default=5, help='number of largest properties')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    dirs = args.dirs or default_dirs()
+    if not dirs:
+        parser.error('no cloud assembly found; run tools.synth_all first or pass a cdk.out directory')
+    budgets = dict(args.budget)
+    reports = []
+    violations = []
+    for assembly_dir in dirs:
+        for report in analyze_assembly(assembly_dir, args.depth, args.top):
+            report['assembly'] = assembly_dir
+            reports.append(report)
+            violations += budget_violations(report, args.max_bytes, args.max_resources, budgets)
+
+    if args.json:
+        print(json.dumps({'reports': reports, 'violations': violations}, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+        for violation in violations:
+            print('[error] budget exceeded: %s' % violation)
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
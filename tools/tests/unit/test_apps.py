@@ -0,0 +1,31 @@
+import json
+import os
+
+from tools.apps import (
+    ROOT_DIR,
+    app_context,
+    default_account_region,
+    discover_apps,
+    synth_environment,
+)
+
+
+def test_discover_apps():
+    names = [os.path.basename(app_dir) for app_dir in discover_apps()]
+    assert {'vpc', 'vpc_v2', 'alb', 'alb_v2', 'ecs', 'ecs_v2', 'codepipeline_v2', 'demo_v2'} <= set(names)
+    assert 'cdk_common' not in names
+
+
+def test_context_merges_lookups():
+    context = app_context(os.path.join(ROOT_DIR, 'alb_v2'))
+    assert context['@aws-cdk/core:stackRelativeExports'] is True
+    assert any(key.startswith('vpc-provider:') for key in context)
+    assert default_account_region(context) == ('304102470960', 'ap-northeast-1')
+
+
+def test_synth_environment():
+    environment = synth_environment(os.path.join(ROOT_DIR, 'vpc_v2'), '/tmp/out', base={})
+    assert environment['ACCOUNT_ID'] == '123456789012'
+    assert environment['REGION'] == 'ap-northeast-1'
+    assert environment['CDK_OUTDIR'] == '/tmp/out'
+    assert '@aws-cdk/core:stackRelativeExports' in json.loads(environment['CDK_CONTEXT_JSON'])
@@ -0,0 +1,73 @@
+import gzip
+
+from cdk_common.flow_logs import LOG_FORMAT, load_options
+from tools.flow_log_report import TopCounter, analyze, iter_flow_logs, load_nat_enis, main, report_json
+
+HEADER = LOG_FORMAT.replace('${', '').replace('}', '')
+
+LINES = [
+    'apne1-az4 eni-nat 10.5.5.10 52.1.1.1 443 6 10 5000 ACCEPT',
+    'apne1-az4 eni-nat 10.5.5.10 52.1.1.1 443 6 20 7000 ACCEPT',
+    'apne1-az1 eni-task 10.5.5.70 10.5.5.10 8080 6 4 400 ACCEPT',
+    'apne1-az1 eni-task 198.51.100.7 10.5.5.70 22 6 1 40 REJECT',
+    'apne1-az1 eni-task - - - - - - -',
+]
+
+
+def write_log(path, lines):
+    with gzip.open(str(path), 'wt') as stream:
+        stream.write('\n'.join([HEADER] + lines) + '\n')
+
+
+def test_analyze_directory(tmp_path):
+    (tmp_path / 'a').mkdir()
+    write_log(tmp_path / 'a' / '1.log.gz', LINES[:2])
+    write_log(tmp_path / 'a' / '2.log.gz', LINES[2:])
+    (tmp_path / 'a' / 'ignored.txt').write_text('x')
+
+    report = report_json(analyze(iter_flow_logs([str(tmp_path)]), {'eni-nat': '10.5.0.100'}), top=5)
+    assert report['totals'] == {'records': 4, 'bytes': 12440, 'packets': 35, 'rejected': 1, 'rejected_bytes': 40}
+    assert report['nat_bytes_per_az'] == {'apne1-az4': 12000}
+    assert report['top_bytes'][0] == {
+        'src': '10.5.5.10', 'dst': '52.1.1.1', 'port': '443', 'protocol': '6', 'bytes': 12000, 'error': 0, 'packets': 30}
+    assert [row['port'] for row in report['top_rejected']] == ['22']
+
+
+def test_top_counter_is_bounded():
+    counter = TopCounter(capacity=2)
+    for index in range(100):
+        counter.add(index, 1)
+        counter.add('heavy', 10)
+    assert len(counter.counts) <= 4
+    key, count, error, _ = counter.top(1)[0]
+    assert key == 'heavy' and count - error <= 1000 <= count
+
+
+def test_main_json(tmp_path, capsys):
+    write_log(tmp_path / '1.log.gz', LINES)
+    assert main([str(tmp_path), '--nat-eni', 'eni-nat=10.5.0.100', '--json']) == 0
+    assert '"apne1-az4": 12000' in capsys.readouterr().out
+
+
+def test_nat_bytes_count_each_flow_once(tmp_path):
+    # 同じ通信がNATゲートウェイのENIに2回記録される（インスタンス側とNATゲートウェイのアドレスへの変換後）
+    paired = [
+        'apne1-az4 eni-nat 10.5.5.10 52.1.1.1 443 6 10 5000 ACCEPT',
+        'apne1-az4 eni-nat 10.5.0.100 52.1.1.1 443 6 10 5000 ACCEPT',
+        'apne1-az4 eni-nat 52.1.1.1 10.5.0.100 40000 6 8 9000 ACCEPT',
+        'apne1-az4 eni-nat 52.1.1.1 10.5.5.10 40000 6 8 9000 ACCEPT',
+    ]
+    write_log(tmp_path / '1.log.gz', paired)
+    (tmp_path / 'nat-gateways.json').write_text(
+        '{"NatGateways": [{"NatGatewayAddresses": [{"NetworkInterfaceId": "eni-nat", "PrivateIp": "10.5.0.100"}]}]}')
+
+    nat_enis = load_nat_enis(str(tmp_path / 'nat-gateways.json'))
+    assert nat_enis == {'eni-nat': '10.5.0.100'}
+    result = analyze(iter_flow_logs([str(tmp_path / '1.log.gz')]), nat_enis)
+    assert result['nat_bytes_per_az'] == {'apne1-az4': 14000}
+
+
+def test_load_options():
+    assert load_options(False) is None
+    assert load_options(True)['traffic_type'] == 'ALL'
+    assert load_options({'traffic_type': 'REJECT'})['aggregation_interval'] == 600
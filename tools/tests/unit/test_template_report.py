@@ -0,0 +1,46 @@
+import json
+
+from tools.template_report import analyze_template, budget_violations, scan_template
+
+TEMPLATE = {
+    'Resources': {
+        'AlbSG': {
+            'Type': 'AWS::EC2::SecurityGroup',
+            'Properties': {'GroupDescription': 'ALB', 'SecurityGroupIngress': [{'CidrIp': '0.0.0.0/0'}] * 20},
+            'Metadata': {'aws:cdk:path': 'DemoStack/Alb/SecurityGroup/Resource'},
+        },
+        'Alb': {
+            'Type': 'AWS::ElasticLoadBalancingV2::LoadBalancer',
+            'Properties': {'Name': 'DEMO-ALB'},
+            'Metadata': {'aws:cdk:path': 'DemoStack/Alb/Resource'},
+        },
+        'Bucket': {'Type': 'AWS::S3::Bucket'},
+        'CDKMetadata': {'Type': 'AWS::CDK::Metadata', 'Properties': {'Analytics': 'v2:deflate64:xyz'}},
+    },
+    'Parameters': {'BootstrapVersion': {'Type': 'AWS::SSM::Parameter::Value<String>'}},
+}
+
+
+def test_scan_template_spans():
+    text = json.dumps(TEMPLATE, indent=1)
+    sections, resources = scan_template(text)
+    assert sorted(sections) == ['Parameters', 'Resources']
+    assert resources['Alb']['type'] == 'AWS::ElasticLoadBalancingV2::LoadBalancer'
+    assert resources['Alb']['path'] == 'DemoStack/Alb/Resource'
+    assert resources['Alb']['properties'] == {'Name': len('"Name": "DEMO-ALB"')}
+    assert resources['Bucket']['bytes'] == len('"Bucket": {\n   "Type": "AWS::S3::Bucket"\n  }')
+
+
+def test_analyze_template(tmp_path):
+    path = tmp_path / 'DemoStack.template.json'
+    path.write_text(json.dumps(TEMPLATE, indent=1))
+    report = analyze_template(str(path), logical_paths={'Bucket': '/DemoStack/Bucket/Resource'})
+
+    assert report['resources'] == 4
+    assert list(report['subtrees']) == ['Alb', 'Bucket']
+    assert report['subtrees']['Alb']['resources'] == 2
+    assert report['largest_properties'][0]['property'] == 'SecurityGroupIngress'
+    assert report['metadata_bytes'] > 0
+
+    assert budget_violations(report) == []
+    assert len(budget_violations(report, max_bytes=100, max_resources=3, budgets={'Alb': 10, 'Bucket': 10000})) == 3
@@ -0,0 +1,72 @@
+import json
+import os
+
+from tools.apps import ROOT_DIR
+from tools.vpc_context import (
+    consuming_apps,
+    context_key,
+    stale_keys,
+    update_app_context,
+    vpc_context,
+)
+
+
+def _resource(type, **properties):
+    return {'Type': type, 'Properties': properties}
+
+
+TEMPLATE = {'Resources': {
+    'Vpc': _resource('AWS::EC2::VPC', CidrBlock='10.0.0.0/24', Tags=[{'Key': 'Name', 'Value': 'DEMO-VPC'}]),
+    'PublicC': _resource('AWS::EC2::Subnet', CidrBlock='10.0.0.192/26', VpcId={'Ref': 'Vpc'}, AvailabilityZone='az-c'),
+    'PublicA': _resource('AWS::EC2::Subnet', CidrBlock='10.0.0.128/26', VpcId={'Ref': 'Vpc'}, AvailabilityZone='az-a'),
+    'PrivateA': _resource('AWS::EC2::Subnet', CidrBlock='10.0.0.0/26', VpcId={'Ref': 'Vpc'}, AvailabilityZone='az-a'),
+    'PublicTable': _resource('AWS::EC2::RouteTable', VpcId={'Ref': 'Vpc'}),
+    'PrivateTable': _resource('AWS::EC2::RouteTable', VpcId={'Ref': 'Vpc'}),
+    'PublicRoute': _resource('AWS::EC2::Route', RouteTableId={'Ref': 'PublicTable'},
+                             DestinationCidrBlock='0.0.0.0/0', GatewayId={'Ref': 'Igw'}),
+    'PrivateRoute': _resource('AWS::EC2::Route', RouteTableId={'Ref': 'PrivateTable'},
+                              DestinationCidrBlock='0.0.0.0/0', NatGatewayId={'Ref': 'Nat'}),
+    'AssocPublicA': _resource('AWS::EC2::SubnetRouteTableAssociation',
+                              SubnetId={'Ref': 'PublicA'}, RouteTableId={'Ref': 'PublicTable'}),
+    'AssocPublicC': _resource('AWS::EC2::SubnetRouteTableAssociation',
+                              SubnetId={'Ref': 'PublicC'}, RouteTableId={'Ref': 'PublicTable'}),
+    'AssocPrivateA': _resource('AWS::EC2::SubnetRouteTableAssociation',
+                               SubnetId={'Ref': 'PrivateA'}, RouteTableId={'Ref': 'PrivateTable'}),
+}}
+
+IDS = {'Vpc': 'vpc-1', 'PublicA': 'subnet-pa', 'PublicC': 'subnet-pc', 'PrivateA': 'subnet-a',
+       'PublicTable': 'rtb-public', 'PrivateTable': 'rtb-private'}
+
+
+def test_vpc_context():
+    response, missing = vpc_context(TEMPLATE, 'DEMO-VPC', IDS)
+    assert missing == []
+    assert response['vpcId'] == 'vpc-1'
+    assert [group['name'] for group in response['subnetGroups']] == ['Private', 'Public']
+    public = response['subnetGroups'][1]['subnets']
+    assert [subnet['subnetId'] for subnet in public] == ['subnet-pa', 'subnet-pc']
+    assert public[0] == {'subnetId': 'subnet-pa', 'cidr': '10.0.0.128/26',
+                         'availabilityZone': 'az-a', 'routeTableId': 'rtb-public'}
+
+    _, missing = vpc_context(TEMPLATE, 'DEMO-VPC', {key: value for key, value in IDS.items() if key != 'PrivateTable'})
+    assert missing == ['PrivateTable']
+
+
+def test_update_app_context(tmp_path):
+    response, _ = vpc_context(TEMPLATE, 'DEMO-VPC', IDS)
+    key = context_key('111111111111', 'ap-northeast-1', 'DEMO-VPC')
+    old_key = context_key('222222222222', 'ap-northeast-1', 'DEMO-VPC')
+    (tmp_path / 'cdk.context.json').write_text(json.dumps({old_key: {}}))
+
+    assert update_app_context(str(tmp_path), key, response, write=False) == 'missing'
+    assert update_app_context(str(tmp_path), key, response) == 'missing'
+    assert update_app_context(str(tmp_path), key, response) == 'ok'
+    assert update_app_context(str(tmp_path), key, dict(response, vpcId='vpc-2')) == 'stale'
+    assert stale_keys(str(tmp_path), key, 'DEMO-VPC') == [old_key]
+    assert (tmp_path / 'cdk.context.json').read_text().endswith('}\n')
+
+
+def test_consuming_apps():
+    names = [os.path.basename(app_dir) for app_dir in consuming_apps('DEMO-VPC', ROOT_DIR)]
+    assert {'alb_v2', 'ecs_v2'} <= set(names)
+    assert 'vpc_v2' not in names
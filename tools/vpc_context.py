@@ -0,0 +1,209 @@
+"""Write vpc-provider lookup context from the VpcV2Stack template.
+
+Vpc.from_lookup(vpc_name=...) in the ALB/ECS apps needs a "vpc-provider:"
+entry in cdk.context.json, or synth has to call AWS. This tool derives the
+entry from the synthesized VPC template (CIDRs, AZs, subnet types, route
+table associations) and a local file of deployed physical IDs. It writes
+the entry into every app that looks the VPC up, in one pass.
+
+The IDs file is either the output of
+`aws cloudformation describe-stack-resources --stack-name VpcV2Stack`
+or a plain {"<logical id>": "<physical id>"} object.
+
+    python -m tools.vpc_context --template synth.out/vpc_v2/VpcV2Stack.template.json \\
+        --resources vpc-ids.json [--account 123456789012 --region ap-northeast-1] [--check]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from tools.apps import ROOT_DIR, discover_apps
+
+_LOOKUP_PATTERN = re.compile(r"Vpc\.from_lookup\([^)]*?vpc_name\s*=\s*['\"]([^'\"]+)['\"]", re.S)
+
+DEFAULT_TEMPLATE = os.path.join(ROOT_DIR, 'synth.out', 'vpc_v2', 'VpcV2Stack.template.json')
+
+
+def context_key(account_id, region, vpc_name):
+    return 'vpc-provider:account=%s:filter.tag:Name=%s:region=%s:returnAsymmetricSubnets=true' % (
+        account_id, vpc_name, region)
+
+########################################################
+# 物理IDファイル読込
+########################################################
+def load_physical_ids(path):
+    with open(path, encoding='utf_8') as fp:
+        data = json.load(fp)
+    if isinstance(data, dict) and 'StackResources' in data:
+        return {resource['LogicalResourceId']: resource['PhysicalResourceId'] for resource in data['StackResources']}
+    return dict(data)
+
+########################################################
+# テンプレートからvpc-providerレスポンスを作成
+########################################################
+def _ref(value):
+    if isinstance(value, dict) and 'Ref' in value:
+        return value['Ref']
+    return None
+
+
+def _name_tag(properties):
+    for tag in properties.get('Tags', []):
+        if tag.get('Key') == 'Name':
+            return tag.get('Value')
+    return None
+
+
+def vpc_context(template, vpc_name, physical_ids):
+    """Return (response, missing logical ids) for the VPC tagged vpc_name."""
+    resources = template.get('Resources', {})
+    by_type = {}
+    for logical_id, resource in resources.items():
+        by_type.setdefault(resource.get('Type'), []).append((logical_id, resource.get('Properties', {})))
+
+    vpc_id = None
+    for logical_id, properties in by_type.get('AWS::EC2::VPC', []):
+        if _name_tag(properties) == vpc_name:
+            vpc_id, vpc_properties = logical_id, properties
+            break
+    if vpc_id is None:
+        raise Exception('[error] VPC tagged Name=%s not found in template' % vpc_name)
+
+    # ルートテーブルの種別（IGWへのデフォルトルート: Public / NAT: Private / なし: Isolated）
+    route_table_types = {}
+    for _, properties in by_type.get('AWS::EC2::Route', []):
+        route_table = _ref(properties.get('RouteTableId'))
+        if properties.get('DestinationCidrBlock') != '0.0.0.0/0':
+            continue
+        if properties.get('GatewayId'):
+            route_table_types[route_table] = 'Public'
+        elif properties.get('NatGatewayId') and route_table_types.get(route_table) != 'Public':
+            route_table_types[route_table] = 'Private'
+    subnet_route_tables = {}
+    for _, properties in by_type.get('AWS::EC2::SubnetRouteTableAssociation', []):
+        subnet_route_tables[_ref(properties.get('SubnetId'))] = _ref(properties.get('RouteTableId'))
+
+    missing = []
+
+    def physical(logical_id):
+        if logical_id not in physical_ids:
+            missing.append(logical_id)
+            return None
+        return physical_ids[logical_id]
+
+    groups = {}
+    for logical_id, properties in by_type.get('AWS::EC2::Subnet', []):
+        if _ref(properties.get('VpcId')) != vpc_id:
+            continue
+        route_table = subnet_route_tables.get(logical_id)
+        type = route_table_types.get(route_table, 'Isolated')
+        groups.setdefault(type, []).append({
+            'subnetId': physical(logical_id),
+            'cidr': properties.get('CidrBlock'),
+            'availabilityZone': properties.get('AvailabilityZone'),
+            'routeTableId': physical(route_table) if route_table else None,
+        })
+
+    subnet_groups = []
+    for type in ('Private', 'Public', 'Isolated'):
+        if type in groups:
+            subnets = sorted(groups[type], key=lambda subnet: (subnet['availabilityZone'] or '', subnet['cidr'] or ''))
+            subnet_groups.append({'name': type, 'type': type, 'subnets': subnets})
+
+    response = {
+        'vpcId': physical(vpc_id),
+        'vpcCidrBlock': vpc_properties.get('CidrBlock'),
+        'availabilityZones': [],
+        'subnetGroups': subnet_groups,
+    }
+    return response, sorted(set(missing))
+
+########################################################
+# 利用側アプリ
+########################################################
+def consuming_apps(vpc_name, root_dir=ROOT_DIR):
+    apps = []
+    for app_dir in discover_apps(root_dir):
+        for dirpath, dirnames, filenames in os.walk(app_dir):
+            dirnames[:] = [name for name in dirnames if name not in ('tests', 'cdk.out') and not name.startswith('.')]
+            if any(_uses_lookup(os.path.join(dirpath, filename), vpc_name)
+                   for filename in filenames if filename.endswith('.py')):
+                apps.append(app_dir)
+                break
+    return apps
+
+
+def _uses_lookup(path, vpc_name):
+    with open(path, encoding='utf_8') as fp:
+        return vpc_name in _LOOKUP_PATTERN.findall(fp.read())
+
+
+def update_app_context(app_dir, key, response, write=True):
+    """Return 'ok', 'missing' or 'stale' for the app's current entry."""
+    path = os.path.join(app_dir, 'cdk.context.json')
+    context = {}
+    if os.path.isfile(path):
+        with open(path, encoding='utf_8') as fp:
+            context = json.load(fp)
+    if key not in context:
+        status = 'missing'
+    elif context[key] != response:
+        status = 'stale'
+    else:
+        return 'ok'
+    if write:
+        context[key] = response
+        with open(path, 'w', encoding='utf_8') as fp:
+            json.dump(context, fp, indent=2)
+            fp.write('\n')
+    return status
+
+
+def stale_keys(app_dir, key, vpc_name):
+    """Other vpc-provider entries for the same VPC (another account/region)."""
+    path = os.path.join(app_dir, 'cdk.context.json')
+    if not os.path.isfile(path):
+        return []
+    with open(path, encoding='utf_8') as fp:
+        context = json.load(fp)
+    marker = ':filter.tag:Name=%s:' % vpc_name
+    return [name for name in context if name.startswith('vpc-provider:') and marker in name and name != key]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE)
+    parser.add_argument('--resources', required=True, help='physical IDs of the deployed VPC stack')
+    parser.add_argument('--vpc-name', default='DEMO-VPC')
+    parser.add_argument('--account', default=os.environ.get('ACCOUNT_ID'))
+    parser.add_argument('--region', default=os.environ.get('REGION'))
+    parser.add_argument('--check', action='store_true', help='report only; exit 1 if an entry is missing or stale')
+    args = parser.parse_args(argv)
+    if not args.account or not args.region:
+        parser.error('--account/--region (or ACCOUNT_ID/REGION) are required')
+
+    with open(args.template, encoding='utf_8') as fp:
+        template = json.load(fp)
+    response, missing = vpc_context(template, args.vpc_name, load_physical_ids(args.resources))
+    if missing:
+        print('[error] physical IDs missing for: %s' % ', '.join(missing))
+        return 1
+
+    key = context_key(args.account, args.region, args.vpc_name)
+    outdated = 0
+    for app_dir in consuming_apps(args.vpc_name):
+        status = update_app_context(app_dir, key, response, write=not args.check)
+        others = stale_keys(app_dir, key, args.vpc_name)
+        if status != 'ok':
+            outdated += 1
+        action = status if args.check or status == 'ok' else '%s -> written' % status
+        print('%-18s %s' % (os.path.basename(app_dir), action))
+        for other in others:
+            print('%-18s   other entry for %s: %s' % ('', args.vpc_name, other))
+    return 1 if args.check and outdated else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,17 @@
 #!/usr/bin/env python3
 import os
+import sys
 
-import aws_cdk as cdk
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-from vpc_v2.vpc_v2_stack import VpcV2Stack
+from cdk_common.synth_cache import cached_synth
 
 
-ACCOUNT_ID = os.environ.get('ACCOUNT_ID')
-REGION = os.environ.get('REGION')
-if not ACCOUNT_ID:
-    raise Exception('[error] ACCOUNT_ID')
-if not REGION:
-    raise Exception('[error] REGION')
-env = {
-    'region':REGION,
-    'account':ACCOUNT_ID,
-}
-env=cdk.Environment(account=ACCOUNT_ID, region=REGION)
+def build(app):
+    from cdk_common.app_env import get_env
+    from vpc_v2.vpc_v2_stack import VpcV2Stack
 
-app = cdk.App()
-VpcV2Stack(app, "VpcV2Stack", env=env)
+    VpcV2Stack(app, "VpcV2Stack", env=get_env())
 
-app.synth()
+
+cached_synth(os.path.dirname(os.path.abspath(__file__)), build)
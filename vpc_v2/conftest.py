@@ -0,0 +1,5 @@
+import os
+import sys
+
+# cdk_common（リポジトリ直下）を参照可能にする
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
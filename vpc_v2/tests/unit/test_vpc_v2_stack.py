@@ -13,3 +13,59 @@ def test_sqs_queue_created():
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+########################################################
+# デュアルスタック（vpc-topology ipv6）
+########################################################
+def dual_stack_template(topology=None):
+    app = core.App(context={'vpc-topology': dict({'ipv6': True}, **(topology or {}))})
+    stack = VpcV2Stack(app, "vpc-v2")
+    return assertions.Template.from_stack(stack)
+
+
+def test_ipv6_subnets_split_vpc_block_into_64s():
+    template = dual_stack_template()
+    template.resource_count_is("AWS::EC2::VPCCidrBlock", 1)
+    template.has_resource_properties("AWS::EC2::VPCCidrBlock", {"AmazonProvidedIpv6CidrBlock": True})
+    cidr = {"Fn::Cidr": [{"Fn::Select": [0, {"Fn::GetAtt": ["CfnVPC", "Ipv6CidrBlocks"]}]}, 4, "64"]}
+    for index in range(4):
+        template.has_resource_properties("AWS::EC2::Subnet", {
+            "Ipv6CidrBlock": {"Fn::Select": [index, cidr]},
+            "AssignIpv6AddressOnCreation": True,
+        })
+
+
+def test_ipv6_private_route_uses_egress_only_gateway():
+    template = dual_stack_template()
+    template.resource_count_is("AWS::EC2::EgressOnlyInternetGateway", 1)
+    template.has_resource_properties("AWS::EC2::Route", {
+        "DestinationIpv6CidrBlock": "::/0",
+        "EgressOnlyInternetGatewayId": assertions.Match.any_value(),
+        "RouteTableId": {"Ref": assertions.Match.string_like_regexp("CfnRouteTablePrivate")},
+    })
+    template.has_resource_properties("AWS::EC2::Route", {
+        "DestinationIpv6CidrBlock": "::/0",
+        "GatewayId": assertions.Match.any_value(),
+        "RouteTableId": {"Ref": assertions.Match.string_like_regexp("CfnRouteTablePublic")},
+    })
+
+
+def test_ipv6_endpoint_security_group_egress():
+    template = dual_stack_template({'endpoints': True})
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupName": "DEMO-ENDPOINT-SG",
+        "SecurityGroupEgress": assertions.Match.array_with([
+            assertions.Match.object_like({"CidrIpv6": "::/0", "IpProtocol": "-1"}),
+        ]),
+    })
+
+
+########################################################
+# タスク数上限（セッションストアのノードを除く）
+########################################################
+def test_max_tasks_excludes_session_store_nodes():
+    app = core.App(context={'session-store': True})
+    template = assertions.Template.from_stack(VpcV2Stack(app, "vpc-v2"))
+    # /26 の利用可能IP 59 から、プライマリ・レプリカ（2AZに1ノードずつ）を引く
+    template.has_output("MaxTasksPerAz", {"Value": "58"})
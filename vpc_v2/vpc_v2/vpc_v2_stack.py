@@ -1,19 +1,45 @@
 from aws_cdk import (
     # Duration,
+    Aws,
+    CfnOutput,
+    Duration,
+    Fn,
+    RemovalPolicy,
     Stack,
     CfnTag,
     aws_ec2 as _ec2,
+    aws_elasticache as _elasticache,
+    aws_s3 as _s3,
     # aws_sqs as sqs,
 )
 from constructs import Construct
 
+from cdk_common import flow_logs
+from cdk_common.session_store import ENDPOINT_EXPORT, PORT_EXPORT, REPLICATION_GROUP_ID, load_session_store
+from cdk_common.vpc_topology import (
+    load_topology,
+    max_tasks_per_az,
+    nat_gateway_zone,
+    nat_gateway_zones,
+    parse_endpoints,
+    parse_secondary_cidrs,
+    plan_subnets,
+    service_id,
+    tier_id,
+    zone_suffix,
+)
+
 class VpcV2Stack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # トポロジー（コンテキスト vpc-topology、なければ既定値。EcsV2Stackも同じ値を参照する）
+        spec = load_topology(self.node.try_get_context('vpc-topology'))
+        subnet_plans = plan_subnets(spec)
+
         # VPC作成
-        vpc = create_vpc(self)
+        vpc = create_vpc(self, spec['cidr'])
 
         # インターネットゲートウェイ作成
         internet_gateway = create_internet_gateway(self)
@@ -21,33 +47,64 @@ class VpcV2Stack(Stack):
         # インターネットゲートウェイアタッチメント作成
         internet_gateway_attachment = create_internet_gateway_attachment(self, vpc, internet_gateway)
 
-        # サブネット作成
-        subnet_dictionary = create_subnets(self, vpc)
+        # IPv6 CIDR（Amazon提供の/56）・Egress Only インターネットゲートウェイ作成（デュアルスタックの場合）
+        ipv6_cidr_block = None
+        egress_only_internet_gateway = None
+        if spec.get('ipv6'):
+            ipv6_cidr_block = create_ipv6_cidr_block(self, vpc)
+            egress_only_internet_gateway = create_egress_only_internet_gateway(self, vpc)
 
-        # ElasticIP作成
-        elastic_ip = create_elastic_ip(self, internet_gateway_attachment)
+        # 追加のCIDR作成（指定がある場合）
+        secondary_cidr_blocks = create_secondary_cidr_blocks(self, vpc, spec)
 
-        # NATゲートウェイ作成
-        nat_gateway = create_nat_gateway(self, subnet_dictionary, elastic_ip)
+        # サブネット作成
+        subnet_dictionary = create_subnets(self, vpc, subnet_plans, ipv6_cidr_block, secondary_cidr_blocks)
 
-        # ルートテーブル作成（PRIVATE）
-        route_table_private = create_private_route_table(self, vpc, nat_gateway)
+        # ElasticIP・NATゲートウェイ作成（PRIVATEの階層がある場合）
+        nat_gateways = {}
+        if any(plan.type == 'Private' for plan in subnet_plans):
+            nat_gateways = create_nat_gateways(self, nat_gateway_zones(spec), subnet_plans, subnet_dictionary,
+                                               internet_gateway_attachment)
 
-        # ルートテーブル作成（PUBLIC）
-        route_table_public = create_public_route_table(self, vpc, internet_gateway)
+        # ルートテーブル作成（階層ごと、NATが複数の場合PRIVATEはAZごと）
+        route_tables = create_route_tables(self, vpc, subnet_plans, internet_gateway, nat_gateways,
+                                           egress_only_internet_gateway)
 
         # サブネット関連付け
-        subnet_association_private(self, route_table_private, subnet_dictionary)
-        subnet_association_public(self, route_table_public, subnet_dictionary)
+        subnet_associations(self, route_tables, subnet_plans, subnet_dictionary)
+
+        # VPCエンドポイント作成（指定がある場合）
+        endpoints = parse_endpoints(spec)
+        if endpoints:
+            create_vpc_endpoints(self, vpc, endpoints, subnet_plans, subnet_dictionary, route_tables,
+                                 secondary_cidr_blocks, bool(spec.get('ipv6')))
+
+        # フローログ作成（指定がある場合、S3へカスタム形式で出力）
+        flow_log_options = flow_logs.load_options(spec.get('flow_logs'))
+        if flow_log_options:
+            create_flow_log(self, vpc, flow_log_options)
+
+        # セッションストア作成（コンテキスト session-store、AlbV2Stack・EcsV2Stackと同じ値を参照する）
+        session_store_options = load_session_store(self.node.try_get_context('session-store'))
+        self.session_store = None
+        if session_store_options:
+            self.session_store = create_session_store(self, vpc, session_store_options, subnet_plans,
+                                                      subnet_dictionary, secondary_cidr_blocks)
+
+        # AZあたりのタスク数上限（PRIVATEサブネットの利用可能IP）
+        self.max_tasks_per_az = create_max_tasks_output(self, spec, subnet_plans, session_store_options)
+
+        # VPC参照（他スタックへの受け渡し用）
+        self.vpc = create_vpc_reference(self, vpc, subnet_plans, subnet_dictionary, route_tables)
 
 ########################################################
 # VPC作成
 ########################################################
-def create_vpc(self):
+def create_vpc(self, cidr_block):
     # VPC
     vpc = _ec2.CfnVPC(
         self, 'CfnVPC',
-        cidr_block='10.5.5.0/24',
+        cidr_block=cidr_block,
         enable_dns_hostnames=True,
         enable_dns_support=True,
         tags=[
@@ -86,51 +143,82 @@ def create_internet_gateway_attachment(self, vpc, internet_gateway):
     )
     return internet_gateway_attachment
 
+########################################################
+# IPv6 CIDR作成（Amazon提供）
+########################################################
+def create_ipv6_cidr_block(self, vpc):
+    ipv6_cidr_block = _ec2.CfnVPCCidrBlock(
+        self, 'CfnVPCCidrBlockIpv6',
+        vpc_id=vpc.ref,
+        amazon_provided_ipv6_cidr_block=True,
+    )
+    return ipv6_cidr_block
+
+########################################################
+# 追加のCIDR作成
+#
+# awsvpcモードのタスクはIPを1つずつ使うため、PRIVATEのIPが足りなくなる前に
+# 100.64.0.0/10 等のCIDRを追加し、その中にPRIVATEサブネットを作成する。
+########################################################
+def create_secondary_cidr_blocks(self, vpc, spec):
+    secondary_cidr_blocks = []
+    for index, (network, _) in enumerate(parse_secondary_cidrs(spec)):
+        secondary_cidr_blocks.append(_ec2.CfnVPCCidrBlock(
+            self, 'CfnVPCCidrBlockSecondary%d' % (index + 1),
+            vpc_id=vpc.ref,
+            cidr_block=str(network),
+        ))
+    return secondary_cidr_blocks
+
+########################################################
+# Egress Only インターネットゲートウェイ作成
+#
+# PRIVATEのIPv6通信（::/0）はNATゲートウェイを経由せずにこちらから出る。
+########################################################
+def create_egress_only_internet_gateway(self, vpc):
+    egress_only_internet_gateway = _ec2.CfnEgressOnlyInternetGateway(
+        self, 'CfnEgressOnlyInternetGateway',
+        vpc_id=vpc.ref,
+    )
+    return egress_only_internet_gateway
+
 ########################################################
 # サブネット作成
 ########################################################
-def create_subnets(self, vpc):
-    # PRIVATE
-    subnet_private_a = create_subnet(self,
-                                     vpc,
-                                     'DEMO-PRIVATE-SUBNET-A',
-                                     '10.5.5.0/26',
-                                     'ap-northeast-1a')
-    subnet_private_c = create_subnet(self,
-                                     vpc,
-                                     'DEMO-PRIVATE-SUBNET-C',
-                                     '10.5.5.64/26',
-                                     'ap-northeast-1c')
-    # PUBLIC
-    subnet_public_a = create_subnet(self,
-                                    vpc,
-                                    'DEMO-PUBLIC-SUBNET-A',
-                                    '10.5.5.128/26',
-                                    'ap-northeast-1a')
-    subnet_public_c = create_subnet(self,
-                                    vpc,
-                                    'DEMO-PUBLIC-SUBNET-C',
-                                    '10.5.5.192/26',
-                                    'ap-northeast-1c')
-
-    # DICTIONARY作成
+def create_subnets(self, vpc, subnet_plans, ipv6_cidr_block=None, secondary_cidr_blocks=()):
+    # IPv6: VPCの/56からサブネットごとに/64を順に割り当てる
+    ipv6_cidr_blocks = None
+    if ipv6_cidr_block is not None:
+        ipv6_cidr_blocks = Fn.cidr(Fn.select(0, vpc.attr_ipv6_cidr_blocks), len(subnet_plans), '64')
+
+    # DICTIONARY作成（サブネット名 → CfnSubnet）
     subnet_dictionary = {}
-    subnet_dictionary['DEMO-PRIVATE-SUBNET-A'] = subnet_private_a
-    subnet_dictionary['DEMO-PRIVATE-SUBNET-C'] = subnet_private_c
-    subnet_dictionary['DEMO-PUBLIC-SUBNET-A'] = subnet_public_a
-    subnet_dictionary['DEMO-PUBLIC-SUBNET-C'] = subnet_public_c
+    for index, plan in enumerate(subnet_plans):
+        subnet = create_subnet(self,
+                               vpc,
+                               plan.name,
+                               plan.cidr,
+                               plan.availability_zone,
+                               Fn.select(index, ipv6_cidr_blocks) if ipv6_cidr_blocks else None)
+        if ipv6_cidr_block is not None:
+            subnet.add_depends_on(ipv6_cidr_block)
+        if plan.secondary is not None:
+            subnet.add_depends_on(secondary_cidr_blocks[plan.secondary])
+        subnet_dictionary[plan.name] = subnet
     return subnet_dictionary
 
 ########################################################
 # サブネット作成
 ########################################################
-def create_subnet(self, vpc, subnet_name, cidr_block, availability_zone):
+def create_subnet(self, vpc, subnet_name, cidr_block, availability_zone, ipv6_cidr_block=None):
     subnet = _ec2.CfnSubnet(
         self,
         subnet_name,
         vpc_id=vpc.ref,
         cidr_block=cidr_block,
         availability_zone=availability_zone,
+        ipv6_cidr_block=ipv6_cidr_block,
+        assign_ipv6_address_on_creation=True if ipv6_cidr_block else None,
         tags=[
             CfnTag(
                 key='Name',
@@ -140,19 +228,40 @@ def create_subnet(self, vpc, subnet_name, cidr_block, availability_zone):
     )
     return subnet
 
+########################################################
+# NATゲートウェイ作成（AZごと）
+#
+# NATが1つの場合は従来どおり CfnEIP / CfnNatGateway（DEMO-NAT-GATEWAY）、
+# 複数の場合は CfnEIPA / CfnNatGatewayA（DEMO-NAT-GATEWAY-A）のようにAZを付ける。
+########################################################
+def create_nat_gateways(self, nat_zones, subnet_plans, subnet_dictionary, internet_gateway_attachment):
+    # 最初のPUBLIC階層のサブネットに配置
+    public_tiers = [plan.tier for plan in subnet_plans if plan.type == 'Public']
+    if not public_tiers:
+        raise Exception('[error] a Public tier is required for the NAT gateway of Private tiers')
+    public_subnets = {plan.availability_zone: plan.name for plan in subnet_plans if plan.tier == public_tiers[0]}
+
+    nat_gateways = {}
+    for zone in nat_zones:
+        suffix = zone_suffix(zone) if len(nat_zones) > 1 else ''
+        elastic_ip = create_elastic_ip(self, internet_gateway_attachment, suffix)
+        subnet = subnet_dictionary.get(public_subnets[zone])
+        nat_gateways[zone] = create_nat_gateway(self, subnet, elastic_ip, suffix)
+    return nat_gateways
+
 ########################################################
 # EIP作成
 ########################################################
-def create_elastic_ip(self, internet_gateway_attachment):
+def create_elastic_ip(self, internet_gateway_attachment, suffix=''):
 
-    # EIP1 (for NATGW)
+    # EIP (for NATGW)
     elastic_ip = _ec2.CfnEIP(
-        self, 'CfnEIP',
+        self, 'CfnEIP' + suffix,
         domain="vpc",
         tags=[
             CfnTag(
                 key='Name',
-                value='DEMO-EIP',
+                value='-'.join(filter(None, ['DEMO-EIP', suffix])),
             )
         ]
     )
@@ -162,94 +271,379 @@ def create_elastic_ip(self, internet_gateway_attachment):
 ########################################################
 # NATゲートウェイ作成
 ########################################################
-def create_nat_gateway(self, subnet_dictionary, elastic_ip):
+def create_nat_gateway(self, subnet, elastic_ip, suffix=''):
 
     # NatGateway
     nat_gateway = _ec2.CfnNatGateway(
-        self, 'CfnNatGateway',
+        self, 'CfnNatGateway' + suffix,
         allocation_id=elastic_ip.attr_allocation_id,
-        subnet_id=subnet_dictionary.get('DEMO-PUBLIC-SUBNET-A').ref,
+        subnet_id=subnet.ref,
         tags=[
             CfnTag(
                 key='Name',
-                value='DEMO-NAT-GATEWAY',
+                value='-'.join(filter(None, ['DEMO-NAT-GATEWAY', suffix])),
             )
         ]
     )
     return nat_gateway
 
 ########################################################
-# ルートテーブル作成（PRIVATE）
+# ルートテーブル作成（階層ごと）
+#
+# PUBLIC: 0.0.0.0/0 → インターネットゲートウェイ
+# PRIVATE: 0.0.0.0/0 → NATゲートウェイ（NATが複数の場合はAZごとのルートテーブルでAZ内のNAT）
+#          ::/0 → Egress Only インターネットゲートウェイ（デュアルスタックの場合、PUBLICは ::/0 → インターネットゲートウェイ）
+# ISOLATED: デフォルトルートなし
 ########################################################
-def create_private_route_table(self, vpc, nat_gateway):
+def create_route_tables(self, vpc, subnet_plans, internet_gateway, nat_gateways, egress_only_internet_gateway=None):
+    """Return subnet name -> route table."""
+    nat_zones = list(nat_gateways)
+    zones = []
+    for plan in subnet_plans:
+        if plan.availability_zone not in zones:
+            zones.append(plan.availability_zone)
+
+    created = {}
+    route_tables = {}
+    for plan in subnet_plans:
+        nat_gateway = None
+        suffix = ''
+        if plan.type == 'Private':
+            nat_zone = nat_gateway_zone(nat_zones, plan.availability_zone, zones)
+            nat_gateway = nat_gateways[nat_zone]
+            if len(nat_zones) > 1:
+                # AZ内のNATを経由する（AZ間通信を発生させない）
+                suffix = zone_suffix(plan.availability_zone)
+        key = (plan.tier, suffix)
+        if key not in created:
+            created[key] = create_route_table(self, vpc, plan.tier, plan.type, internet_gateway, nat_gateway, suffix,
+                                              egress_only_internet_gateway)
+        route_tables[plan.name] = created[key]
+    return route_tables
+
 
-    # RouteTable of PrivateSubnet
-    route_table_private = _ec2.CfnRouteTable(
-        self, 'CfnRouteTablePrivate',
+def create_route_table(self, vpc, tier_name, subnet_type, internet_gateway, nat_gateway, suffix='',
+                       egress_only_internet_gateway=None):
+
+    # RouteTable of Subnet
+    route_table = _ec2.CfnRouteTable(
+        self, 'CfnRouteTable%s%s' % (tier_id(tier_name), suffix),
         vpc_id=vpc.ref,
         tags=[
             CfnTag(key="Name",
-                        value='DEMO-ROUTE-TABLE-PRIVATE'),
+                        value='-'.join(filter(None, ['DEMO-ROUTE-TABLE-%s' % tier_name.upper(), suffix]))),
         ]
     )
 
-    _ec2.CfnRoute(
-        self, 'CfnRoutePrivate',
-        route_table_id=route_table_private.ref,
-        destination_cidr_block="0.0.0.0/0",
-        nat_gateway_id=nat_gateway.ref
-    )
-    return route_table_private
+    if subnet_type == 'Public':
+        _ec2.CfnRoute(
+            self, 'CfnRoute%s%s' % (tier_id(tier_name), suffix),
+            route_table_id=route_table.ref,
+            destination_cidr_block="0.0.0.0/0",
+            gateway_id=internet_gateway.ref
+        )
+    elif subnet_type == 'Private':
+        _ec2.CfnRoute(
+            self, 'CfnRoute%s%s' % (tier_id(tier_name), suffix),
+            route_table_id=route_table.ref,
+            destination_cidr_block="0.0.0.0/0",
+            nat_gateway_id=nat_gateway.ref
+        )
+
+    # IPv6（デュアルスタックの場合）
+    if egress_only_internet_gateway is not None and subnet_type == 'Public':
+        _ec2.CfnRoute(
+            self, 'CfnRoute%s%sIpv6' % (tier_id(tier_name), suffix),
+            route_table_id=route_table.ref,
+            destination_ipv6_cidr_block="::/0",
+            gateway_id=internet_gateway.ref
+        )
+    elif egress_only_internet_gateway is not None and subnet_type == 'Private':
+        _ec2.CfnRoute(
+            self, 'CfnRoute%s%sIpv6' % (tier_id(tier_name), suffix),
+            route_table_id=route_table.ref,
+            destination_ipv6_cidr_block="::/0",
+            egress_only_internet_gateway_id=egress_only_internet_gateway.ref
+        )
+    return route_table
+
+########################################################
+# サブネット関連付け
+########################################################
+def subnet_associations(self, route_tables, subnet_plans, subnet_dictionary):
+    for plan in subnet_plans:
+        _ec2.CfnSubnetRouteTableAssociation(
+            self, 'CfnSubnetRouteTableAssociation%s%s' % (tier_id(plan.tier), zone_suffix(plan.availability_zone)),
+            route_table_id=route_tables[plan.name].ref,
+            subnet_id=subnet_dictionary.get(plan.name).ref
+        )
 
 ########################################################
-# ルートテーブル作成（PUBLIC）
+# VPCエンドポイント作成
+#
+# ECRからのイメージ取得・CloudWatch Logs・S3をNATゲートウェイを経由させない。
+# ゲートウェイ型（s3 等）: PRIVATE/ISOLATEDの全ルートテーブル
+# インターフェイス型（ecr.api / ecr.dkr / logs 等）: 最初のPRIVATE（なければISOLATED）階層の
+#   各AZのサブネットに配置、専用のセキュリティグループ（VPC内から443のみ）
 ########################################################
-def create_public_route_table(self, vpc, internet_gateway):
+def create_vpc_endpoints(self, vpc, endpoints, subnet_plans, subnet_dictionary, route_tables,
+                         secondary_cidr_blocks=(), ipv6=False):
+    internal_plans = [plan for plan in subnet_plans if plan.type in ('Private', 'Isolated')]
+    if not internal_plans:
+        raise Exception('[error] endpoints need a Private or Isolated tier')
+
+    route_table_ids = []
+    for plan in internal_plans:
+        route_table = route_tables[plan.name]
+        if route_table not in route_table_ids:
+            route_table_ids.append(route_table)
+
+    endpoint_tier = next((plan.tier for plan in internal_plans if plan.type == 'Private'), internal_plans[0].tier)
+    subnet_ids = [subnet_dictionary.get(plan.name).ref for plan in subnet_plans if plan.tier == endpoint_tier]
+
+    security_group = None
+    if any(endpoint_type == 'Interface' for _, endpoint_type in endpoints):
+        security_group = create_endpoint_security_group(self, vpc, secondary_cidr_blocks, ipv6)
+
+    vpc_endpoints = {}
+    for service, endpoint_type in endpoints:
+        if endpoint_type == 'Gateway':
+            vpc_endpoints[service] = _ec2.CfnVPCEndpoint(
+                self, 'CfnVPCEndpoint%s' % service_id(service),
+                service_name='com.amazonaws.%s.%s' % (Aws.REGION, service),
+                vpc_id=vpc.ref,
+                vpc_endpoint_type='Gateway',
+                route_table_ids=[route_table.ref for route_table in route_table_ids],
+            )
+        else:
+            vpc_endpoints[service] = _ec2.CfnVPCEndpoint(
+                self, 'CfnVPCEndpoint%s' % service_id(service),
+                service_name='com.amazonaws.%s.%s' % (Aws.REGION, service),
+                vpc_id=vpc.ref,
+                vpc_endpoint_type='Interface',
+                private_dns_enabled=True,
+                subnet_ids=subnet_ids,
+                security_group_ids=[security_group.attr_group_id],
+            )
+    return vpc_endpoints
+
 
-    # RouteTable of PublicSubnet
-    route_table_public = _ec2.CfnRouteTable(
-        self, 'CfnRouteTablePublic',
+def create_endpoint_security_group(self, vpc, secondary_cidr_blocks=(), ipv6=False):
+    # VPCの全CIDR（追加のCIDRを含む）から443
+    cidr_blocks = [vpc.attr_cidr_block] + [cidr_block.cidr_block for cidr_block in secondary_cidr_blocks]
+
+    # アウトバウンド（デュアルスタックの場合は ::/0 を追加、未指定はIPv4の既定のルールのみ）
+    security_group_egress = None
+    if ipv6:
+        security_group_egress = [
+            _ec2.CfnSecurityGroup.EgressProperty(ip_protocol='-1', cidr_ip='0.0.0.0/0'),
+            _ec2.CfnSecurityGroup.EgressProperty(ip_protocol='-1', cidr_ipv6='::/0'),
+        ]
+    security_group = _ec2.CfnSecurityGroup(
+        self, 'CfnSecurityGroupEndpoint',
+        group_description='DEMO-ENDPOINT-SG',
+        group_name='DEMO-ENDPOINT-SG',
         vpc_id=vpc.ref,
+        security_group_ingress=[
+            _ec2.CfnSecurityGroup.IngressProperty(
+                ip_protocol='tcp',
+                from_port=443,
+                to_port=443,
+                cidr_ip=cidr_block,
+                description='from vpc:443',
+            )
+            for cidr_block in cidr_blocks
+        ],
+        security_group_egress=security_group_egress,
         tags=[
-            CfnTag(key="Name",
-                        value='DEMO-ROUTE-TABLE-PUBLIC'),
+            CfnTag(
+                key='Name',
+                value='DEMO-ENDPOINT-SG',
+            )
+        ]
+    )
+    return security_group
+
+########################################################
+# フローログ作成
+#
+# 形式は cdk_common.flow_logs.LOG_FORMAT（tools.flow_log_report で集計する）。
+# バケットは保持日数で失効させる。
+# ※ログが書き込まれたバケットは空でないため削除できない。スタック削除時は残す（RETAIN）
+########################################################
+def create_flow_log(self, vpc, options):
+    # S3
+    bucket = _s3.Bucket(self, 'FlowLogBucket',
+        block_public_access=_s3.BlockPublicAccess.BLOCK_ALL,
+        encryption=_s3.BucketEncryption.S3_MANAGED,
+        lifecycle_rules=[
+            _s3.LifecycleRule(
+                expiration=Duration.days(int(options['retention_days'])),
+            )
+        ],
+        removal_policy=RemovalPolicy.RETAIN
+    )
+
+    # フローログ
+    flow_log = _ec2.CfnFlowLog(
+        self, 'CfnFlowLog',
+        resource_id=vpc.ref,
+        resource_type='VPC',
+        traffic_type=options['traffic_type'],
+        log_destination_type='s3',
+        log_destination=bucket.bucket_arn,
+        log_format=flow_logs.LOG_FORMAT,
+        max_aggregation_interval=int(options['aggregation_interval']),
+        tags=[
+            CfnTag(
+                key='Name',
+                value='DEMO-FLOW-LOG',
+            )
         ]
     )
-    _ec2.CfnRoute(
-        self, 'CfnRoutePublic',
-        route_table_id=route_table_public.ref,
-        destination_cidr_block="0.0.0.0/0",
-        gateway_id=internet_gateway.ref
+
+    CfnOutput(
+        self, 'FlowLogBucketName',
+        value=bucket.bucket_name,
+        description='aws s3 sync s3://<bucket>/AWSLogs/ <dir> && python -m tools.flow_log_report <dir>',
     )
-    return route_table_public
+    return flow_log
 
 ########################################################
-# サブネット関連付け（PRIVATE）
+# セッションストア作成（ElastiCache for Redis）
+#
+# 最初のPRIVATE階層の各AZのサブネットに配置、専用のセキュリティグループ（VPC内からRedisのポートのみ）。
+# エンドポイントは DEMO-SESSION-STORE-ENDPOINT / DEMO-SESSION-STORE-PORT としてエクスポートする。
 ########################################################
-def subnet_association_private(self, route_table_private, subnet_dictionary):
+def create_session_store(self, vpc, options, subnet_plans, subnet_dictionary, secondary_cidr_blocks=()):
+    private_tier = next((plan.tier for plan in subnet_plans if plan.type == 'Private'), None)
+    if private_tier is None:
+        raise Exception('[error] session-store needs a Private tier')
+    subnet_ids = [subnet_dictionary.get(plan.name).ref for plan in subnet_plans if plan.tier == private_tier]
+
+    # サブネットグループ
+    subnet_group = _elasticache.CfnSubnetGroup(
+        self, 'CfnSubnetGroupSessionStore',
+        cache_subnet_group_name=REPLICATION_GROUP_ID,
+        description='DEMO-SESSION-STORE',
+        subnet_ids=subnet_ids,
+    )
 
-    _ec2.CfnSubnetRouteTableAssociation(
-        self, 'CfnSubnetRouteTableAssociationPrivateA',
-        route_table_id=route_table_private.ref,
-        subnet_id=subnet_dictionary.get('DEMO-PRIVATE-SUBNET-A').ref
+    # セキュリティグループ
+    port = int(options['port'])
+    cidr_blocks = [vpc.attr_cidr_block] + [cidr_block.cidr_block for cidr_block in secondary_cidr_blocks]
+    security_group = _ec2.CfnSecurityGroup(
+        self, 'CfnSecurityGroupSessionStore',
+        group_description='DEMO-SESSION-STORE-SG',
+        group_name='DEMO-SESSION-STORE-SG',
+        vpc_id=vpc.ref,
+        security_group_ingress=[
+            _ec2.CfnSecurityGroup.IngressProperty(
+                ip_protocol='tcp',
+                from_port=port,
+                to_port=port,
+                cidr_ip=cidr_block,
+                description='from vpc:%d' % port,
+            )
+            for cidr_block in cidr_blocks
+        ],
+        tags=[
+            CfnTag(
+                key='Name',
+                value='DEMO-SESSION-STORE-SG',
+            )
+        ]
+    )
+
+    # レプリケーショングループ（クラスターモード無効、レプリカがある場合はマルチAZ）
+    replicas = int(options['replicas'])
+    replication_group = _elasticache.CfnReplicationGroup(
+        self, 'CfnReplicationGroupSessionStore',
+        replication_group_id=REPLICATION_GROUP_ID,
+        replication_group_description='DEMO-SESSION-STORE',
+        engine='redis',
+        engine_version=str(options['engine_version']),
+        cache_node_type=options['node_type'],
+        num_cache_clusters=1 + replicas,
+        automatic_failover_enabled=replicas > 0,
+        multi_az_enabled=replicas > 0,
+        port=port,
+        cache_subnet_group_name=subnet_group.ref,
+        security_group_ids=[security_group.attr_group_id],
+        at_rest_encryption_enabled=True,
+        transit_encryption_enabled=bool(options['transit_encryption']),
+        tags=[
+            CfnTag(
+                key='Name',
+                value='DEMO-SESSION-STORE',
+            )
+        ]
     )
-    _ec2.CfnSubnetRouteTableAssociation(
-        self, 'CfnSubnetRouteTableAssociationPrivateC',
-        route_table_id=route_table_private.ref,
-        subnet_id=subnet_dictionary.get('DEMO-PRIVATE-SUBNET-C').ref
+
+    CfnOutput(
+        self, 'SessionStoreEndpoint',
+        value=replication_group.attr_primary_end_point_address,
+        export_name=ENDPOINT_EXPORT,
+    )
+    CfnOutput(
+        self, 'SessionStorePort',
+        value=replication_group.attr_primary_end_point_port,
+        export_name=PORT_EXPORT,
     )
+    return replication_group
 
 ########################################################
-# サブネット関連付け（PUBLIC）
+# AZあたりのタスク数上限（出力）
+#
+# 最も少ないAZの値をエクスポートする（DEMO-MAX-TASKS-PER-AZ）。
 ########################################################
-def subnet_association_public(self, route_table_public, subnet_dictionary):
-    _ec2.CfnSubnetRouteTableAssociation(
-        self, 'CfnSubnetRouteTableAssociationPublicA',
-        route_table_id=route_table_public.ref,
-        subnet_id=subnet_dictionary.get('DEMO-PUBLIC-SUBNET-A').ref
+def create_max_tasks_output(self, spec, subnet_plans, session_store_options=None):
+    cache_nodes = 1 + int(session_store_options['replicas']) if session_store_options else 0
+    tasks_per_az = max_tasks_per_az(spec, subnet_plans, cache_nodes)
+    if not tasks_per_az:
+        return None
+    max_tasks = min(tasks_per_az.values())
+    CfnOutput(
+        self, 'MaxTasksPerAz',
+        value=str(max_tasks),
+        description='usable task IPs per AZ (%s)' % ', '.join(
+            '%s: %d' % (zone, count) for zone, count in sorted(tasks_per_az.items())),
+        export_name='DEMO-MAX-TASKS-PER-AZ',
     )
-    _ec2.CfnSubnetRouteTableAssociation(
-        self, 'CfnSubnetRouteTableAssociationPublicC',
-        route_table_id=route_table_public.ref,
-        subnet_id=subnet_dictionary.get('DEMO-PUBLIC-SUBNET-C').ref
+    return max_tasks
+
+########################################################
+# VPC参照作成（IVpc）
+#
+# 同一アプリ内の他スタック（ALB/ECS）へ渡すためのIVpc。
+# 参照はクロススタック参照（Export/ImportValue）として出力される。
+########################################################
+def create_vpc_reference(self, vpc, subnet_plans, subnet_dictionary, route_tables):
+    availability_zones = []
+    groups = {}
+    for plan in subnet_plans:
+        if plan.availability_zone not in availability_zones:
+            availability_zones.append(plan.availability_zone)
+        group = groups.setdefault(plan.type, {'names': [], 'ids': [], 'route_table_ids': []})
+        if plan.tier not in group['names']:
+            group['names'].append(plan.tier)
+        group['ids'].append(subnet_dictionary.get(plan.name).ref)
+        group['route_table_ids'].append(route_tables[plan.name].ref)
+
+    attributes = {}
+    for subnet_type, group in groups.items():
+        prefix = subnet_type.lower()
+        attributes['%s_subnet_ids' % prefix] = group['ids']
+        attributes['%s_subnet_route_table_ids' % prefix] = group['route_table_ids']
+        # 同じ種別の階層が複数ある場合のみ名前で区別する
+        if len(group['names']) > 1:
+            attributes['%s_subnet_names' % prefix] = group['names']
+
+    vpc_reference = _ec2.Vpc.from_vpc_attributes(
+        self, 'VpcReference',
+        vpc_id=vpc.ref,
+        vpc_cidr_block=vpc.attr_cidr_block,
+        availability_zones=availability_zones,
+        **attributes
     )
+    return vpc_reference